@@ -1,7 +1,8 @@
-from flask import Flask
-from app.web.views import web
-
 def create_app():
+    # Imported here so `import app.<submodule>` doesn't pull in Flask and the whole web stack
+    from flask import Flask
+    from app.web.views import web
+
     app = Flask(__name__)
     app.register_blueprint(web)
     return app
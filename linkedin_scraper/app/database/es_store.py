@@ -1,33 +1,191 @@
 # app/Database/es_store.py
+#
+#   python -m app.database.es_store setup            # template, ILM policy, pipeline, alias
+#   python -m app.database.es_store rollover
+#   python -m app.database.es_store reindex-legacy   # old daily indices -> alias
 
 import os
+import json
 import time
-from elasticsearch import Elasticsearch, NotFoundError
+import atexit
+import argparse
+import threading
+from elasticsearch import Elasticsearch, NotFoundError, helpers
 
-class ESStore:
-    def __init__(self, index_name="linkedin_jobs"):
-        elastic_host = os.environ.get("ELASTICSEARCH_HOST", "elasticsearch")
-        elastic_port = os.environ.get("ELASTICSEARCH_PORT", "9200")
+BULK_MAX_DOCS = int(os.environ.get("ES_BULK_MAX_DOCS", 500))
+BULK_MAX_BYTES = int(os.environ.get("ES_BULK_MAX_MB", 5)) * 1024 * 1024
+BULK_FLUSH_INTERVAL = float(os.environ.get("ES_BULK_FLUSH_INTERVAL", 5))
+BULK_MAX_RETRIES = 3
+MGET_CHUNK_SIZE = 1000
+ES_CONNECTIONS_PER_NODE = int(os.environ.get("ES_CONNECTIONS_PER_NODE", 10))
 
+# Jobs live in rollover indices linkedin-jobs-000001, -000002, ... behind the linkedin-jobs alias.
+# Writes (ours and Logstash's) go to the alias's write index; reads and searches span all of them.
+JOBS_ALIAS = os.environ.get("ES_JOBS_ALIAS", "linkedin-jobs")
+ROLLOVER_MAX_SHARD_SIZE = os.environ.get("ES_ROLLOVER_MAX_SHARD_SIZE", "20gb")
+ROLLOVER_MAX_AGE = os.environ.get("ES_ROLLOVER_MAX_AGE", "30d")
+ES_REPLICAS = int(os.environ.get("ES_REPLICAS", 0))  # single-node cluster in docker-compose
 
-        elastic_url = f"http://{elastic_host}:{elastic_port}"
 
-        print(f"[DEBUG] Connecting to Elasticsearch at {elastic_url}")
+def _text_with_keyword(ignore_above=256):
+    return {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": ignore_above}}}
 
-        self.client = Elasticsearch(
-            hosts=[{"host": elastic_host, "port": int(elastic_port), "scheme": "http"}],
-            verify_certs=False,
-            ssl_show_warn=False,
-            request_timeout=30,
-            retry_on_timeout=True,
-        )
+
+JOB_MAPPINGS = {
+    "dynamic": "false",
+    "properties": {
+        "job_id": {"type": "keyword"},
+        "job_url": {"type": "keyword", "index": False},
+        "job_title": _text_with_keyword(),
+        "company_name": _text_with_keyword(),
+        "location": _text_with_keyword(),
+        "posted_time": _text_with_keyword(),
+        # str(datetime) from posted_text_to_datetime; "None" when LinkedIn's text didn't parse.
+        # The keyword subfield is what the Kibana dashboard was built on.
+        "posted_timestamp": {"type": "date", "format": "yyyy-MM-dd HH:mm:ss||strict_date_optional_time", "ignore_malformed": True,
+                             "fields": {"keyword": {"type": "keyword"}}},
+        "applicants": {"type": "keyword"},
+        "applicants_count": {"type": "integer"},
+        "description": {"type": "text"},
+        "Seniority level": _text_with_keyword(),
+        "Employment type": _text_with_keyword(),
+        "Job function": _text_with_keyword(),
+        "Industries": _text_with_keyword(),
+    },
+}
+
+# "Over 200 applicants" -> applicants_count: 200, for whichever writer (us or Logstash) indexes the doc
+JOB_PIPELINE = {
+    "description": "Derive numeric fields for linkedin-jobs",
+    "processors": [
+        {"grok": {"field": "applicants", "patterns": ["%{INT:applicants_count:int}"], "ignore_missing": True, "ignore_failure": True}},
+    ],
+}
+
+_es_client = None
+_es_store = None
+_init_thread = None
+_lock = threading.Lock()
+INIT_RETRY_SECONDS = 10
+
+
+def get_es_client():
+    """The process-wide Elasticsearch client (and its connection pool), built on first use."""
+    global _es_client
+    with _lock:
+        if _es_client is None:
+            elastic_host = os.environ.get("ELASTICSEARCH_HOST", "elasticsearch")
+            elastic_port = os.environ.get("ELASTICSEARCH_PORT", "9200")
+            print(f"[DEBUG] Connecting to Elasticsearch at http://{elastic_host}:{elastic_port}")
+            _es_client = Elasticsearch(
+                hosts=[{"host": elastic_host, "port": int(elastic_port), "scheme": "http"}],
+                verify_certs=False,
+                ssl_show_warn=False,
+                request_timeout=30,
+                retry_on_timeout=True,
+                connections_per_node=ES_CONNECTIONS_PER_NODE,
+            )
+        return _es_client
+
+
+class BulkIndexer:
+    """
+    Buffers index/update actions and sends them with helpers.streaming_bulk once max_docs are
+    queued, or flush_interval seconds after the oldest buffered action. 429s are retried with
+    backoff by the helper; every other per-item failure is logged and kept in `errors`.
+    router, if given, is called with the actions of each flush before they are sent, so the
+    lookups it needs happen once per flush instead of once per add().
+    """
+
+    def __init__(self, client, max_docs=BULK_MAX_DOCS, max_bytes=BULK_MAX_BYTES, flush_interval=BULK_FLUSH_INTERVAL, router=None):
+        self.client = client
+        self.router = router
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self.errors = []
+        self.stats = {"sent": 0, "succeeded": 0, "failed": 0, "flushes": 0}
+
+    def add(self, action):
+        with self._lock:
+            self._buffer.append(action)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.max_docs
+        self._ensure_timer()
+        if full:
+            self.flush()
+
+    def pending_ids(self, index_names=None):
+        """IDs of buffered actions, optionally only those targeting one of index_names."""
+        with self._lock:
+            return {action["_id"] for action in self._buffer if index_names is None or action.get("_index") in index_names}
+
+    def _ensure_timer(self):
+        if self._timer is None and self.flush_interval:
+            self._timer = threading.Thread(target=self._flush_periodically, daemon=True, name="es-bulk-flush")
+            self._timer.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval / 2)
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[ES] Background bulk flush failed: {e}")
+
+    def flush(self):
+        """Send everything buffered. Returns the list of per-item errors from this flush."""
+        with self._flush_lock:
+            with self._lock:
+                actions, self._buffer, self._oldest = self._buffer, [], None
+            if not actions:
+                return []
+            if self.router:
+                self.router(actions)
+
+            failed = []
+            for ok, item in helpers.streaming_bulk(
+                self.client,
+                actions,
+                chunk_size=self.max_docs,
+                max_chunk_bytes=self.max_bytes,
+                max_retries=BULK_MAX_RETRIES,
+                raise_on_error=False,
+                raise_on_exception=False,
+            ):
+                if ok:
+                    continue
+                op_type, result = next(iter(item.items()))
+                failed.append(item)
+                print(f"[ES] Bulk {op_type} failed for {result.get('_id')}: {result.get('status')} {result.get('error')}")
+
+            self.stats["flushes"] += 1
+            self.stats["sent"] += len(actions)
+            self.stats["failed"] += len(failed)
+            self.stats["succeeded"] += len(actions) - len(failed)
+            self.errors = (self.errors + failed)[-1000:]
+            return failed
+
+
+class ESStore:
+    def __init__(self, index_name=JOBS_ALIAS, client=None, bulk_max_docs=BULK_MAX_DOCS, flush_interval=BULK_FLUSH_INTERVAL):
+        self.client = client or get_es_client()
         self.index_name = index_name
+        self.bulk = BulkIndexer(self.client, max_docs=bulk_max_docs, flush_interval=flush_interval, router=self._route)
+        atexit.register(self.flush)
 
         self.wait_for_elasticsearch()
 
-        # Auto-create index if missing
-        if not self.client.indices.exists(index=self.index_name):
-            self.create_index()
+        self.ensure_layout()
 
     def wait_for_elasticsearch(self, retries=30, delay=5):
         for attempt in range(retries):
@@ -44,40 +202,207 @@ class ESStore:
 
         raise Exception(f"Could not connect to Elasticsearch after {retries} retries")
 
-    def create_index(self):
-        mapping = {
-            "mappings": {
-                "properties": {
-                    "job_id": {"type": "keyword"},
-                    "job_url": {"type": "text"},
-                    "job_title": {"type": "text"},
-                    "company_name": {"type": "text"},
-                    "location": {"type": "text"},
-                    "posted_time": {"type": "text"},
-                    "applicants": {"type": "text"},
-                    "description": {"type": "text"},
-                    "Seniority level": {"type": "text"},
-                    "Employment type": {"type": "text"},
-                    "Job function": {"type": "text"},
-                    "Industries": {"type": "text"},
-                }
+    def ensure_layout(self):
+        """
+        Install the ILM policy, ingest pipeline and index template for index_name-*, then bootstrap
+        index_name-000001 as the write index behind the index_name alias. Safe to run repeatedly.
+        """
+        alias = self.index_name
+        self.client.ilm.put_lifecycle(name=f"{alias}-policy", policy={
+            "phases": {
+                "hot": {"actions": {"rollover": {"max_primary_shard_size": ROLLOVER_MAX_SHARD_SIZE, "max_age": ROLLOVER_MAX_AGE}}},
             }
-        }
-        self.client.indices.create(index=self.index_name, body=mapping)
-        print(f"[DEBUG] Created index: {self.index_name}")
+        })
+        self.client.ingest.put_pipeline(id=f"{alias}-pipeline", **JOB_PIPELINE)
+        self.client.indices.put_index_template(
+            name=f"{alias}-template",
+            index_patterns=[f"{alias}-*"],
+            priority=200,
+            template={
+                "settings": {
+                    "number_of_shards": 1,
+                    "number_of_replicas": ES_REPLICAS,
+                    "refresh_interval": "5s",
+                    "index.default_pipeline": f"{alias}-pipeline",
+                    "index.lifecycle.name": f"{alias}-policy",
+                    "index.lifecycle.rollover_alias": alias,
+                },
+                "mappings": JOB_MAPPINGS,
+            },
+        )
+        if not self.client.indices.exists_alias(name=alias):
+            self.client.indices.create(index=f"{alias}-000001", aliases={alias: {"is_write_index": True}})
+            print(f"[DEBUG] Created index {alias}-000001 behind alias {alias}")
 
-    def is_job_id_seen(self, job_id):
+    def rollover(self, dry_run=False):
+        """Roll the alias over now if the write index is past the size/age conditions (ILM also does this on its own)."""
+        return self.client.indices.rollover(
+            alias=self.index_name,
+            conditions={"max_primary_shard_size": ROLLOVER_MAX_SHARD_SIZE, "max_age": ROLLOVER_MAX_AGE},
+            dry_run=dry_run,
+        )
+
+    def backing_indices(self):
+        """Concrete indices behind the alias, write index first, then newest to oldest."""
         try:
-            self.client.get(index=self.index_name, id=job_id)
-            return True
+            response = self.client.indices.get_alias(name=self.index_name)
         except NotFoundError:
-            return False
+            return [self.index_name]  # a plain index rather than an alias
+        def is_write(index):
+            return bool(response[index]["aliases"].get(self.index_name, {}).get("is_write_index"))
+        return sorted(sorted(response, reverse=True), key=lambda index: not is_write(index))
+
+    def _mget(self, index, job_ids, source=False):
+        """Realtime multi-get against one concrete index: {job_id: doc} for the IDs it holds."""
+        found = {}
+        for i in range(0, len(job_ids), MGET_CHUNK_SIZE):
+            response = self.client.mget(index=index, ids=job_ids[i:i + MGET_CHUNK_SIZE], source=source)
+            for doc in response["docs"]:
+                if doc.get("found"):
+                    found[doc["_id"]] = doc
+        return found
+
+    def _locate(self, job_ids):
+        """
+        {job_id: concrete index} for the IDs that exist anywhere behind the alias. Uses realtime
+        mget per backing index rather than search, so a doc flushed a moment ago (not yet
+        refreshed) is still found; the newest index is asked first and each ID only until it's found.
+        """
+        located, remaining = {}, list(dict.fromkeys(str(job_id) for job_id in job_ids))
+        for index in self.backing_indices():
+            if not remaining:
+                break
+            for job_id in self._mget(index, remaining):
+                located[job_id] = index
+            remaining = [job_id for job_id in remaining if job_id not in located]
+        return located
+
+    def filter_unseen(self, job_ids):
+        """Return the job IDs (in input order) that are neither indexed nor waiting in the bulk buffer."""
+        job_ids = [str(job_id) for job_id in job_ids]
+        buffered = self.bulk.pending_ids()
+        found = self._locate([job_id for job_id in job_ids if job_id not in buffered])
+        return [job_id for job_id in job_ids if job_id not in buffered and job_id not in found]
+
+    def is_job_id_seen(self, job_id):
+        return not self.filter_unseen([job_id])
 
     def add_job_data(self, job_data):
-        self.client.index(index=self.index_name, id=job_data["job_id"], body=job_data)
+        """Queue a job for bulk indexing; call flush() to send it right away."""
+        self.add_jobs([job_data])
+
+    def add_jobs(self, jobs):
+        """Queue jobs for bulk indexing. Only buffers; where each one goes is decided at flush (_route)."""
+        for job_data in jobs:
+            job_id = str(job_data["job_id"])
+            self.bulk.add({"_op_type": "index", "_index": self.index_name, "_id": job_id, "_source": job_data})
 
     def update_job_data(self, job_id, updated_fields):
-        self.client.update(index=self.index_name, id=job_id, body={"doc": updated_fields})
+        """Queue a partial update (the fields are merged into the existing document)."""
+        self.update_jobs({job_id: updated_fields})
+
+    def update_jobs(self, updates):
+        """updates: {job_id: {field: value, ...}}. Jobs that don't exist yet are indexed as new documents."""
+        for job_id, updated_fields in updates.items():
+            self.bulk.add({"_op_type": "update", "_index": self.index_name, "_id": str(job_id),
+                           "doc": updated_fields, "doc_as_upsert": True})
+
+    def _route(self, actions):
+        """
+        Point each buffered action at the index that already holds its job, with one _locate for
+        the whole flush: after a rollover that isn't the write index, and a job rewritten through
+        the alias would end up in two indices. New jobs stay on the alias (its write index).
+        """
+        pending = [action for action in actions if action["_index"] == self.index_name]
+        if not pending:
+            return
+        located = self._locate([action["_id"] for action in pending])
+        for action in pending:
+            index = located.get(action["_id"])
+            if index:
+                action["_index"] = index
+            if action["_op_type"] == "update":
+                action["doc_as_upsert"] = index is None
+
+    def get_job(self, job_id):
+        job_id = str(job_id)
+        for index in self.backing_indices():
+            doc = self._mget(index, [job_id], source=True).get(job_id)
+            if doc:
+                return doc["_source"]
+        return None
+
+    def flush(self):
+        return self.bulk.flush()
+
+def get_es_store():
+    """
+    The shared ESStore, created on first call. Building it waits for the cluster and creates the
+    index, so nothing pays for that just by importing this module.
+    """
+    global _es_store
+    if _es_store is None:
+        store = ESStore()
+        with _lock:
+            if _es_store is None:
+                _es_store = store
+    return _es_store
+
+
+def peek_es_store():
+    """The shared ESStore if it has been built already, else None. Never blocks."""
+    return _es_store
+
+
+def init_es_store_in_background():
+    """
+    Build the shared ESStore on a daemon thread, retrying until the cluster is up. For the web
+    app, which must not hold a request while the store waits for the cluster and sets up the layout.
+    """
+    global _init_thread
+    with _lock:
+        if _es_store is not None or (_init_thread is not None and _init_thread.is_alive()):
+            return
+        _init_thread = threading.Thread(target=_init_until_ready, name="es-store-init", daemon=True)
+        _init_thread.start()
+
+
+def _init_until_ready():
+    while _es_store is None:
+        try:
+            get_es_store()
+            print("[ES] Store ready")
+        except Exception as e:
+            print(f"[ES] Store not ready, retrying in {INIT_RETRY_SECONDS}s: {e}")
+            time.sleep(INIT_RETRY_SECONDS)
+
+
+def set_es_store(store):
+    """Swap in another store (a stand-in cluster, a different index) for the rest of the process."""
+    global _es_store
+    _es_store = store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the linkedin-jobs Elasticsearch layout")
+    parser.add_argument("command", choices=["setup", "rollover", "reindex-legacy"],
+                        help="setup: install template/policy/pipeline and bootstrap the alias; "
+                             "rollover: roll the write index if past its conditions; "
+                             "reindex-legacy: copy the old daily linkedin-jobs-YYYY.MM.dd indices behind the alias")
+    parser.add_argument("--dry_run", action="store_true")
+    args = parser.parse_args()
+
+    store = get_es_store()  # setup happens in the constructor
+    if args.command == "rollover":
+        print(json.dumps(store.rollover(dry_run=args.dry_run).body, indent=2))
+    elif args.command == "reindex-legacy":
+        response = store.client.reindex(
+            source={"index": f"{store.index_name}-20*"},
+            dest={"index": store.index_name, "op_type": "index"},
+            wait_for_completion=False,
+        )
+        print(f"[ES] Reindex started, task {response['task']}")
+
 
-# Instantiate a global object
-es_store = ESStore()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# app/database/job_search.py
+#
+# Query building for GET /search. Filters go in bool.filter (cached, unscored), free text in
+# bool.must. Pages are cursor-based: each response carries an opaque `next` token holding the
+# last hit's sort values, which goes back as ?search_after=<token> for the next page. No from/size
+# offsets, so page 1000 costs the same as page 1.
+
+import json
+import base64
+
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_SIZE = 20
+TEXT_FIELDS = ["job_title^3", "company_name^2", "description"]
+
+# query parameter -> keyword field; comma-separated values match any of them
+TERM_FILTERS = {
+    "company": "company_name.keyword",
+    "location": "location.keyword",
+    "title": "job_title.keyword",
+    "seniority": "Seniority level.keyword",
+    "employment_type": "Employment type.keyword",
+    "job_function": "Job function.keyword",
+    "industry": "Industries.keyword",
+}
+
+FACETS = {
+    "companies": {"terms": {"field": "company_name.keyword", "size": 20}},
+    "locations": {"terms": {"field": "location.keyword", "size": 20}},
+    "seniority": {"terms": {"field": "Seniority level.keyword", "size": 10}},
+    "employment_type": {"terms": {"field": "Employment type.keyword", "size": 10}},
+    "posted_per_day": {"date_histogram": {"field": "posted_timestamp", "calendar_interval": "day", "min_doc_count": 1}},
+    "applicants": {"range": {"field": "applicants_count", "ranges": [{"to": 25}, {"from": 25, "to": 100}, {"from": 100}]}},
+}
+
+SORTS = {
+    "posted": [{"posted_timestamp": {"order": "desc", "missing": "_last"}}, {"job_id": "asc"}],
+    "relevance": [{"_score": "desc"}, {"job_id": "asc"}],
+}
+
+
+class SearchParamError(ValueError):
+    pass
+
+
+def encode_cursor(sort_values):
+    return base64.urlsafe_b64encode(json.dumps(sort_values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise SearchParamError("Invalid search_after cursor")
+    if not isinstance(values, list):
+        raise SearchParamError("Invalid search_after cursor")
+    return values
+
+
+def _int_param(params, name, default=None):
+    value = params.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise SearchParamError(f"'{name}' must be an integer")
+
+
+def build_search_body(params):
+    """Turn request args (a dict or werkzeug MultiDict) into a search body."""
+    filters = []
+    for param, field in TERM_FILTERS.items():
+        value = params.get(param)
+        if value:
+            filters.append({"terms": {field: [v.strip() for v in value.split(",") if v.strip()]}})
+
+    posted = {}
+    if params.get("posted_after"):
+        posted["gte"] = params["posted_after"]
+    if params.get("posted_before"):
+        posted["lte"] = params["posted_before"]
+    if posted:
+        filters.append({"range": {"posted_timestamp": posted}})
+
+    applicants = {}
+    min_applicants = _int_param(params, "min_applicants")
+    max_applicants = _int_param(params, "max_applicants")
+    if min_applicants is not None:
+        applicants["gte"] = min_applicants
+    if max_applicants is not None:
+        applicants["lte"] = max_applicants
+    if applicants:
+        filters.append({"range": {"applicants_count": applicants}})
+
+    must = []
+    if params.get("q"):
+        must.append({"multi_match": {"query": params["q"], "fields": TEXT_FIELDS, "type": "best_fields"}})
+
+    sort_name = params.get("sort") or ("relevance" if params.get("q") else "posted")
+    if sort_name not in SORTS:
+        raise SearchParamError(f"'sort' must be one of {list(SORTS)}")
+
+    size = _int_param(params, "size", DEFAULT_PAGE_SIZE)
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise SearchParamError(f"'size' must be between 1 and {MAX_PAGE_SIZE}")
+
+    body = {
+        "query": {"bool": {"filter": filters, "must": must or [{"match_all": {}}]}},
+        "sort": SORTS[sort_name],
+        "size": size,
+        "track_total_hits": params.get("exact_total") == "1" or 10000,
+        "_source": {"excludes": ["description"]} if params.get("description") != "1" else True,
+    }
+    if params.get("search_after"):
+        body["search_after"] = decode_cursor(params["search_after"])
+    # Facets describe the whole result set, so only compute them for the first page
+    if params.get("aggs") == "1" and "search_after" not in body:
+        body["aggs"] = FACETS
+    return body
+
+
+def _simplify_aggs(aggregations):
+    return {name: [{"key": b.get("key_as_string", b.get("key")), "count": b["doc_count"]} for b in agg["buckets"]]
+            for name, agg in aggregations.items()}
+
+
+def search_jobs(client, index, params):
+    body = build_search_body(params)
+    response = client.search(index=index, body=body)
+    hits = response["hits"]["hits"]
+
+    jobs, seen = [], set()
+    for hit in hits:
+        # The same job can sit in two rollover indices if it was rewritten after a rollover
+        if hit["_id"] in seen:
+            continue
+        seen.add(hit["_id"])
+        jobs.append(hit["_source"])
+
+    result = {
+        "total": response["hits"]["total"]["value"],
+        "total_is_exact": response["hits"]["total"]["relation"] == "eq",
+        "jobs": jobs,
+        "next": encode_cursor(hits[-1]["sort"]) if len(hits) == body["size"] else None,
+        "took_ms": response["took"],
+    }
+    if "aggregations" in response:
+        result["aggregations"] = _simplify_aggs(response["aggregations"])
+    return result
@@ -2,10 +2,15 @@
 
 from flask import Flask
 from app.web.views import web
+from app.metrics import register_queue_collector
+from app.database.es_store import init_es_store_in_background
 
 def create_app():
     app = Flask(__name__)
     app.register_blueprint(web)
+    register_queue_collector()
+    # Connecting to the cluster and setting up the index can take minutes; /search answers 503 until it's done
+    init_es_store_in_background()
     return app
 
 if __name__ == "__main__":
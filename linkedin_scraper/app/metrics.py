@@ -0,0 +1,120 @@
+# app/metrics.py
+#
+# Prometheus metrics for the scraper, worker and monitor. The Flask app serves them on /metrics;
+# the worker and the monitor/scheduler run start_metrics_server(), a small HTTP exporter on a
+# side thread (WORKER_METRICS_PORT / MONITOR_METRICS_PORT). Queue depths and dedup set sizes are
+# read from Redis when /metrics is scraped (QueueCollector), so only the web app exports them.
+# Kafka produce latency is defined next to the producer in kafka_utils/producer.py.
+
+import os
+import json
+import time
+
+from prometheus_client import Counter, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+
+from app.scraper.redis_store import redis_store
+
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", 9102))
+MONITOR_METRICS_PORT = int(os.environ.get("MONITOR_METRICS_PORT", 9103))
+
+PAGE_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 60)
+PARSE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+PAGE_NAVIGATION_SECONDS = Histogram(
+    "scraper_page_navigation_seconds", "driver.get() or HTTP GET until the response is in",
+    ["page", "fetcher"], buckets=PAGE_BUCKETS)
+WAIT_FOR_ELEMENT_SECONDS = Histogram(
+    "scraper_wait_for_element_seconds", "WebDriverWait until an element shows up (timeouts included)",
+    ["element"], buckets=PAGE_BUCKETS)
+PARSE_SECONDS = Histogram(
+    "scraper_parse_seconds", "Job page HTML -> fields", ["fetcher"], buckets=PARSE_BUCKETS)
+PARSE_FAILURES = Counter(
+    "scraper_parse_failures", "Fields that could not be extracted from a job page", ["field", "fetcher"])
+JOBS = Counter(
+    "scraper_jobs", "Job pages processed, by outcome (scraped, failed, fallback)", ["component", "outcome"])
+THROTTLED = Counter(
+    "scraper_rate_limit_throttled", "Slowdown signals fed to the rate limiter", ["host", "reason"])
+MONITOR_RUN_SECONDS = Histogram(
+    "monitor_run_seconds", "One monitor run for one query", ["outcome"],
+    buckets=(5, 10, 20, 30, 60, 120, 300, 600, 1200))
+MONITOR_JOBS_QUEUED = Counter(
+    "monitor_jobs_queued", "Jobs the monitor queued for the workers", ["queue"])
+DIAGNOSTICS_RECORDS = Counter(
+    "scraper_diagnostics_records", "Missing-field log lines and failure snapshots, by outcome "
+    "(written, deduplicated, rate_limited, dropped, evicted)", ["kind", "outcome"])
+
+QUEUE_KEYS = {
+    "pending_new_jobs": ("llen", "pending_new_jobs"),
+    "pending_update_jobs": ("llen", "pending_update_jobs"),
+    "failed_jobs": ("llen", "failed_jobs"),
+    "in_flight": ("zcard", "pending_new_jobs:leases"),
+}
+
+
+class QueueCollector:
+    """
+    Reads the queue lengths, the dedup index sizes and the ES sink's lag at scrape time. The
+    dedup growth rate is taken between two consecutive scrapes of this process.
+    """
+
+    def __init__(self, store=redis_store):
+        self.store = store
+        self._last_counts = {}
+
+    def describe(self):
+        # Don't let registration trigger a collect() (and a Redis round trip)
+        return []
+
+    def collect(self):
+        depth = GaugeMetricFamily("redis_queue_depth", "Entries in each job queue", labels=["queue"])
+        size = GaugeMetricFamily("redis_dedup_set_size", "Job IDs in each dedup index", labels=["set"])
+        growth = GaugeMetricFamily("redis_dedup_set_growth_per_second",
+                                   "Change of each dedup index since the previous scrape", labels=["set"])
+        lag = GaugeMetricFamily("es_sink_consumer_lag", "Records behind the log end, per sink worker", labels=["worker"])
+        up = GaugeMetricFamily("redis_queue_collector_up", "1 if Redis could be read during this scrape")
+        try:
+            client = self.store.client
+            pipe = client.pipeline(transaction=False)
+            for command, key in QUEUE_KEYS.values():
+                getattr(pipe, command)(key)
+            pipe.hgetall("es_sink:stats")
+            results = pipe.execute()
+            for queue, value in zip(QUEUE_KEYS, results):
+                depth.add_metric([queue], value)
+            for worker_id, raw in results[-1].items():
+                lag.add_metric([worker_id], json.loads(raw).get("lag") or 0)
+
+            now = time.time()
+            for name, index in [("seen", self.store.seen_index), ("scraped", self.store.scraped_index)]:
+                count = index.count()
+                size.add_metric([name], count)
+                if name in self._last_counts:
+                    last_count, last_time = self._last_counts[name]
+                    growth.add_metric([name], (count - last_count) / max(now - last_time, 1e-3))
+                self._last_counts[name] = (count, now)
+            up.add_metric([], 1)
+        except Exception as e:
+            print(f"[Metrics] Could not read queue stats from Redis: {e}")
+            up.add_metric([], 0)
+        return [depth, size, growth, lag, up]
+
+
+_queue_collector = None
+
+
+def register_queue_collector(registry=REGISTRY):
+    global _queue_collector
+    if _queue_collector is None:
+        _queue_collector = QueueCollector()
+        registry.register(_queue_collector)
+    return _queue_collector
+
+
+def start_metrics_server(port):
+    """Serve /metrics from a daemon thread. A taken port (several processes on one host) isn't fatal."""
+    try:
+        start_http_server(port)
+        print(f"[Metrics] Exporter listening on :{port}")
+    except OSError as e:
+        print(f"[Metrics] Could not start exporter on :{port}: {e}")
@@ -3,12 +3,19 @@ import argparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 
-from app.scraper.driver import get_driver
-from app.scraper.utils import extract_job_id
+from app.scraper.driver_pool import driver_pool
+from app.scraper.utils import load_job_cards, LINKEDIN_BASE_URL
 from app.scraper.redis_store import redis_store
+from app.scraper.rate_limiter import rate_limiter
+from app.monitor.watermarks import QueryWatermark
+from app.tracing import span, init_tracing
+from app.metrics import (PAGE_NAVIGATION_SECONDS, WAIT_FOR_ELEMENT_SECONDS, MONITOR_RUN_SECONDS,
+                         MONITOR_JOBS_QUEUED, MONITOR_METRICS_PORT, start_metrics_server)
 
-SCROLL_PAUSE_TIME = 2
+# Incremental runs stop scrolling after this many already-listed jobs in a row
+STOP_AFTER_SEEN = 25
 
 DATE_FILTERS = {
     "any": "",
@@ -41,151 +48,144 @@ def parse_posted_days(posted_text):
     return 999
 
 
-def scroll_and_click_see_more(driver, n_jobs_estimate):
-    scroll_iteration = 2
-    no_button_attempts = 0
-    max_iterations = int((n_jobs_estimate + 200) / 25) + 1
-
-    while scroll_iteration <= max_iterations:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(SCROLL_PAUSE_TIME)
-
-        try:
-            see_more_button = driver.find_element(By.XPATH, "//button[@aria-label='See more jobs']")
-            if see_more_button.is_displayed():
-                driver.execute_script("arguments[0].click();", see_more_button)
-                time.sleep(3)
-                no_button_attempts = 0
-        except:
-            no_button_attempts += 1
-            time.sleep(2)
-            if no_button_attempts >= 2:
-                break
-        scroll_iteration += 1
-
-    print("[Monitor] Finished scrolling and loading all jobs.")
-
-
-def process_job_item(job_item, max_posted_days):
-    try:
-        job_div = job_item.find_element(By.CLASS_NAME, "base-card")
-        data_entity_urn = job_div.get_attribute("data-entity-urn")
-        if not data_entity_urn or "jobPosting:" not in data_entity_urn:
-            return None, "no_job_id"
-
-        job_id = data_entity_urn.split("jobPosting:")[-1].strip()
-
-        try:
-            job_url_element = job_div.find_element(By.XPATH, ".//a[contains(@href, '/jobs/view/')]")
-            job_url = job_url_element.get_attribute("href")
-        except:
-            return None, "no_url"
-
-        try:
-            posted_time_element = job_div.find_element(By.XPATH, ".//*[contains(@class, 'listdate') or contains(text(), 'ago')]")
-            posted_text = posted_time_element.text.strip()
-            posted_days = parse_posted_days(posted_text)
-        except:
-            posted_days = 999
-
-        if max_posted_days is not None and posted_days > max_posted_days:
-            return None, "too_old"
-
-        return {
-            "job_id": job_id,
-            "job_url": job_url
-        }, None
-
-    except Exception as e:
-        print(f"[Monitor] Error processing job item: {e}")
-        return None, "exception"
-
-
-def monitor_linkedin_jobs(title="Data Engineer", location="Canada", date_filter="past_week", max_posted_days=None):
+def process_job_item(card, max_posted_days):
+    """Filter one card dict from load_job_cards; pure Python, no WebDriver calls."""
+    job_id = card.get("job_id")
+    if not job_id:
+        return None, "no_job_id"
+
+    job_url = card.get("job_url")
+    if not job_url or "/jobs/view/" not in job_url:
+        return None, "no_url"
+
+    posted_text = card.get("posted_text")
+    posted_days = parse_posted_days(posted_text) if posted_text else 999
+    if max_posted_days is not None and posted_days > max_posted_days:
+        return None, "too_old"
+
+    return {
+        "job_id": job_id,
+        "job_url": job_url
+    }, None
+
+
+def monitor_linkedin_jobs(title="Data Engineer", location="Canada", date_filter="past_week", max_posted_days=None, pool=driver_pool,
+                          incremental=True, stop_after_seen=STOP_AFTER_SEEN):
+    """
+    Queue every listed job for scraping. In incremental mode (once this query has a watermark)
+    results are sorted newest first and loading stops at the first run of stop_after_seen jobs
+    an earlier run already listed, so a run costs about as much as the number of new postings.
+    Returns a summary dict (found / queued_new / queued_update / already_scraped / skipped), or
+    None if the run failed.
+    """
     if date_filter not in DATE_FILTERS:
         raise ValueError(f"Invalid date_filter '{date_filter}'. Valid options are: {list(DATE_FILTERS.keys())}")
 
-    print(f"\n[Monitor] Monitoring '{title}' jobs in '{location}' | Filter: '{date_filter}' | Max Days: {max_posted_days or 'Any'}")
-
-    driver = get_driver()
-    wait = WebDriverWait(driver, 10)
-
-    try:
-        base_url = f"https://www.linkedin.com/jobs/search?keywords={title}&location={location}"
-        date_code = DATE_FILTERS[date_filter]
-        if date_code:
-            base_url += f"&f_TPR={date_code}"
+    watermark = QueryWatermark(title, location, date_filter)
+    incremental = incremental and watermark.exists()
+    mode = f"incremental (stop after {stop_after_seen} seen)" if incremental else "full"
+    print(f"\n[Monitor] Monitoring '{title}' jobs in '{location}' | Filter: '{date_filter}' | Max Days: {max_posted_days or 'Any'} | Mode: {mode}")
 
-        driver.get(base_url)
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'results-context-header__job-count')))
-        time.sleep(2)
+    started = time.perf_counter()
+    with span("monitor.run", title=title, location=location, date_filter=date_filter, incremental=incremental) as run_span:
+        with span("driver_pool.acquire"):
+            driver = pool.acquire()
+        wait = WebDriverWait(driver, 10)
+        broken = False
+        summary = None
 
         try:
-            job_count_element = driver.find_element(By.CLASS_NAME, 'results-context-header__job-count')
-            job_count_text = job_count_element.text
-            n_jobs_estimate = int(''.join(filter(str.isdigit, job_count_text)))
-            print(f"[Monitor] Found {n_jobs_estimate} total jobs listed.")
+            base_url = f"{LINKEDIN_BASE_URL}/jobs/search?keywords={title}&location={location}"
+            date_code = DATE_FILTERS[date_filter]
+            if date_code:
+                base_url += f"&f_TPR={date_code}"
+            # Newest first, so everything after a run of already-listed jobs is old too.
+            # Full runs use it as well: that's the order the watermark is built in.
+            base_url += "&sortBy=DD"
+
+            with span("rate_limit.acquire"):
+                rate_limiter.acquire(base_url)
+            with span("driver.get"), PAGE_NAVIGATION_SECONDS.labels(page="search", fetcher="selenium").time():
+                driver.get(base_url)
+            with span("wait.job_count"), WAIT_FOR_ELEMENT_SECONDS.labels(element="job_count").time():
+                wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'results-context-header__job-count')))
+
+            try:
+                job_count_element = driver.find_element(By.CLASS_NAME, 'results-context-header__job-count')
+                job_count_text = job_count_element.text
+                n_jobs_estimate = int(''.join(filter(str.isdigit, job_count_text)))
+                print(f"[Monitor] Found {n_jobs_estimate} total jobs listed.")
+            except Exception as e:
+                print(f"[Monitor] Could not determine total job count: {e}")
+                n_jobs_estimate = 300
+
+            should_stop = watermark.stop_after_seen(stop_after_seen) if incremental else None
+            with span("load_job_cards", target=n_jobs_estimate) as load_span:
+                cards = load_job_cards(driver, target_count=n_jobs_estimate, should_stop=should_stop,
+                                       pace=lambda: rate_limiter.acquire(base_url))
+                load_span.set(cards=len(cards))
+
+            print(f"[Monitor] Found {len(cards)} jobs after scrolling.")
+
+            total_jobs = len(cards)
+            skipped = {
+                "no_job_id": 0,
+                "no_url": 0,
+                "too_old": 0
+            }
+            candidates = []
+
+            for card in cards:
+                result, skip_reason = process_job_item(card, max_posted_days)
+
+                if skip_reason:
+                    skipped[skip_reason] += 1
+                    continue
+
+                candidates.append(result)
+
+            # Dedupe and enqueue the whole page in one Redis round-trip
+            with span("redis.enqueue", candidates=len(candidates)):
+                statuses = redis_store.enqueue_job_page(candidates)
+            status_counts = {"already_scraped": 0, "queued_update": 0, "queued_new": 0}
+            for status in statuses:
+                status_counts[status] += 1
+            accepted_jobs = status_counts["queued_update"] + status_counts["queued_new"]
+            MONITOR_JOBS_QUEUED.labels(queue="pending_new_jobs").inc(status_counts["queued_new"])
+            MONITOR_JOBS_QUEUED.labels(queue="pending_update_jobs").inc(status_counts["queued_update"])
+            with span("watermark.advance"):
+                previously_listed = sum(watermark.seen([card["job_id"] for card in cards if card.get("job_id")]))
+                watermark.advance(cards, new_count=status_counts["queued_new"])
+
+            # Summary
+            print("\n[Summary] --------------------------------------------------")
+            print(f"Total Jobs Found           : {total_jobs}")
+            print(f"Listed By Earlier Runs     : {previously_listed}")
+            print(f"Jobs Accepted              : {accepted_jobs}")
+            print(f"  - New (scrape queue)     : {status_counts['queued_new']}")
+            print(f"  - Seen (update queue)    : {status_counts['queued_update']}")
+            print(f"Already Scraped            : {status_counts['already_scraped']}")
+            for k, v in skipped.items():
+                print(f"Skipped - {k.replace('_', ' ').title():<22}: {v}")
+            print("-----------------------------------------------------------\n")
+
+            summary = dict(status_counts, found=total_jobs, previously_listed=previously_listed, skipped=skipped, incremental=incremental)
+            run_span.set(found=total_jobs, queued_new=status_counts["queued_new"])
+
+        except TimeoutException:
+            print("[Monitor] Timed out waiting for the result list.")
+            rate_limiter.throttled(LINKEDIN_BASE_URL, "timeout")
+
         except Exception as e:
-            print(f"[Monitor] Could not determine total job count: {e}")
-            n_jobs_estimate = 300
+            print(f"[Monitor] Error during monitoring: {e}")
+            broken = not driver.is_healthy()
 
-        scroll_and_click_see_more(driver, n_jobs_estimate)
+        finally:
+            pool.release(driver, broken=broken)
+            MONITOR_RUN_SECONDS.labels(outcome="ok" if summary else "error").observe(time.perf_counter() - started)
+            print("[Monitor] Done scraping.")
 
-        try:
-            container = driver.find_element(By.XPATH, "//ul[contains(@class, 'jobs-search__results-list') or @role='list']")
-            job_items = container.find_elements(By.TAG_NAME, "li")
-        except Exception as e:
-            print(f"[Monitor] Failed to find job container: {e}")
-            return
-
-        print(f"[Monitor] Found {len(job_items)} jobs after scrolling.")
-
-        total_jobs = len(job_items)
-        skipped = {
-            "no_job_id": 0,
-            "no_url": 0,
-            "too_old": 0,
-            "exception": 0
-        }
-        accepted_jobs = 0
-
-        for job_item in job_items:
-            result, skip_reason = process_job_item(job_item, max_posted_days)
-
-            if skip_reason:
-                skipped[skip_reason] += 1
-                continue
-
-            job_id = result["job_id"]
-            job_url = result["job_url"]
-
-            if redis_store.is_job_id_scraped(job_id):
-                print(f"[Monitor] Already scraped {job_id}, skipping...")
-                continue
-            elif redis_store.is_job_id_seen(job_id):
-                print(f"[Monitor] Seen before but not scraped, adding to update queue: {job_id}")
-                redis_store.add_to_pending_update_jobs(job_id, job_url)
-            else:
-                print(f"[Monitor] New job detected, adding to new scrape queue: {job_id}")
-                redis_store.add_to_pending_new_jobs(job_id, job_url)
-                redis_store.add_job_id(job_id)
-
-            accepted_jobs += 1
-
-        # Summary
-        print("\n[Summary] --------------------------------------------------")
-        print(f"Total Jobs Found           : {total_jobs}")
-        print(f"Jobs Accepted              : {accepted_jobs}")
-        for k, v in skipped.items():
-            print(f"Skipped - {k.replace('_', ' ').title():<22}: {v}")
-        print("-----------------------------------------------------------\n")
-
-    except Exception as e:
-        print(f"[Monitor] Error during monitoring: {e}")
-
-    finally:
-        driver.quit()
-        print("[Monitor] Done scraping. Exiting process.")
+    return summary
 
 
 if __name__ == "__main__":
@@ -194,11 +194,22 @@ if __name__ == "__main__":
     parser.add_argument("--location", type=str, required=True)
     parser.add_argument("--max_posted_days", type=float, default=None)
     parser.add_argument("--date_filter", type=str, default="past_week")
+    parser.add_argument("--full", action="store_true", help="Load the whole result list even if this query has a watermark")
+    parser.add_argument("--stop_after_seen", type=int, default=STOP_AFTER_SEEN,
+                        help="Incremental mode: stop after this many already-listed jobs in a row")
+    parser.add_argument("--metrics_port", type=int, default=MONITOR_METRICS_PORT, help="Prometheus exporter port (0 to disable)")
     args = parser.parse_args()
 
+    init_tracing("monitor")
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
     monitor_linkedin_jobs(
         title=args.title,
         location=args.location,
         date_filter=args.date_filter,
-        max_posted_days=args.max_posted_days
+        max_posted_days=args.max_posted_days,
+        incremental=not args.full,
+        stop_after_seen=args.stop_after_seen
     )
+    driver_pool.close_all()
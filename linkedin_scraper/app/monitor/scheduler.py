@@ -0,0 +1,314 @@
+# app/monitor/scheduler.py
+#
+# Runs the monitor for a whole set of queries (app/monitor/queries.json, or MONITOR_QUERIES_FILE)
+# with at most --budget browsers busy at once. Every query gets its own polling interval from
+# its recent new-job yield: a query that keeps turning up new postings is polled every
+# MIN_INTERVAL, one that finds nothing backs off towards MAX_INTERVAL.
+#
+# State lives in Redis, so a restart picks up where it left off:
+#   scheduler:due            sorted set query_id -> next run (unix time)
+#   scheduler:query:<id>     hash: title, location, date_filter, interval, yield_per_hour,
+#                            last_run, last_new, last_found, last_duration, runs, total_new, failures
+#   scheduler:lock           owner token of the running scheduler (SET NX PX, renewed every loop)
+# Only one scheduler runs at a time; two would both pick up the same due queries, so a second one
+# (say a --once next to the monitor-scheduler service) finds the lock taken and exits.
+#
+#   python -m app.monitor.scheduler run --budget 3
+#   python -m app.monitor.scheduler run --once       # every query once, then exit
+#   python -m app.monitor.scheduler stats
+
+import os
+import json
+import time
+import uuid
+import argparse
+import socket
+import itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from app.scraper.driver_pool import DriverPool
+from app.scraper.redis_store import redis_store
+from app.monitor.monitor_jobs import monitor_linkedin_jobs, DATE_FILTERS
+from app.metrics import MONITOR_METRICS_PORT, start_metrics_server
+from app.tracing import init_tracing
+
+QUERIES_FILE = os.environ.get("MONITOR_QUERIES_FILE", os.path.join(os.path.dirname(__file__), "queries.json"))
+BROWSER_BUDGET = int(os.environ.get("MONITOR_BROWSER_BUDGET", 2))
+MIN_INTERVAL = int(os.environ.get("MONITOR_MIN_INTERVAL", 15 * 60))
+MAX_INTERVAL = int(os.environ.get("MONITOR_MAX_INTERVAL", 12 * 3600))
+FIRST_INTERVAL = 3600
+TARGET_NEW_PER_RUN = 10  # poll about as often as it takes for this many new jobs to show up
+YIELD_SMOOTHING = 0.3    # weight of the latest run in the yield average
+IDLE_SLEEP = 5
+DUE_KEY = "scheduler:due"
+QUERY_KEY_PREFIX = "scheduler:query"
+LOCK_KEY = "scheduler:lock"
+LOCK_TTL_MS = 60 * 1000  # well past IDLE_SLEEP, so only a scheduler that died lets it expire
+
+# Renew / release the lock only while this scheduler still holds it
+RENEW_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def load_queries(path=QUERIES_FILE):
+    """
+    The file holds explicit "queries" and/or a "titles" x "locations" grid; "defaults" fill in
+    date_filter and max_posted_days for both. Returns a list of query dicts, without duplicates.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = {"date_filter": "past_week", "max_posted_days": None}
+    defaults.update(config.get("defaults", {}))
+
+    queries = [dict(defaults, **query) for query in config.get("queries", [])]
+    for title, location in itertools.product(config.get("titles", []), config.get("locations", [])):
+        queries.append(dict(defaults, title=title, location=location))
+
+    unique = {}
+    for query in queries:
+        if query["date_filter"] not in DATE_FILTERS:
+            raise ValueError(f"Invalid date_filter '{query['date_filter']}' for {query['title']} / {query['location']}")
+        unique.setdefault(query_id(query), query)
+    return list(unique.values())
+
+
+def query_id(query):
+    return f"{query['title'].strip().lower()}|{query['location'].strip().lower()}|{query['date_filter']}"
+
+
+def next_interval(state, new_jobs, now):
+    """
+    Smoothed new jobs per hour -> seconds until the next run. A query with no yield doubles its
+    interval each run instead, so one quiet run doesn't park it at MAX_INTERVAL straight away.
+    """
+    last_run = float(state.get("last_run") or 0)
+    if not last_run:
+        # The first run backfills the whole list (and builds the watermark), so its count says
+        # nothing about the yield; look again soon to measure it
+        return MIN_INTERVAL, None
+
+    previous_interval = float(state.get("interval") or FIRST_INTERVAL)
+    rate = new_jobs / max((now - last_run) / 3600, 1 / 60)
+
+    if state.get("yield_per_hour") is None:
+        yield_per_hour = rate
+    else:
+        yield_per_hour = YIELD_SMOOTHING * rate + (1 - YIELD_SMOOTHING) * float(state["yield_per_hour"])
+
+    if yield_per_hour < 0.01:
+        interval = previous_interval * 2
+    else:
+        interval = TARGET_NEW_PER_RUN / yield_per_hour * 3600
+    return min(max(interval, MIN_INTERVAL), MAX_INTERVAL), yield_per_hour
+
+
+class CrawlScheduler:
+    def __init__(self, queries, budget=BROWSER_BUDGET, client=None, monitor=monitor_linkedin_jobs, pool=None):
+        self.queries = {query_id(query): query for query in queries}
+        self.budget = budget
+        self.client = client or redis_store.client
+        self.monitor = monitor
+        self.pool = pool or DriverPool(size=budget)
+        self.running = set()
+        self.lock_token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._renew_lock_script = self.client.register_script(RENEW_LOCK_LUA)
+        self._release_lock_script = self.client.register_script(RELEASE_LOCK_LUA)
+
+    def acquire_lock(self):
+        return bool(self.client.set(LOCK_KEY, self.lock_token, nx=True, px=LOCK_TTL_MS))
+
+    def renew_lock(self):
+        return bool(self._renew_lock_script(keys=[LOCK_KEY], args=[self.lock_token, LOCK_TTL_MS]))
+
+    def release_lock(self):
+        self._release_lock_script(keys=[LOCK_KEY], args=[self.lock_token])
+
+    def state_key(self, qid):
+        return f"{QUERY_KEY_PREFIX}:{qid}"
+
+    def sync(self):
+        """Schedule new queries right away and drop the ones no longer in the query set."""
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        for qid, query in self.queries.items():
+            pipe.zadd(DUE_KEY, {qid: now}, nx=True)
+            pipe.hset(self.state_key(qid), mapping={"title": query["title"], "location": query["location"],
+                                                    "date_filter": query["date_filter"]})
+        pipe.execute()
+        stale = [qid for qid in self.client.zrange(DUE_KEY, 0, -1) if qid not in self.queries]
+        if stale:
+            self.client.zrem(DUE_KEY, *stale)
+            print(f"[Scheduler] Unscheduled {len(stale)} queries that left the query set.")
+
+    def due_queries(self, now=None):
+        """Due query IDs, highest yield first (then most overdue), skipping the ones already running."""
+        now = now or time.time()
+        due = [(qid, score) for qid, score in self.client.zrangebyscore(DUE_KEY, "-inf", now, withscores=True)
+               if qid in self.queries and qid not in self.running]
+        if not due:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for qid, _ in due:
+            pipe.hget(self.state_key(qid), "yield_per_hour")
+        yields = [float(value or 0) for value in pipe.execute()]
+        ranked = sorted(zip(due, yields), key=lambda item: (-item[1], item[0][1]))
+        return [qid for (qid, _), _ in ranked]
+
+    def run_query(self, qid):
+        query = self.queries[qid]
+        started = time.time()
+        try:
+            summary = self.monitor(title=query["title"], location=query["location"], date_filter=query["date_filter"],
+                                   max_posted_days=query.get("max_posted_days"), pool=self.pool)
+        except Exception as e:
+            print(f"[Scheduler] {qid} raised: {e}")
+            summary = None
+        finished = time.time()
+        self.record_run(qid, summary, started, finished)
+        return summary
+
+    def record_run(self, qid, summary, started, finished):
+        key = self.state_key(qid)
+        state = self.client.hgetall(key)
+        pipe = self.client.pipeline(transaction=False)
+        if summary is None:
+            # Failed run: keep the yield estimate, retry after the shortest interval
+            pipe.hincrby(key, "failures", 1)
+            pipe.hset(key, mapping={"last_error_at": finished})
+            pipe.zadd(DUE_KEY, {qid: finished + MIN_INTERVAL})
+            pipe.execute()
+            return
+
+        new_jobs = summary.get("queued_new", 0)
+        interval, yield_per_hour = next_interval(state, new_jobs, started)
+        fields = {
+            "interval": round(interval),
+            "last_run": started,
+            "last_new": new_jobs,
+            "last_found": summary.get("found", 0),
+            "last_duration": round(finished - started, 1),
+        }
+        if yield_per_hour is not None:
+            fields["yield_per_hour"] = round(yield_per_hour, 3)
+        pipe.hset(key, mapping=fields)
+        pipe.hincrby(key, "runs", 1)
+        pipe.hincrby(key, "total_new", new_jobs)
+        pipe.zadd(DUE_KEY, {qid: finished + interval})
+        pipe.execute()
+        yield_text = f"{yield_per_hour:.2f}/h" if yield_per_hour is not None else "n/a (first run)"
+        print(f"[Scheduler] {qid}: {new_jobs} new in {finished - started:.0f}s, yield {yield_text}, next run in {interval / 60:.0f} min")
+
+    def run(self, once=False):
+        """Returns False without doing anything if another scheduler holds the lock."""
+        if not self.acquire_lock():
+            print(f"[Scheduler] Another scheduler is running ({self.client.get(LOCK_KEY)}); exiting.")
+            return False
+        try:
+            self._run(once)
+        finally:
+            self.release_lock()
+        return True
+
+    def _run(self, once):
+        self.sync()
+        pending = set(self.queries) if once else None
+        futures = {}
+        # The pool closes only once the executor has waited out the runs still in flight
+        try:
+            with ThreadPoolExecutor(max_workers=self.budget, thread_name_prefix="monitor") as executor:
+                while True:
+                    if not self.renew_lock():
+                        # Expired (Redis unreachable for a while?) and maybe taken over; let the runs
+                        # in flight finish but start nothing new
+                        print("[Scheduler] Lost the scheduler lock; stopping.")
+                        return
+                    for qid in self.due_queries():
+                        if len(futures) >= self.budget:
+                            break
+                        if pending is not None and qid not in pending:
+                            continue
+                        self.running.add(qid)
+                        futures[executor.submit(self.run_query, qid)] = qid
+
+                    if once and not futures and not pending:
+                        return
+                    if futures:
+                        done, _ = wait(futures, timeout=IDLE_SLEEP, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            qid = futures.pop(future)
+                            self.running.discard(qid)
+                            if pending is not None:
+                                pending.discard(qid)
+                    elif once:
+                        # --once runs everything now, whatever its schedule says
+                        self.client.zadd(DUE_KEY, {qid: 0 for qid in pending})
+                    else:
+                        time.sleep(self.sleep_time())
+        finally:
+            self.pool.close_all()
+
+    def sleep_time(self):
+        """Until the next query is due, capped at IDLE_SLEEP so edits to the schedule are picked up."""
+        upcoming = self.client.zrange(DUE_KEY, 0, 0, withscores=True)
+        if not upcoming:
+            return IDLE_SLEEP
+        return min(max(upcoming[0][1] - time.time(), 0.5), IDLE_SLEEP)
+
+    def stats(self):
+        pipe = self.client.pipeline(transaction=False)
+        for qid in self.queries:
+            pipe.hgetall(self.state_key(qid))
+            pipe.zscore(DUE_KEY, qid)
+        results = pipe.execute()
+        return [dict(state, query_id=qid, next_run=next_run)
+                for qid, state, next_run in zip(self.queries, results[0::2], results[1::2])]
+
+
+def print_stats(rows):
+    now = time.time()
+
+    def ago(value):
+        return f"{(now - float(value)) / 60:.0f}m ago" if value else "never"
+
+    print(f"{'query':<45} {'last run':>10} {'new':>5} {'found':>6} {'took':>7} {'yield/h':>8} {'every':>7} {'next':>8} {'runs':>5} {'total':>6}")
+    for row in sorted(rows, key=lambda r: -float(r.get("yield_per_hour") or 0)):
+        next_in = f"{(float(row['next_run']) - now) / 60:.0f}m" if row.get("next_run") else "-"
+        print(f"{row['query_id'][:45]:<45} {ago(row.get('last_run')):>10} {row.get('last_new', '-'):>5} "
+              f"{row.get('last_found', '-'):>6} {row.get('last_duration', '-'):>6}s {row.get('yield_per_hour', '-'):>8} "
+              f"{int(row.get('interval') or FIRST_INTERVAL) // 60:>6}m {next_in:>8} {row.get('runs', 0):>5} {row.get('total_new', 0):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the monitor for a set of queries under one browser budget")
+    parser.add_argument("command", choices=["run", "stats"])
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--budget", type=int, default=BROWSER_BUDGET, help="Browsers (and concurrent monitor runs) at most")
+    parser.add_argument("--once", action="store_true", help="Run every query once, then exit")
+    parser.add_argument("--metrics_port", type=int, default=MONITOR_METRICS_PORT, help="Prometheus exporter port (0 to disable)")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    scheduler = CrawlScheduler(queries, budget=args.budget)
+    if args.command == "stats":
+        print_stats(scheduler.stats())
+        return
+    init_tracing("monitor-scheduler")
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    print(f"[Scheduler] {len(queries)} queries, budget {args.budget} browsers")
+    if not scheduler.run(once=args.once):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# app/monitor/watermarks.py
+#
+# Per-query crawl watermarks for the monitor. For every (title, location, date filter) we keep
+#   monitor:watermark:<query>:ids   sorted set job_id -> first time this query listed it
+#                                   (trimmed to the newest WATERMARK_MAX_IDS)
+#   monitor:watermark:<query>       hash: newest_job_id, newest_posted_text, last_run, runs, last_new
+# With results sorted newest-first, a run of listings that are all in :ids means everything
+# below has been seen before, so the monitor can stop scrolling there.
+
+import time
+
+from app.scraper.redis_store import redis_store
+
+WATERMARK_KEY_PREFIX = "monitor:watermark"
+WATERMARK_MAX_IDS = 2000
+
+
+def query_key(title, location, date_filter):
+    return f"{WATERMARK_KEY_PREFIX}:{title.strip().lower()}|{location.strip().lower()}|{date_filter}"
+
+
+class QueryWatermark:
+    def __init__(self, title, location, date_filter, client=None, max_ids=WATERMARK_MAX_IDS):
+        self.client = client or redis_store.client
+        self.key = query_key(title, location, date_filter)
+        self.ids_key = f"{self.key}:ids"
+        self.max_ids = max_ids
+        self._seen = {}  # job_id -> bool, so each card is looked up once per run
+
+    def exists(self):
+        return bool(self.client.exists(self.ids_key))
+
+    def info(self):
+        return self.client.hgetall(self.key)
+
+    def seen(self, job_ids):
+        """Whether each job ID was listed for this query by an earlier run (one ZMSCORE for the lookups not cached yet)."""
+        missing = [job_id for job_id in dict.fromkeys(job_ids) if job_id not in self._seen]
+        if missing:
+            for job_id, score in zip(missing, self.client.zmscore(self.ids_key, missing)):
+                self._seen[job_id] = score is not None
+        return [self._seen[job_id] for job_id in job_ids]
+
+    def stop_after_seen(self, run_length):
+        """
+        should_stop callback for load_job_cards: True once the list holds run_length consecutive
+        cards this query has already listed. Cards without an ID (ads, broken markup) don't
+        break a run.
+        """
+        def should_stop(cards):
+            job_ids = [card["job_id"] for card in cards if card.get("job_id")]
+            run = 0
+            for is_seen in self.seen(job_ids):
+                run = run + 1 if is_seen else 0
+                if run >= run_length:
+                    return True
+            return False
+        return should_stop
+
+    def advance(self, cards, new_count=0):
+        """Record this run's listings. Existing IDs keep their first-seen time (ZADD NX)."""
+        now = time.time()
+        job_ids = [card["job_id"] for card in cards if card.get("job_id")]
+        pipe = self.client.pipeline(transaction=False)
+        if job_ids:
+            # Page order is newest first; nudge scores so the top of the page ranks highest
+            pipe.zadd(self.ids_key, {job_id: now - i / 1000 for i, job_id in enumerate(job_ids)}, nx=True)
+            pipe.zremrangebyrank(self.ids_key, 0, -self.max_ids - 1)
+        newest = next((card for card in cards if card.get("job_id")), None)
+        fields = {"last_run": now, "last_new": new_count}
+        if newest:
+            fields.update(newest_job_id=newest["job_id"], newest_posted_text=newest.get("posted_text") or "")
+        pipe.hset(self.key, mapping=fields)
+        pipe.hincrby(self.key, "runs", 1)
+        pipe.execute()
@@ -0,0 +1,220 @@
+# app/scraper/dedup.py
+
+import os
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEDUP_BACKEND = os.environ.get("DEDUP_BACKEND", "set")
+# A Bloom false positive on the scraped index would silently skip a job, so it can be set separately
+DEDUP_SCRAPED_BACKEND = os.environ.get("DEDUP_SCRAPED_BACKEND", DEDUP_BACKEND)
+DEDUP_CACHE_SIZE = int(os.environ.get("DEDUP_CACHE_SIZE", 200000))
+BLOOM_CAPACITY = int(os.environ.get("DEDUP_BLOOM_CAPACITY", 20000000))
+BLOOM_ERROR_RATE = float(os.environ.get("DEDUP_BLOOM_ERROR_RATE", 0.001))
+BITMAP_CHUNK_BITS = 2 ** 23  # 1MB per chunk key
+
+
+class SetDedupIndex:
+    """The original layout: a plain Redis set of job ID strings (~60-80 bytes per member)."""
+
+    supports_lua = True
+
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+
+    def add(self, job_ids, pipe=None):
+        if not job_ids:
+            return
+        target = pipe if pipe is not None else self.client
+        target.sadd(self.key, *job_ids)
+
+    def contains(self, job_ids):
+        if not job_ids:
+            return []
+        return [bool(x) for x in self.client.smismember(self.key, list(job_ids))]
+
+    def count(self):
+        return self.client.scard(self.key)
+
+
+class BitmapDedupIndex:
+    """
+    Job IDs are integers, so store one bit per ID. The ID space is split into fixed 1MB chunks
+    (key:bm:<chunk>) and only chunks that contain at least one ID are allocated, the same idea
+    as a roaring bitmap. IDs cluster in a narrow recent range, so 10M IDs touch a few dozen chunks.
+    Exact, no false positives.
+    """
+
+    supports_lua = False
+
+    def __init__(self, client, key, chunk_bits=BITMAP_CHUNK_BITS):
+        self.client = client
+        self.key = key
+        self.chunk_bits = chunk_bits
+
+    def _location(self, job_id):
+        value = int(job_id)
+        return f"{self.key}:bm:{value // self.chunk_bits}", value % self.chunk_bits
+
+    def add(self, job_ids, pipe=None):
+        if not job_ids:
+            return
+        target = pipe if pipe is not None else self.client.pipeline(transaction=False)
+        for job_id in job_ids:
+            chunk_key, offset = self._location(job_id)
+            target.setbit(chunk_key, offset, 1)
+        if pipe is None:
+            target.execute()
+
+    def contains(self, job_ids):
+        if not job_ids:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for job_id in job_ids:
+            chunk_key, offset = self._location(job_id)
+            pipe.getbit(chunk_key, offset)
+        return [bool(x) for x in pipe.execute()]
+
+    def chunk_keys(self):
+        return list(self.client.scan_iter(match=f"{self.key}:bm:*", count=1000))
+
+    def count(self):
+        pipe = self.client.pipeline(transaction=False)
+        for chunk_key in self.chunk_keys():
+            pipe.bitcount(chunk_key)
+        return sum(pipe.execute())
+
+
+class BloomDedupIndex:
+    """
+    A Bloom filter in one Redis bitmap, sized for `capacity` IDs at `error_rate` false positives
+    (~14.4 bits per ID at 0.1%). No false negatives, but a false positive means an unseen ID is
+    reported as seen, so only use it where an occasional skip is acceptable.
+    """
+
+    supports_lua = False
+
+    def __init__(self, client, key, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.client = client
+        self.key = f"{key}:bloom"
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        # A Redis string tops out at 512MB = 2^32 bits
+        self.n_bits = min(self.n_bits, 2 ** 32)
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+
+    def _offsets(self, job_id):
+        # Kirsch-Mitzenmacher double hashing: k positions from two 64-bit hashes
+        digest = hashlib.blake2b(str(job_id).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+
+    def add(self, job_ids, pipe=None):
+        if not job_ids:
+            return
+        target = pipe if pipe is not None else self.client.pipeline(transaction=False)
+        for job_id in job_ids:
+            for offset in self._offsets(job_id):
+                target.setbit(self.key, offset, 1)
+        if pipe is None:
+            target.execute()
+
+    def contains(self, job_ids):
+        if not job_ids:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for job_id in job_ids:
+            for offset in self._offsets(job_id):
+                pipe.getbit(self.key, offset)
+        bits = pipe.execute()
+        k = self.n_hashes
+        return [all(bits[i * k:(i + 1) * k]) for i in range(len(job_ids))]
+
+    def count(self):
+        # Standard cardinality estimate from the fraction of set bits
+        set_bits = self.client.bitcount(self.key)
+        if set_bits >= self.n_bits:
+            return self.capacity
+        return int(-self.n_bits / self.n_hashes * math.log(1 - set_bits / self.n_bits))
+
+
+class CachedDedupIndex:
+    """
+    Process-local LRU of IDs known to be present. Dedup sets only ever grow, so a positive answer
+    can't go stale; negatives always go to Redis.
+    """
+
+    def __init__(self, index, max_size=DEDUP_CACHE_SIZE):
+        self.index = index
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def supports_lua(self):
+        return self.index.supports_lua
+
+    @property
+    def key(self):
+        return self.index.key
+
+    def _remember(self, job_ids):
+        with self._lock:
+            for job_id in job_ids:
+                self._cache[job_id] = True
+                self._cache.move_to_end(job_id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def add(self, job_ids, pipe=None):
+        self.index.add(job_ids, pipe=pipe)
+        self._remember(job_ids)
+
+    def contains(self, job_ids):
+        job_ids = list(job_ids)
+        result = [False] * len(job_ids)
+        to_check = []
+        with self._lock:
+            for i, job_id in enumerate(job_ids):
+                if job_id in self._cache:
+                    self._cache.move_to_end(job_id)
+                    result[i] = True
+                else:
+                    to_check.append(i)
+            self.hits += len(job_ids) - len(to_check)
+            self.misses += len(to_check)
+
+        if to_check:
+            answers = self.index.contains([job_ids[i] for i in to_check])
+            found = []
+            for i, present in zip(to_check, answers):
+                result[i] = present
+                if present:
+                    found.append(job_ids[i])
+            self._remember(found)
+        return result
+
+    def count(self):
+        return self.index.count()
+
+
+def make_dedup_index(client, key, backend=DEDUP_BACKEND, cache_size=DEDUP_CACHE_SIZE):
+    """Build the dedup index configured by DEDUP_BACKEND (set, bitmap or bloom), wrapped in a read cache."""
+    if backend == "set":
+        index = SetDedupIndex(client, key)
+    elif backend == "bitmap":
+        index = BitmapDedupIndex(client, key)
+    elif backend == "bloom":
+        index = BloomDedupIndex(client, key)
+    else:
+        raise ValueError(f"Invalid dedup backend '{backend}'. Valid options: ['set', 'bitmap', 'bloom']")
+
+    if cache_size:
+        return CachedDedupIndex(index, max_size=cache_size)
+    return index
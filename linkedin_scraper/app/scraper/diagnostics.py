@@ -0,0 +1,186 @@
+# app/scraper/diagnostics.py
+#
+# Missing-field log lines and failure snapshots, written off the scraping path. Callers only put a
+# record on a queue; a daemon thread appends the log lines in batches and writes snapshots as
+# logs/failures/job_<id>.html.gz. When LinkedIn changes its layout every job fails the same way,
+# so snapshots are kept small:
+#   - at most SNAPSHOTS_PER_SIGNATURE per SNAPSHOT_WINDOW for one signature (fetcher + missing
+#     fields); the rest are dropped before the page is even queued
+#   - a page whose layout (tags and classes, not text) was already saved is only noted in
+#     logs/failures/index.jsonl, pointing at the saved one
+#   - the oldest snapshots are deleted once logs/failures passes MAX_SNAPSHOT_MB
+# The queue is bounded too; a record that doesn't fit is dropped and counted, never waited for.
+
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import hashlib
+import threading
+
+import lxml.html
+from lxml import etree
+
+from app.metrics import DIAGNOSTICS_RECORDS
+
+LOG_PATH = os.path.join("logs", "missing_fields.log")
+SNAPSHOT_DIR = os.path.join("logs", "failures")
+SNAPSHOTS_PER_SIGNATURE = int(os.environ.get("DIAG_SNAPSHOTS_PER_SIGNATURE", 3))
+SNAPSHOT_WINDOW = int(os.environ.get("DIAG_SNAPSHOT_WINDOW", 600))
+MAX_SNAPSHOT_BYTES = int(os.environ.get("DIAG_MAX_SNAPSHOT_MB", 200)) * 1024 * 1024
+QUEUE_MAX = int(os.environ.get("DIAG_QUEUE_MAX", 10000))
+FLUSH_INTERVAL = 1.0
+
+
+def layout_hash(html):
+    """Hash of the page's element structure (tag + class per element), so the same layout filled with different jobs matches."""
+    try:
+        tree = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return hashlib.sha1(html.encode("utf-8", "replace")).hexdigest()
+    digest = hashlib.sha1()
+    for element in tree.iter():
+        if isinstance(element.tag, str):
+            digest.update(f"{element.tag}.{element.get('class', '')};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DiagnosticsWriter:
+    def __init__(self, log_path=LOG_PATH, snapshot_dir=SNAPSHOT_DIR, per_signature=SNAPSHOTS_PER_SIGNATURE,
+                 window=SNAPSHOT_WINDOW, max_bytes=MAX_SNAPSHOT_BYTES, queue_max=QUEUE_MAX, interval=FLUSH_INTERVAL):
+        self.log_path = log_path
+        self.snapshot_dir = snapshot_dir
+        self.index_path = os.path.join(snapshot_dir, "index.jsonl")
+        self.per_signature = per_signature
+        self.window = window
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._recent = {}  # signature -> timestamps of snapshots taken in the current window
+        self._layouts = None  # layout hash -> snapshot file name, loaded by the writer thread
+        self._files = None  # snapshot file name -> size, oldest first
+        self._thread = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def missing_field(self, job_url, field_name):
+        self._put("log", f"[MISSING] {field_name} not found at {job_url}\n")
+
+    def failure_snapshot(self, job_id, job_url, page_source, missing, fetcher="selenium"):
+        """Queue a snapshot of a page that failed to parse, unless this failure signature was saved recently."""
+        signature = f"{fetcher}:{','.join(sorted(missing))}"
+        now = time.time()
+        with self._lock:
+            recent = [t for t in self._recent.get(signature, []) if t > now - self.window]
+            if len(recent) >= self.per_signature:
+                self._recent[signature] = recent
+                DIAGNOSTICS_RECORDS.labels(kind="snapshot", outcome="rate_limited").inc()
+                return False
+            recent.append(now)
+            self._recent[signature] = recent
+        return self._put("snapshot", {"job_id": job_id, "job_url": job_url, "signature": signature,
+                                      "time": now, "html": page_source})
+
+    def _put(self, kind, item):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((kind, item))
+            return True
+        except queue.Full:
+            DIAGNOSTICS_RECORDS.labels(kind=kind, outcome="dropped").inc()
+            return False
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="diagnostics-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far."""
+        with self._write_lock:
+            lines, snapshots = [], []
+            while True:
+                try:
+                    kind, item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                (lines if kind == "log" else snapshots).append(item)
+            if lines:
+                try:
+                    os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                    with open(self.log_path, "a", encoding="utf-8") as log_file:
+                        log_file.write("".join(lines))
+                    DIAGNOSTICS_RECORDS.labels(kind="log", outcome="written").inc(len(lines))
+                except OSError as e:
+                    print(f"[Diagnostics] Dropped {len(lines)} log lines: {e}")
+            if snapshots:
+                try:
+                    self._write_snapshots(snapshots)
+                except OSError as e:
+                    print(f"[Diagnostics] Dropped {len(snapshots)} snapshots: {e}")
+
+    def _load_existing(self):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        paths = [os.path.join(self.snapshot_dir, name) for name in os.listdir(self.snapshot_dir) if name.endswith(".html.gz")]
+        self._files = {os.path.basename(path): os.path.getsize(path) for path in sorted(paths, key=os.path.getmtime)}
+        self._layouts = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("file") in self._files:
+                        self._layouts[entry["layout"]] = entry["file"]
+
+    def _write_snapshots(self, snapshots):
+        if self._files is None:
+            self._load_existing()
+        index_lines = []
+        for snapshot in snapshots:
+            html = snapshot.pop("html")
+            layout = layout_hash(html)
+            file_name = self._layouts.get(layout)
+            if file_name in self._files:
+                snapshot["duplicate"] = True
+                DIAGNOSTICS_RECORDS.labels(kind="snapshot", outcome="deduplicated").inc()
+            else:
+                file_name = f"job_{snapshot['job_id']}.html.gz"
+                data = gzip.compress(html.encode("utf-8"), compresslevel=6)
+                self._make_room(len(data))
+                with open(os.path.join(self.snapshot_dir, file_name), "wb") as f:
+                    f.write(data)
+                self._files.pop(file_name, None)
+                self._files[file_name] = len(data)
+                self._layouts[layout] = file_name
+                DIAGNOSTICS_RECORDS.labels(kind="snapshot", outcome="written").inc()
+                print(f"[Diagnostics] Saved page snapshot: {os.path.join(self.snapshot_dir, file_name)}")
+            snapshot.update(layout=layout, file=file_name)
+            index_lines.append(json.dumps(snapshot) + "\n")
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(index_lines))
+
+    def _make_room(self, size):
+        total = sum(self._files.values())
+        while self._files and total + size > self.max_bytes:
+            oldest = next(iter(self._files))
+            total -= self._files.pop(oldest)
+            try:
+                os.remove(os.path.join(self.snapshot_dir, oldest))
+            except OSError:
+                pass
+            DIAGNOSTICS_RECORDS.labels(kind="snapshot", outcome="evicted").inc()
+
+
+diagnostics = DiagnosticsWriter()
@@ -1,8 +1,25 @@
+import socket
+import tempfile
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 
-def get_driver():
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_driver(debug_port=None, profile_dir=None):
+    """
+    Launch a headless Chrome. Each instance gets its own debugging port and profile dir
+    (a fresh temp dir unless one is passed in) so several browsers can share a container.
+    """
+    owns_profile = profile_dir is None
+    if owns_profile:
+        profile_dir = tempfile.mkdtemp(prefix="chrome-profile-")
+
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
@@ -10,10 +27,13 @@ def get_driver():
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--remote-debugging-port=9222")
+    chrome_options.add_argument(f"--remote-debugging-port={debug_port or find_free_port()}")
+    chrome_options.add_argument(f"--user-data-dir={profile_dir}")
     chrome_options.add_argument("--window-size=1920,1080")
 
     chrome_options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
 
     driver = webdriver.Chrome(service=Service("/usr/bin/chromedriver"), options=chrome_options)
+    # Remembered so the pool can clean up the profile when the session is retired
+    driver.owned_profile_dir = profile_dir if owns_profile else None
     return driver
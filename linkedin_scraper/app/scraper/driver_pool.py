@@ -0,0 +1,203 @@
+# app/scraper/driver_pool.py
+
+import os
+import time
+import queue
+import shutil
+import atexit
+import threading
+from contextlib import contextmanager
+
+from .driver import get_driver
+
+POOL_SIZE = int(os.environ.get("DRIVER_POOL_SIZE", 1))
+MAX_PAGES_PER_DRIVER = int(os.environ.get("DRIVER_MAX_PAGES", 200))
+MAX_RSS_GROWTH_MB = int(os.environ.get("DRIVER_MAX_RSS_GROWTH_MB", 400))
+ACQUIRE_TIMEOUT = 300
+
+
+def _process_tree_rss_mb(root_pid):
+    """
+    Sum the resident memory of a process and all its descendants (chromedriver -> chrome -> renderers).
+    Reads /proc directly, so it only works on Linux; returns None elsewhere.
+    """
+    if not root_pid or not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    rss_pages = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+            # The command name can contain spaces, so split after the closing paren
+            fields = stat[stat.rfind(")") + 2:].split()
+            pid, ppid = int(entry), int(fields[1])
+            children.setdefault(ppid, []).append(pid)
+            rss_pages[pid] = int(fields[21])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    if root_pid not in rss_pages:
+        return None
+
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class PooledDriver:
+    """
+    A long-lived WebDriver session with the bookkeeping needed to decide when to recycle it.
+    Attribute access falls through to the wrapped driver, so it can be passed anywhere a driver is expected.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+        self.baseline_rss_mb = self.rss_mb()
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def get(self, url):
+        self.pages += 1
+        return self.driver.get(url)
+
+    def rss_mb(self):
+        service = getattr(self.driver, "service", None)
+        process = getattr(service, "process", None)
+        return _process_tree_rss_mb(getattr(process, "pid", None))
+
+    def is_healthy(self):
+        try:
+            return self.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"[DriverPool] Error quitting driver: {e}")
+        profile_dir = getattr(self.driver, "owned_profile_dir", None)
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+class DriverPool:
+    """
+    Keeps up to `size` Chrome sessions alive between batches instead of paying a cold start each time.
+
+    Sessions are health-checked when handed out and recycled after `max_pages` navigations
+    or once the browser's memory has grown by more than `max_rss_growth_mb` since launch.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER,
+                 max_rss_growth_mb=MAX_RSS_GROWTH_MB, driver_factory=get_driver):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.driver_factory = driver_factory
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._live = set()
+        self.stats = {"created": 0, "reused": 0, "recycled": 0, "unhealthy": 0}
+
+    def _create(self):
+        pooled = PooledDriver(self.driver_factory())
+        with self._lock:
+            self._live.add(pooled)
+            self.stats["created"] += 1
+        print(f"[DriverPool] Launched new driver ({len(self._live)}/{self.size} live).")
+        return pooled
+
+    def _discard(self, pooled, reason):
+        with self._lock:
+            self._live.discard(pooled)
+            self.stats[reason] += 1
+        pooled.quit()
+
+    def _needs_recycle(self, pooled):
+        if self.max_pages and pooled.pages >= self.max_pages:
+            print(f"[DriverPool] Recycling driver after {pooled.pages} pages.")
+            return True
+        if self.max_rss_growth_mb and pooled.baseline_rss_mb is not None:
+            current = pooled.rss_mb()
+            if current is not None and current - pooled.baseline_rss_mb > self.max_rss_growth_mb:
+                print(f"[DriverPool] Recycling driver: memory grew {pooled.baseline_rss_mb:.0f}MB -> {current:.0f}MB.")
+                return True
+        return False
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No driver available after {timeout}s")
+        try:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create()
+                if pooled.is_healthy():
+                    with self._lock:
+                        self.stats["reused"] += 1
+                    return pooled
+                print("[DriverPool] Idle driver failed health check, replacing it.")
+                self._discard(pooled, "unhealthy")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, pooled, broken=False):
+        try:
+            if broken or not pooled.is_healthy():
+                self._discard(pooled, "unhealthy")
+            elif self._needs_recycle(pooled):
+                self._discard(pooled, "recycled")
+            else:
+                try:
+                    # Drop the previous page so idle sessions don't hold on to its DOM and timers
+                    pooled.driver.get("about:blank")
+                except Exception:
+                    self._discard(pooled, "unhealthy")
+                    return
+                self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self, timeout=ACQUIRE_TIMEOUT):
+        pooled = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield pooled
+        except Exception:
+            broken = not pooled.is_healthy()
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            remaining = list(self._live)
+            self._live.clear()
+        for pooled in remaining:
+            pooled.quit()
+
+
+# Singleton instance, drivers are only launched on first acquire
+driver_pool = DriverPool()
+atexit.register(driver_pool.close_all)
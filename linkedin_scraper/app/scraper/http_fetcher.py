@@ -0,0 +1,164 @@
+# app/scraper/http_fetcher.py
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .job_parser import parse_job_html, missing_required_fields, build_job_data
+from .rate_limiter import rate_limiter, looks_like_challenge
+from .utils import LINKEDIN_BASE_URL
+from .diagnostics import diagnostics
+from app.tracing import span
+from app.metrics import PAGE_NAVIGATION_SECONDS, PARSE_SECONDS, PARSE_FAILURES
+
+JOB_POSTING_PATH = "/jobs-guest/jobs/api/jobPosting/{}"
+MAX_IN_FLIGHT = int(os.environ.get("HTTP_FETCH_MAX_IN_FLIGHT", 8))
+REQUEST_TIMEOUT = 10
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+
+
+class LatencyStats:
+    """Collects fetch/parse timings per scraping path ("http", "selenium") so they can be compared."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, path, stage, seconds):
+        with self._lock:
+            self.samples.setdefault((path, stage), []).append(seconds)
+
+    def summary(self):
+        with self._lock:
+            items = {key: sorted(values) for key, values in self.samples.items()}
+        result = {}
+        for (path, stage), values in items.items():
+            result.setdefault(path, {})[stage] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(values[len(values) // 2] * 1000, 2),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+            }
+        return result
+
+    def report(self):
+        for path, stages in self.summary().items():
+            for stage, s in stages.items():
+                print(f"[Latency] {path:<8} {stage:<5} n={s['count']:<5} mean={s['mean_ms']:>9.2f}ms p50={s['p50_ms']:>9.2f}ms p95={s['p95_ms']:>9.2f}ms")
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+
+
+latency_stats = LatencyStats()
+
+
+class HttpJobFetcher:
+    """
+    Fetches job postings from the server-rendered guest endpoint over a pooled keep-alive session
+    instead of driving a browser. Callers fall back to Selenium when required fields are missing.
+    """
+
+    def __init__(self, base_url=LINKEDIN_BASE_URL, max_in_flight=MAX_IN_FLIGHT, timeout=REQUEST_TIMEOUT, stats=latency_stats,
+                 limiter=rate_limiter):
+        self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.stats = stats
+        self.limiter = limiter
+
+        # 429s aren't retried here: they slow the shared rate limiter down instead
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_in_flight, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def job_posting_url(self, job_id):
+        return self.base_url + JOB_POSTING_PATH.format(job_id)
+
+    def fetch_html(self, job_id):
+        url = self.job_posting_url(job_id)
+        self.limiter.acquire(url)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.Timeout as e:
+            print(f"[HTTP] Timed out fetching {job_id}: {e}")
+            self.limiter.throttled(url, "timeout")
+            return None
+        except requests.RequestException as e:
+            print(f"[HTTP] Request failed for {job_id}: {e}")
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.record("http", "fetch", elapsed)
+            PAGE_NAVIGATION_SECONDS.labels(page="job", fetcher="http").observe(elapsed)
+
+        if response.status_code != 200:
+            print(f"[HTTP] Got status {response.status_code} for {job_id}")
+            if response.status_code in (429, 999) or response.status_code >= 500:
+                self.limiter.throttled(url, f"status_{response.status_code}")
+            return None
+        if looks_like_challenge(response.url, response.text):
+            print(f"[HTTP] Challenge page for {job_id}")
+            self.limiter.throttled(url, "challenge")
+            return None
+        return response.text
+
+    def scrape_job(self, job_id, job_url):
+        """Return the parsed job record, or None if the caller should retry it with Selenium."""
+        with span("http.job", job_id=job_id) as job_span:
+            job_data = self._scrape_job(job_id, job_url)
+            job_span.set(success=job_data is not None)
+        return job_data
+
+    def _scrape_job(self, job_id, job_url):
+        html = self.fetch_html(job_id)
+        if html is None:
+            return None
+
+        started = time.perf_counter()
+        fields = parse_job_html(html)
+        elapsed = time.perf_counter() - started
+        self.stats.record("http", "parse", elapsed)
+        PARSE_SECONDS.labels(fetcher="http").observe(elapsed)
+        for field_name, value in fields.items():
+            if value is None:
+                PARSE_FAILURES.labels(field=field_name, fetcher="http").inc()
+
+        missing = missing_required_fields(fields)
+        if missing:
+            print(f"[HTTP] Missing {missing} for {job_id}, needs Selenium fallback.")
+            diagnostics.failure_snapshot(job_id, job_url, html, missing, fetcher="http")
+            self.limiter.throttled(self.base_url, "missing_fields")
+            return None
+        self.limiter.success(self.base_url)
+        return build_job_data(fields, job_id, job_url)
+
+    def scrape_jobs(self, jobs):
+        """
+        Scrape many {job_id, job_url} entries with up to max_in_flight requests at once.
+        Returns (scraped, needs_fallback) where scraped is a list of job records.
+        """
+        def scrape(job_info):
+            return job_info, self.scrape_job(job_info["job_id"], job_info["job_url"])
+
+        scraped, needs_fallback = [], []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="http-fetch") as executor:
+            for job_info, job_data in executor.map(scrape, jobs):
+                if job_data:
+                    scraped.append(job_data)
+                else:
+                    needs_fallback.append(job_info)
+        return scraped, needs_fallback
+
+
+http_fetcher = HttpJobFetcher()
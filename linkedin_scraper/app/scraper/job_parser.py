@@ -1,13 +1,113 @@
 # app/scraper/job_parser.py
 
-import os
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from .utils import get_text_by_xpath, log_missing_field, extract_job_id, posted_text_to_datetime
+from .utils import log_missing_field, extract_job_id, posted_text_to_datetime
+from .diagnostics import diagnostics
+from app.metrics import WAIT_FOR_ELEMENT_SECONDS, PARSE_SECONDS
+
+REQUIRED_FIELDS = ["job_title", "company_name", "description"]
+CRITERIA_LABELS = ["Seniority level", "Employment type", "Job function", "Industries"]
+
+# Compiled once at import; each field is one lookup on a single parsed tree.
+TITLE_XPATH = etree.XPath("//h2[contains(@class,'top-card-layout__title') or contains(@class,'topcard__title')]")
+COMPANY_XPATHS = [
+    etree.XPath("//a[contains(@class,'topcard__org-name-link')]"),
+    etree.XPath("//span[contains(@class,'topcard__flavor')]"),
+    etree.XPath("//span[contains(@class,'topcard__flavor--metadata')]"),
+]
+LOCATION_XPATH = etree.XPath("//span[contains(@class,'topcard__flavor--bullet')]")
+POSTED_TIME_XPATH = etree.XPath("//span[contains(@class,'posted-time-ago__text')]")
+APPLICANTS_XPATHS = [
+    etree.XPath("//figcaption[contains(@class, 'num-applicants__caption')]"),
+    etree.XPath("//span[contains(@class, 'num-applicants__caption')]"),
+]
+DESCRIPTION_XPATH = etree.XPath("//div[contains(@class, 'show-more-less-html')]")
+CRITERIA_HEADER_XPATH = etree.XPath("//h3[text()]")
+CRITERIA_VALUE_XPATH = etree.XPath("ancestor::li[1]//span[contains(@class, 'description__job-criteria-text')]")
+VISIBLE_TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+
+
+def _first_text(tree, xpath):
+    """Text of the first match with whitespace collapsed, like WebElement.text; None if absent or empty."""
+    for element in xpath(tree):
+        text = " ".join(element.text_content().split())
+        return text or None
+    return None
+
+
+def _first_text_of(tree, xpaths):
+    """Try fallback selectors in order and return the first non-empty text."""
+    for xpath in xpaths:
+        text = _first_text(tree, xpath)
+        if text:
+            return text
+    return None
+
+
+def parse_job_html(html):
+    """
+    Extract job fields from a job posting's HTML in a single pass over one lxml tree.
+    Pure function: no driver, no logging. Fields that can't be found are None.
+    """
+    try:
+        tree = lxml.html.fromstring(html)
+    except etree.ParserError:
+        # Empty or non-HTML body
+        return {name: None for name in ["job_title", "company_name", "location", "posted_time", "applicants", "description"] + CRITERIA_LABELS}
+
+    description = None
+    for element in DESCRIPTION_XPATH(tree):
+        description = "\n".join(VISIBLE_TEXT_XPATH(element)).strip() or None
+        break
+
+    fields = {
+        "job_title": _first_text(tree, TITLE_XPATH),
+        "company_name": _first_text_of(tree, COMPANY_XPATHS),
+        "location": _first_text(tree, LOCATION_XPATH),
+        "posted_time": _first_text(tree, POSTED_TIME_XPATH),
+        "applicants": _first_text_of(tree, APPLICANTS_XPATHS),
+        "description": description,
+    }
+
+    for label in CRITERIA_LABELS:
+        fields[label] = None
+    for header in CRITERIA_HEADER_XPATH(tree):
+        # Match on the header's first text node, like contains(text(), label) did
+        header_text = header.text or ""
+        for label in CRITERIA_LABELS:
+            if fields[label] is None and label in header_text:
+                fields[label] = _first_text(header, CRITERIA_VALUE_XPATH)
+
+    return fields
+
+
+def missing_required_fields(fields):
+    return [name for name in REQUIRED_FIELDS if not fields.get(name) or not fields[name].strip()]
+
+
+def build_job_data(fields, job_id, job_url):
+    """Shape parsed fields into the record we produce to Kafka."""
+    job_data = {
+        "job_id": job_id,
+        "job_url": job_url,
+        "job_title": fields["job_title"],
+        "company_name": fields["company_name"],
+        "location": fields["location"],
+        "posted_time": fields["posted_time"],
+        "posted_timestamp": str(posted_text_to_datetime(fields["posted_time"] or "")),
+        "applicants": fields["applicants"],
+        "description": fields["description"]
+    }
+    for label in CRITERIA_LABELS:
+        job_data[label] = fields.get(label)
+    return job_data
+
 
 def parse_job_details(driver, job_url, known_job_id=None):
     """
@@ -18,76 +118,27 @@ def parse_job_details(driver, job_url, known_job_id=None):
     job_id = known_job_id or extract_job_id(job_url)
 
     try:
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "show-more-less-html"))
-        )
+        with WAIT_FOR_ELEMENT_SECONDS.labels(element="description").time():
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "show-more-less-html"))
+            )
     except TimeoutException:
         print(f"Description never loaded for {job_url}")
         return None
 
-    job_title = get_text_by_xpath(driver,
-        "//h2[contains(@class,'top-card-layout__title') or contains(@class,'topcard__title')]",
-        "job_title", job_url)
-
-    company_name = (
-        get_text_by_xpath(driver, "//a[contains(@class,'topcard__org-name-link')]", "company_name", job_url)
-        or get_text_by_xpath(driver, "//span[contains(@class,'topcard__flavor')]", "company_name", job_url)
-        or get_text_by_xpath(driver, "//span[contains(@class,'topcard__flavor--metadata')]", "company_name", job_url)
-    )
+    # One round-trip to the browser, everything else is parsed locally
+    page_source = driver.page_source
+    with PARSE_SECONDS.labels(fetcher="selenium").time():
+        fields = parse_job_html(page_source)
 
-    location_text = get_text_by_xpath(driver, "//span[contains(@class,'topcard__flavor--bullet')]", "location", job_url)
-    posted_time = get_text_by_xpath(driver, "//span[contains(@class,'posted-time-ago__text')]", "posted_time", job_url)
+    for field_name, value in fields.items():
+        if value is None:
+            log_missing_field(job_url, field_name)
 
-    try:
-        applicants = driver.find_element(By.XPATH, "//figcaption[contains(@class, 'num-applicants__caption')]").text.strip()
-    except:
-        try:
-            applicants = driver.find_element(By.XPATH, "//span[contains(@class, 'num-applicants__caption')]").text.strip()
-        except:
-            applicants = None
-            log_missing_field(job_url, "applicants")
-
-    try:
-        desc_html = driver.find_element(By.XPATH, "//div[contains(@class, 'show-more-less-html')]").get_attribute("innerHTML")
-        soup = BeautifulSoup(desc_html, "html.parser")
-        description = soup.get_text(separator="\n").strip()
-    except:
-        description = None
-        log_missing_field(job_url, "description")
-
-    required_fields = [job_title, company_name, description]
-    if any(f is None or f.strip() == "" for f in required_fields):
+    missing = missing_required_fields(fields)
+    if missing:
         print(f"Skipping job due to missing required fields: {job_url}")
-
-        os.makedirs("logs/failures", exist_ok=True)
-        snapshot_path = f"logs/failures/job_{job_id}.html"
-        with open(snapshot_path, "w", encoding="utf-8") as f:
-            f.write(driver.page_source)
-            print(f"Saved page snapshot: {snapshot_path}")
-
+        diagnostics.failure_snapshot(job_id, job_url, page_source, missing)
         return None
 
-    job_data = {
-        "job_id": job_id,
-        "job_url": job_url,
-        "job_title": job_title,
-        "company_name": company_name,
-        "location": location_text,
-        "posted_time": posted_time,
-        "posted_timestamp": str(posted_text_to_datetime(posted_time)),
-        "applicants": applicants,
-        "description": description
-    }
-
-    for label in ["Seniority level", "Employment type", "Job function", "Industries"]:
-        try:
-            value = driver.find_element(
-                By.XPATH,
-                f"//h3[contains(text(), '{label}')]/ancestor::li[1]//span[contains(@class, 'description__job-criteria-text')]"
-            ).text.strip()
-            job_data[label] = value
-        except:
-            job_data[label] = None
-            log_missing_field(job_url, label)
-
-    return job_data
+    return build_job_data(fields, job_id, job_url)
@@ -0,0 +1,356 @@
+# app/scraper/job_store.py
+#
+# Local copy of every scraped job, replacing data/linkedin_jobs.json.
+#
+#   data/jobs/segment_00000001.jsonl   one job per line, append-only, rolled at JOB_STORE_SEGMENT_MB
+#   data/jobs/index.sorted             16-byte (job_id, segment, offset) entries sorted by job_id,
+#                                      written by compact() and binary-searched through mmap
+#   data/jobs/index.log                the same entries, appended for every job since the last compact
+#
+# Appending a job writes one line and one index entry, so neither startup nor a run reads the
+# history. Lookups check index.log (small) and then bisect index.sorted. A job written twice
+# keeps both lines until compaction; the newest one wins. Appends from several processes are
+# serialised with flock; run compact while scrapers are idle so readers don't hold stale offsets.
+#
+#   python -m app.scraper.job_store import data/linkedin_jobs.json
+#   python -m app.scraper.job_store compact
+#   python -m app.scraper.job_store get 4212345678
+#   python -m app.scraper.job_store stats
+
+import os
+import sys
+import json
+import mmap
+import glob
+import fcntl
+import struct
+import argparse
+import threading
+
+JOB_STORE_DIR = os.environ.get("JOB_STORE_DIR", os.path.join("data", "jobs"))
+SEGMENT_MAX_BYTES = int(os.environ.get("JOB_STORE_SEGMENT_MB", 64)) * 1024 * 1024
+LEGACY_DATA_FILE = os.path.join("data", "linkedin_jobs.json")
+
+INDEX_ENTRY = struct.Struct("<QII")  # job_id, segment number, byte offset in the segment
+
+
+def _segment_name(number):
+    return f"segment_{number:08d}.jsonl"
+
+
+def _numeric_id(job_id):
+    try:
+        return int(job_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fsync_dir(path):
+    """Make renames and new files in a directory durable."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JobStore:
+    def __init__(self, root=JOB_STORE_DIR, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._segment = None       # number of the segment being appended to
+        self._tail_index = {}      # job_id -> (segment, offset) from index.log, read incrementally on lookup
+        self._tail_read = 0        # bytes of index.log already in _tail_index
+
+    @property
+    def index_log_path(self):
+        return os.path.join(self.root, "index.log")
+
+    @property
+    def sorted_index_path(self):
+        return os.path.join(self.root, "index.sorted")
+
+    def segment_path(self, number):
+        return os.path.join(self.root, _segment_name(number))
+
+    def segment_numbers(self):
+        names = glob.glob(os.path.join(self.root, "segment_*.jsonl"))
+        return sorted(int(os.path.basename(name)[8:16]) for name in names)
+
+    def _file_lock(self):
+        """Cross-process lock so several scrapers (and compact) can share the directory."""
+        os.makedirs(self.root, exist_ok=True)
+        return open(os.path.join(self.root, ".lock"), "a")
+
+    def append(self, job):
+        """Write one job and its index entry. Safe across threads and processes."""
+        line = (json.dumps(job, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock, self._file_lock() as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            segment = self._current_segment(len(line))
+            with open(self.segment_path(segment), "a+b") as f:
+                offset = f.tell()
+                if offset > 0:
+                    # Terminate a line torn by a crash so it doesn't swallow this one
+                    f.seek(offset - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                        offset += 1
+                f.write(line)
+
+            job_id = _numeric_id(job.get("job_id"))
+            if job_id is not None:
+                with open(self.index_log_path, "ab") as f:
+                    f.write(INDEX_ENTRY.pack(job_id, segment, offset))
+        return segment, offset
+
+    def _current_segment(self, incoming_bytes):
+        if self._segment is None:
+            numbers = self.segment_numbers()
+            self._segment = numbers[-1] if numbers else 1
+        # Another process may have rolled to a newer segment since our last append
+        while os.path.exists(self.segment_path(self._segment + 1)):
+            self._segment += 1
+        path = self.segment_path(self._segment)
+        if os.path.exists(path) and 0 < os.path.getsize(path) and os.path.getsize(path) + incoming_bytes > self.segment_max_bytes:
+            self._segment += 1
+        return self._segment
+
+    def _refresh_tail_index(self):
+        """Pick up index.log entries appended since the last lookup, by us or another process."""
+        if not os.path.exists(self.index_log_path):
+            return
+        if os.path.getsize(self.index_log_path) < self._tail_read:
+            # compact() ran in another process and started a new log
+            self._tail_index, self._tail_read = {}, 0
+        with open(self.index_log_path, "rb") as f:
+            f.seek(self._tail_read)
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size  # leave a torn last entry for next time
+        for job_id, segment, offset in INDEX_ENTRY.iter_unpack(data[:usable]):
+            self._tail_index[job_id] = (segment, offset)
+        self._tail_read += usable
+
+    def _find_sorted(self, job_id):
+        if not os.path.exists(self.sorted_index_path) or os.path.getsize(self.sorted_index_path) == 0:
+            return None
+        with open(self.sorted_index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lo, hi = 0, len(mm) // INDEX_ENTRY.size
+            while lo < hi:
+                mid = (lo + hi) // 2
+                key, segment, offset = INDEX_ENTRY.unpack_from(mm, mid * INDEX_ENTRY.size)
+                if key == job_id:
+                    return segment, offset
+                if key < job_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return None
+
+    def locate(self, job_id):
+        job_id = _numeric_id(job_id)
+        if job_id is None:
+            return None
+        with self._lock:
+            self._refresh_tail_index()
+            location = self._tail_index.get(job_id)
+        return location or self._find_sorted(job_id)
+
+    def get(self, job_id):
+        location = self.locate(job_id)
+        if location is None:
+            return None
+        segment, offset = location
+        with open(self.segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def __contains__(self, job_id):
+        return self.locate(job_id) is not None
+
+    def iter_jobs(self):
+        """Stream every stored line in write order, one segment at a time. Skips a torn last line."""
+        for number in self.segment_numbers():
+            with open(self.segment_path(number), "rb") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def stats(self):
+        def entries(path):
+            return os.path.getsize(path) // INDEX_ENTRY.size if os.path.exists(path) else 0
+
+        numbers = self.segment_numbers()
+        return {
+            "segments": len(numbers),
+            "bytes": sum(os.path.getsize(self.segment_path(n)) for n in numbers),
+            "indexed_sorted": entries(self.sorted_index_path),
+            "indexed_since_compact": entries(self.index_log_path),
+        }
+
+    def compact(self):
+        """
+        Rewrite the segments keeping only the newest line per job_id, in job_id order, and rebuild
+        index.sorted from scratch (which also indexes any line whose index entry was lost in a crash).
+
+        Crash-safe: the compacted segments are written next to the old ones under higher numbers,
+        then index.sorted is swapped in with a rename, and only then are index.log and the old
+        segments removed. Stopping at any point leaves every job readable (at worst twice, which
+        the next compact cleans up).
+        """
+        with self._lock, self._file_lock() as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            numbers = self.segment_numbers()
+
+            # Pass 1: newest location of every job
+            latest, unkeyed = {}, []
+            for number in numbers:
+                with open(self.segment_path(number), "rb") as f:
+                    offset = 0
+                    for line in f:
+                        try:
+                            job_id = _numeric_id(json.loads(line).get("job_id"))
+                            if job_id is not None:
+                                latest[job_id] = (number, offset)
+                            else:
+                                unkeyed.append((number, offset))
+                        except json.JSONDecodeError:
+                            pass  # torn line from a crash, dropped
+                        offset += len(line)
+
+            # Pass 2: copy them into new segments after the existing ones
+            index_entries = []
+            first_segment = (numbers[-1] if numbers else 0) + 1
+            with _SegmentReader(self) as reader, _SegmentWriter(self.root, self.segment_max_bytes, first_segment) as writer:
+                for job_id, (number, offset) in sorted(latest.items()):
+                    segment, new_offset = writer.write(reader.read_line(number, offset))
+                    index_entries.append(INDEX_ENTRY.pack(job_id, segment, new_offset))
+                copied = set()  # an interrupted compaction can leave unkeyed lines twice
+                for number, offset in unkeyed:
+                    line = reader.read_line(number, offset)
+                    if line not in copied:
+                        copied.add(line)
+                        writer.write(line)
+
+            # Until this rename, index.sorted and index.log still point into the old segments
+            tmp_index = self.sorted_index_path + ".tmp"
+            with open(tmp_index, "wb") as f:
+                f.write(b"".join(index_entries))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_index, self.sorted_index_path)
+            _fsync_dir(self.root)
+
+            # index.log goes before the segments it points into
+            if os.path.exists(self.index_log_path):
+                os.remove(self.index_log_path)
+            for number in numbers:
+                os.remove(self.segment_path(number))
+            self._tail_index = {}
+            self._tail_read = 0
+            self._segment = None
+
+        print(f"[JobStore] Compacted {len(numbers)} segments into {len(self.segment_numbers())}, {len(latest)} unique jobs.")
+        return len(latest)
+
+    def import_legacy_json(self, path=LEGACY_DATA_FILE):
+        """One-off import of the old linkedin_jobs.json array."""
+        with open(path, "r", encoding="utf-8") as f:
+            jobs = json.load(f)
+        for job in jobs:
+            self.append(job)
+        print(f"[JobStore] Imported {len(jobs)} jobs from {path}")
+        return len(jobs)
+
+
+class _SegmentReader:
+    """Random-access line reads across segments, keeping each segment file open once."""
+
+    def __init__(self, store):
+        self.store = store
+        self.handles = {}
+
+    def read_line(self, number, offset):
+        if number not in self.handles:
+            self.handles[number] = open(self.store.segment_path(number), "rb")
+        f = self.handles[number]
+        f.seek(offset)
+        return f.readline()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for f in self.handles.values():
+            f.close()
+
+
+class _SegmentWriter:
+    """Sequential segment writer used by compact(); rolls to a new segment at max_bytes, fsyncs each one."""
+
+    def __init__(self, root, max_bytes, first_segment=1):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.segment = first_segment - 1
+        self.f = None
+        os.makedirs(root, exist_ok=True)
+
+    def _close(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+
+    def write(self, line):
+        if self.f is None or (self.f.tell() > 0 and self.f.tell() + len(line) > self.max_bytes):
+            if self.f is not None:
+                self._close()
+            self.segment += 1
+            self.f = open(os.path.join(self.root, _segment_name(self.segment)), "wb")
+        offset = self.f.tell()
+        self.f.write(line)
+        return self.segment, offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.f is not None:
+            self._close()
+
+
+job_store = JobStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local append-only job store")
+    parser.add_argument("--root", default=JOB_STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_cmd = sub.add_parser("import", help="Import the legacy linkedin_jobs.json")
+    import_cmd.add_argument("path", nargs="?", default=LEGACY_DATA_FILE)
+    sub.add_parser("compact", help="Drop superseded lines and rebuild the sorted index")
+    sub.add_parser("stats")
+    get_cmd = sub.add_parser("get")
+    get_cmd.add_argument("job_id")
+    sub.add_parser("export", help="Write every stored line to stdout as JSONL")
+    args = parser.parse_args()
+
+    store = JobStore(args.root)
+    if args.command == "import":
+        store.import_legacy_json(args.path)
+    elif args.command == "compact":
+        store.compact()
+    elif args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "get":
+        job = store.get(args.job_id)
+        print(json.dumps(job, ensure_ascii=False, indent=2) if job else f"Job {args.job_id} not found")
+    elif args.command == "export":
+        for job in store.iter_jobs():
+            sys.stdout.write(json.dumps(job, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# app/scraper/migrate_dedup.py
+#
+# Copy the existing dedup sets into another dedup backend:
+#
+#   python -m app.scraper.migrate_dedup --backend bitmap
+#   python -m app.scraper.migrate_dedup --backend bloom --keys linkedin_job_ids --delete_source
+#
+# Then start the scrapers with DEDUP_BACKEND (and optionally DEDUP_SCRAPED_BACKEND) set to match.
+
+import time
+import argparse
+import redis
+
+from .dedup import make_dedup_index
+from .redis_store import SEEN_JOB_IDS_KEY, SCRAPED_JOB_IDS_KEY, REDIS_HOST, REDIS_PORT
+
+
+def migrate_set(client, key, backend, batch_size=10000):
+    source_count = client.scard(key)
+    target = make_dedup_index(client, key, backend, cache_size=0)
+    print(f"[Migrate] {key}: {source_count} members -> {backend}")
+
+    started = time.time()
+    batch, migrated = [], 0
+    for job_id in client.sscan_iter(key, count=batch_size):
+        batch.append(job_id)
+        if len(batch) >= batch_size:
+            target.add(batch)
+            migrated += len(batch)
+            batch = []
+            print(f"[Migrate] {key}: {migrated}/{source_count}", end="\r")
+    if batch:
+        target.add(batch)
+        migrated += len(batch)
+    print(f"[Migrate] {key}: copied {migrated} IDs in {time.time() - started:.1f}s")
+
+    # Every source member must be reported present by the new backend
+    missing = 0
+    for job_id_batch in _batches(client.sscan_iter(key, count=batch_size), batch_size):
+        missing += sum(1 for present in target.contains(job_id_batch) if not present)
+    print(f"[Migrate] {key}: verification found {missing} missing IDs, target count ~{target.count()}")
+    return missing == 0
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate Redis dedup sets to a compact backend")
+    parser.add_argument("--backend", choices=["bitmap", "bloom"], required=True)
+    parser.add_argument("--keys", nargs="+", default=[SEEN_JOB_IDS_KEY, SCRAPED_JOB_IDS_KEY])
+    parser.add_argument("--batch_size", type=int, default=10000)
+    parser.add_argument("--delete_source", action="store_true", help="Delete each source set once it verifies")
+    parser.add_argument("--host", default=REDIS_HOST)
+    parser.add_argument("--port", type=int, default=REDIS_PORT)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    for key in args.keys:
+        ok = migrate_set(client, key, args.backend, args.batch_size)
+        if ok and args.delete_source:
+            client.unlink(key)
+            print(f"[Migrate] Deleted source set {key}")
+        elif not ok:
+            print(f"[Migrate] Keeping source set {key}, verification failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# app/scraper/rate_limiter.py
+#
+# One request budget per target host, shared by every scraper, worker and monitor process through
+# Redis. Each host is a token bucket in the hash ratelimit:<host> (tokens, ts, rate, counters):
+#
+#   acquire()    takes a token, or reserves the next one and sleeps until it's due. Reserving means
+#                N waiting workers are spaced 1/rate apart instead of all retrying at once.
+#   success()    additive increase: rate += RATE_INCREASE, up to RATE_MAX
+#   throttled()  multiplicative decrease: rate *= RATE_DECREASE, down to RATE_MIN, at most once per
+#                RATE_COOLDOWN (one slowdown seen by ten workers is still one cut), and the bucket's
+#                burst is emptied
+#
+# Signals for throttled(): timeouts, pages that parse with required fields missing, challenge or
+# authwall pages, HTTP 429/999. Rates are in requests per second across all processes. Redis time
+# is used for refills so clocks on different hosts don't matter. If Redis is down, callers fall
+# back to sleeping 1/RATE_DEFAULT locally.
+
+import os
+import time
+import random
+from urllib.parse import urlparse
+
+import lxml.html
+from lxml import etree
+
+from .redis_store import redis_store
+from app.metrics import THROTTLED
+
+RATE_DEFAULT = float(os.environ.get("RATE_LIMIT_DEFAULT_RPS", 0.5))
+RATE_MIN = float(os.environ.get("RATE_LIMIT_MIN_RPS", 0.05))
+RATE_MAX = float(os.environ.get("RATE_LIMIT_MAX_RPS", 3))
+RATE_BURST = float(os.environ.get("RATE_LIMIT_BURST", 3))
+RATE_INCREASE = 0.02
+RATE_DECREASE = 0.5
+RATE_COOLDOWN = 10
+JITTER = 0.25  # seconds of random extra wait, so requests don't land on an exact grid
+KEY_PREFIX = "ratelimit"
+# Where LinkedIn redirects blocked clients; matched against the URL path only
+CHALLENGE_PATHS = ["/authwall", "/checkpoint/", "/uas/login"]
+# The challenge page's own elements, so a job description that mentions "captcha" or "security
+# verification" (security engineering roles do) isn't mistaken for one
+CHALLENGE_XPATH = etree.XPath(
+    "//form[contains(@id, 'challenge') or contains(@class, 'challenge-form')]"
+    " | //*[@id='captcha-internal'] | //iframe[contains(@src, 'captcha')]"
+    " | //title[contains(translate(., 'SECURITYVERIFCAN', 'securityverifcan'), 'security verification')]"
+)
+
+ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate')
+local burst = tonumber(ARGV[2])
+local rate = tonumber(state[3]) or tonumber(ARGV[1])
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now), 'rate', tostring(rate))
+redis.call('HINCRBY', KEYS[1], 'acquired', 1)
+redis.call('EXPIRE', KEYS[1], 86400)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+FEEDBACK_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'rate', 'last_decrease', 'tokens')
+local rate = tonumber(state[1]) or tonumber(ARGV[2])
+local last_decrease = tonumber(state[2]) or 0
+local cooling = now - last_decrease < tonumber(ARGV[7])
+if ARGV[1] == 'ok' then
+    if not cooling then
+        rate = math.min(tonumber(ARGV[4]), rate + tonumber(ARGV[5]))
+    end
+    redis.call('HINCRBY', KEYS[1], 'successes', 1)
+else
+    if not cooling then
+        rate = math.max(tonumber(ARGV[3]), rate * tonumber(ARGV[6]))
+        redis.call('HSET', KEYS[1], 'last_decrease', tostring(now))
+        redis.call('HINCRBY', KEYS[1], 'decreases', 1)
+        local tokens = tonumber(state[3])
+        if tokens and tokens > 0 then
+            redis.call('HSET', KEYS[1], 'tokens', '0')
+        end
+    end
+    redis.call('HINCRBY', KEYS[1], 'throttled:' .. ARGV[8], 1)
+end
+redis.call('HSET', KEYS[1], 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], 86400)
+return tostring(rate)
+"""
+
+
+def host_key(url_or_host):
+    """www.linkedin.com, ca.linkedin.com and linkedin.com share a budget: the last two labels."""
+    host = urlparse(url_or_host).hostname if "://" in url_or_host else url_or_host
+    host = (host or url_or_host).lower()
+    if host.replace(".", "").isdigit() or host == "localhost":
+        return host
+    return ".".join(host.split(".")[-2:])
+
+
+def looks_like_challenge(url=None, html=None):
+    """True for LinkedIn's authwall / checkpoint / captcha pages, judged by the URL path and the page's form/title elements."""
+    path = (urlparse(url).path if url and "://" in url else url or "").lower()
+    if any(marker in path for marker in CHALLENGE_PATHS):
+        return True
+    if not html:
+        return False
+    lowered = html[:20000].lower()
+    # Cheap substring screen first; only pages that could be a challenge get parsed
+    if "challenge" not in lowered and "captcha" not in lowered and "verification" not in lowered:
+        return False
+    try:
+        return bool(CHALLENGE_XPATH(lxml.html.fromstring(html)))
+    except (etree.ParserError, ValueError):
+        return False
+
+
+class RateLimiter:
+    def __init__(self, client=None, default_rate=RATE_DEFAULT, min_rate=RATE_MIN, max_rate=RATE_MAX, burst=RATE_BURST,
+                 increase=RATE_INCREASE, decrease=RATE_DECREASE, cooldown=RATE_COOLDOWN, jitter=JITTER):
+        self._client = client
+        self.default_rate = default_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self._acquire_script = None
+        self._feedback_script = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis_store.client
+        return self._client
+
+    def _scripts(self):
+        if self._acquire_script is None:
+            self._acquire_script = self.client.register_script(ACQUIRE_LUA)
+            self._feedback_script = self.client.register_script(FEEDBACK_LUA)
+        return self._acquire_script, self._feedback_script
+
+    def key(self, url_or_host):
+        return f"{KEY_PREFIX}:{host_key(url_or_host)}"
+
+    def reserve(self, url_or_host):
+        """Take a token and return how many seconds to wait before using it (0 if one was free)."""
+        acquire_script, _ = self._scripts()
+        return float(acquire_script(keys=[self.key(url_or_host)], args=[self.default_rate, self.burst]))
+
+    def acquire(self, url_or_host):
+        """Block until this process may send one request to the host. Returns the seconds waited."""
+        try:
+            wait = self.reserve(url_or_host)
+        except Exception as e:
+            print(f"[RateLimit] Redis unavailable ({e}), pacing locally")
+            wait = 1 / self.default_rate
+        if wait > 0 and self.jitter:
+            wait += random.uniform(0, self.jitter)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _feedback(self, url_or_host, outcome, reason):
+        _, feedback_script = self._scripts()
+        try:
+            return float(feedback_script(keys=[self.key(url_or_host)], args=[
+                outcome, self.default_rate, self.min_rate, self.max_rate,
+                self.increase, self.decrease, self.cooldown, reason]))
+        except Exception as e:
+            print(f"[RateLimit] Could not record {outcome} for {url_or_host}: {e}")
+            return None
+
+    def success(self, url_or_host):
+        return self._feedback(url_or_host, "ok", "")
+
+    def throttled(self, url_or_host, reason):
+        """reason: timeout | missing_fields | challenge | status_<code> | error"""
+        THROTTLED.labels(host=host_key(url_or_host), reason=reason).inc()
+        rate = self._feedback(url_or_host, "throttled", reason)
+        if rate is not None:
+            print(f"[RateLimit] {host_key(url_or_host)} slowed down ({reason}); now {rate:.2f} req/s")
+        return rate
+
+    def stats(self, url_or_host):
+        return self.client.hgetall(self.key(url_or_host))
+
+
+class NullRateLimiter:
+    """Same interface, no limits (benchmarks against local servers)."""
+
+    def acquire(self, url_or_host):
+        return 0
+
+    def success(self, url_or_host):
+        return None
+
+    def throttled(self, url_or_host, reason):
+        return None
+
+
+rate_limiter = RateLimiter()
@@ -1,22 +1,198 @@
+import os
 import redis
 import json
+import time
+import threading
+
+from .dedup import make_dedup_index, DEDUP_BACKEND, DEDUP_SCRAPED_BACKEND
+
+SEEN_JOB_IDS_KEY = "linkedin_job_ids"
+SCRAPED_JOB_IDS_KEY = "scraped_job_ids"
+PENDING_NEW_JOBS_KEY = "pending_new_jobs"
+FAILED_JOBS_KEY = "failed_jobs"
+REDIS_HOST = os.environ.get("REDIS_HOST", "redis")
+REDIS_PORT = int(os.environ.get("REDIS_PORT", 6379))
+REDIS_DB = int(os.environ.get("REDIS_DB", 0))
+REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 50))
+VISIBILITY_TIMEOUT = 600
+MAX_DELIVERIES = 3
+
+# KEYS: scraped set, seen set, pending_new list, pending_update list
+# ARGV: job_id_1, payload_1, job_id_2, payload_2, ...
+# Returns one status per job: 0 = already scraped, 1 = queued for update, 2 = queued as new
+ENQUEUE_JOBS_LUA = """
+local statuses = {}
+for i = 1, #ARGV, 2 do
+    local job_id = ARGV[i]
+    local payload = ARGV[i + 1]
+    if redis.call('SISMEMBER', KEYS[1], job_id) == 1 then
+        statuses[#statuses + 1] = 0
+    elseif redis.call('SISMEMBER', KEYS[2], job_id) == 1 then
+        redis.call('RPUSH', KEYS[4], payload)
+        statuses[#statuses + 1] = 1
+    else
+        redis.call('RPUSH', KEYS[3], payload)
+        redis.call('SADD', KEYS[2], job_id)
+        statuses[#statuses + 1] = 2
+    end
+end
+return statuses
+"""
+
+ENQUEUE_STATUSES = {0: "already_scraped", 1: "queued_update", 2: "queued_new"}
+
+# Reliable queue scripts. Every reserved item sits in a per-worker processing list and has a
+# lease (deadline) in a shared ZSET until it is acked; the reaper re-queues expired leases.
+
+# KEYS: queue, processing list, leases zset
+# ARGV: how many more items to move, lease deadline, the item BLMOVE already moved
+# Only the items moved by this call are leased and returned; anything older in the processing
+# list keeps its own lease
+RESERVE_LUA = """
+local items = {ARGV[3]}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not item then
+        break
+    end
+    items[#items + 1] = item
+end
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[3], 'NX', ARGV[2], item)
+end
+return items
+"""
+
+# KEYS: processing list, leases zset
+# ARGV: new lease deadline, then the items to extend (all of the processing list if none)
+EXTEND_LEASES_LUA = """
+local items = {}
+if #ARGV > 1 then
+    for i = 2, #ARGV do
+        items[#items + 1] = ARGV[i]
+    end
+else
+    items = redis.call('LRANGE', KEYS[1], 0, -1)
+end
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[2], 'XX', ARGV[1], item)
+end
+return #items
+"""
+
+# Shared by the reaper and by workers giving up on an item: count the failed delivery and
+# either put the item back on the queue or park it in the failed list for good.
+REQUEUE_OR_FAIL_LUA_FN = """
+local function requeue_or_fail(item, to_front, max_deliveries, force_fail)
+    local ok, job = pcall(cjson.decode, item)
+    local job_id = (ok and type(job) == 'table' and job.job_id) or item
+    local deliveries = redis.call('HINCRBY', KEYS[5], job_id, 1)
+    if force_fail or deliveries >= max_deliveries then
+        redis.call('RPUSH', KEYS[4], item)
+        redis.call('HDEL', KEYS[5], job_id)
+        return 1
+    end
+    if to_front then
+        redis.call('LPUSH', KEYS[3], item)
+    else
+        redis.call('RPUSH', KEYS[3], item)
+    end
+    return 0
+end
+"""
+
+# KEYS: processing list, leases zset, queue, failed list, deliveries hash
+# ARGV: now, visibility timeout, max deliveries
+REAP_LUA = REQUEUE_OR_FAIL_LUA_FN + """
+local now = tonumber(ARGV[1])
+local requeued, failed = 0, 0
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+for _, item in ipairs(items) do
+    local deadline = redis.call('ZSCORE', KEYS[2], item)
+    if not deadline then
+        -- Worker died between BLMOVE and leasing: start the clock now
+        redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), item)
+    elseif tonumber(deadline) < now then
+        redis.call('LREM', KEYS[1], 1, item)
+        redis.call('ZREM', KEYS[2], item)
+        if requeue_or_fail(item, true, tonumber(ARGV[3]), false) == 1 then
+            failed = failed + 1
+        else
+            requeued = requeued + 1
+        end
+    end
+end
+return {requeued, failed}
+"""
+
+# KEYS: processing list, leases zset, queue, failed list, deliveries hash
+# ARGV: item, max deliveries, force fail (0/1)
+NACK_LUA = REQUEUE_OR_FAIL_LUA_FN + """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 0 then
+    return -1
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+return requeue_or_fail(ARGV[1], false, tonumber(ARGV[2]), ARGV[3] == '1')
+"""
+
+# KEYS: processing list, leases zset, queue
+# ARGV: item
+# Hands an item back untouched: no delivery is counted, so it can't end up in failed_jobs this way
+RELEASE_LUA = """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_redis_client(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB):
+    """
+    A client on the process-wide pool for (host, port, db). Nothing connects until the first
+    command; browser threads then share up to REDIS_MAX_CONNECTIONS sockets, waiting for a free
+    one instead of failing when they're all busy.
+    """
+    key = (host, port, db)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = redis.BlockingConnectionPool(
+                host=host, port=port, db=db, decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS, timeout=20,
+            )
+    return redis.Redis(connection_pool=_pools[key])
+
 
 class RedisStore:
-    def __init__(self, host="redis", port=6379, db=0):
-        self.client = redis.Redis(
-            host=host,
-            port=port,
-            db=db,
-            decode_responses=True
-        )
+    def __init__(self, host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, client=None,
+                 dedup_backend=DEDUP_BACKEND, scraped_dedup_backend=DEDUP_SCRAPED_BACKEND):
+        self.client = client or get_redis_client(host, port, db)
+        self.seen_index = make_dedup_index(self.client, SEEN_JOB_IDS_KEY, dedup_backend)
+        self.scraped_index = make_dedup_index(self.client, SCRAPED_JOB_IDS_KEY, scraped_dedup_backend)
+        # Registered lazily: the script is only sent to Redis on first call (EVALSHA, then EVAL on a miss)
+        self._enqueue_jobs_script = self.client.register_script(ENQUEUE_JOBS_LUA)
+        self._reserve_script = self.client.register_script(RESERVE_LUA)
+        self._extend_leases_script = self.client.register_script(EXTEND_LEASES_LUA)
+        self._reap_script = self.client.register_script(REAP_LUA)
+        self._nack_script = self.client.register_script(NACK_LUA)
+        self._release_script = self.client.register_script(RELEASE_LUA)
 
     def add_job_id(self, job_id):
         """Track job IDs we've ever seen (global deduplication)."""
-        self.client.sadd("linkedin_job_ids", job_id)
+        self.seen_index.add([job_id])
 
     def is_job_id_seen(self, job_id):
         """Check if job was ever seen by the monitor (not necessarily scraped)."""
-        return self.client.sismember("linkedin_job_ids", job_id)
+        return self.seen_index.contains([job_id])[0]
+
+    def are_job_ids_seen(self, job_ids):
+        """Batch version of is_job_id_seen: one round-trip for the whole list."""
+        return self.seen_index.contains(job_ids)
 
     def add_to_pending_new_jobs(self, job_id, job_url):
         """Queue a new job for first-time scraping."""
@@ -32,33 +208,199 @@ class RedisStore:
             "job_url": job_url
         }))
 
+    def enqueue_job_page(self, jobs):
+        """
+        Dedupe and enqueue a whole page of {job_id, job_url} dicts in one atomic round-trip.
+        Same rules as the monitor's per-job checks: scraped jobs are skipped, seen-but-unscraped
+        jobs go to pending_update_jobs, everything else goes to pending_new_jobs and is marked seen.
+        Returns a list of status names aligned with `jobs`.
+        """
+        if not jobs:
+            return []
+        if not (self.seen_index.supports_lua and self.scraped_index.supports_lua):
+            return self._enqueue_job_page_pipelined(jobs)
+        args = []
+        for job in jobs:
+            args.append(job["job_id"])
+            args.append(json.dumps({"job_id": job["job_id"], "job_url": job["job_url"]}))
+        statuses = self._enqueue_jobs_script(
+            keys=[SCRAPED_JOB_IDS_KEY, SEEN_JOB_IDS_KEY, "pending_new_jobs", "pending_update_jobs"],
+            args=args
+        )
+        return [ENQUEUE_STATUSES[int(s)] for s in statuses]
+
+    def _enqueue_job_page_pipelined(self, jobs):
+        """Same rules as the Lua script for non-set dedup backends: two lookups, then one pipeline. Not atomic."""
+        job_ids = [job["job_id"] for job in jobs]
+        scraped = self.scraped_index.contains(job_ids)
+        seen = self.seen_index.contains(job_ids)
+
+        statuses, new_ids, batch_seen = [], [], set()
+        pipe = self.client.pipeline(transaction=False)
+        for job, is_scraped, is_seen in zip(jobs, scraped, seen):
+            payload = json.dumps({"job_id": job["job_id"], "job_url": job["job_url"]})
+            if is_scraped:
+                statuses.append("already_scraped")
+            elif is_seen or job["job_id"] in batch_seen:
+                pipe.rpush("pending_update_jobs", payload)
+                statuses.append("queued_update")
+            else:
+                pipe.rpush("pending_new_jobs", payload)
+                new_ids.append(job["job_id"])
+                batch_seen.add(job["job_id"])
+                statuses.append("queued_new")
+        self.seen_index.add(new_ids, pipe=pipe)
+        pipe.execute()
+        return statuses
+
     def fetch_pending_new_jobs(self, batch_size=30):
         """Pop up to batch_size jobs from pending_new_jobs list."""
-        pending_jobs = []
-        for _ in range(batch_size):
-            job_data = self.client.lpop("pending_new_jobs")
-            if not job_data:
-                break
-            pending_jobs.append(json.loads(job_data))
-        return pending_jobs
+        return self._pop_batch("pending_new_jobs", batch_size)
 
     def fetch_pending_update_jobs(self, batch_size=30):
         """Pop up to batch_size jobs from pending_update_jobs list."""
-        pending_jobs = []
-        for _ in range(batch_size):
-            job_data = self.client.lpop("pending_update_jobs")
-            if not job_data:
-                break
-            pending_jobs.append(json.loads(job_data))
-        return pending_jobs
+        return self._pop_batch("pending_update_jobs", batch_size)
+
+    def _pop_batch(self, key, batch_size):
+        # LPOP with a count (Redis >= 6.2) takes the whole batch in one round-trip
+        job_data = self.client.lpop(key, batch_size) or []
+        return [json.loads(item) for item in job_data]
+
+    @staticmethod
+    def _queue_keys(queue, worker_id):
+        return {
+            "processing": f"{queue}:processing:{worker_id}",
+            "leases": f"{queue}:leases",
+            "deliveries": f"{queue}:deliveries",
+        }
+
+    def reserve_jobs(self, queue, worker_id, batch_size=30, block_timeout=5, visibility_timeout=VISIBILITY_TIMEOUT):
+        """
+        Block until at least one item is available, then move up to batch_size items into this
+        worker's processing list and lease them for visibility_timeout seconds.
+        Nothing leaves Redis until ack_jobs/nack_job is called, so a crash loses no work.
+        Each returned dict carries its raw queue entry under "_payload" for acking.
+        """
+        keys = self._queue_keys(queue, worker_id)
+        first = self.client.blmove(queue, keys["processing"], block_timeout, "LEFT", "RIGHT")
+        if first is None:
+            return []
+
+        items = self._reserve_script(
+            keys=[queue, keys["processing"], keys["leases"]],
+            args=[batch_size - 1, time.time() + visibility_timeout, first]
+        )
+        jobs = []
+        for item in items:
+            try:
+                job = json.loads(item)
+            except json.JSONDecodeError:
+                job = {}
+            if not isinstance(job, dict):
+                job = {}
+            job["_payload"] = item
+            jobs.append(job)
+        return jobs
+
+    def ack_jobs(self, queue, worker_id, jobs):
+        """Remove finished items from the processing list and drop their lease and delivery count."""
+        if not jobs:
+            return
+        keys = self._queue_keys(queue, worker_id)
+        pipe = self.client.pipeline(transaction=False)
+        for job in jobs:
+            pipe.lrem(keys["processing"], 1, job["_payload"])
+            pipe.zrem(keys["leases"], job["_payload"])
+            if job.get("job_id"):
+                pipe.hdel(keys["deliveries"], job["job_id"])
+        pipe.execute()
+
+    def nack_job(self, queue, worker_id, job, max_deliveries=MAX_DELIVERIES, permanent=False):
+        """
+        Give an item back after a failed attempt. It goes to the back of the queue, or to
+        failed_jobs once it has failed max_deliveries times (or right away if permanent).
+        Returns True if the item ended up in failed_jobs.
+        """
+        keys = self._queue_keys(queue, worker_id)
+        result = self._nack_script(
+            keys=[keys["processing"], keys["leases"], queue, FAILED_JOBS_KEY, keys["deliveries"]],
+            args=[job["_payload"], max_deliveries, 1 if permanent else 0]
+        )
+        return int(result) == 1
+
+    def release_job(self, queue, worker_id, job):
+        """
+        Put a reserved item back at the end of the queue without counting it as a failed delivery,
+        for work this worker chose not to do (e.g. an HTTP-only worker leaving a job for a browser).
+        """
+        keys = self._queue_keys(queue, worker_id)
+        return int(self._release_script(keys=[keys["processing"], keys["leases"], queue], args=[job["_payload"]])) == 1
+
+    def extend_leases(self, queue, worker_id, jobs=None, visibility_timeout=VISIBILITY_TIMEOUT):
+        """Heartbeat: push back the deadline of the given reserved jobs, or of everything this worker still holds."""
+        keys = self._queue_keys(queue, worker_id)
+        payloads = [job["_payload"] for job in jobs] if jobs is not None else []
+        if jobs is not None and not payloads:
+            return
+        self._extend_leases_script(keys=[keys["processing"], keys["leases"]],
+                                   args=[time.time() + visibility_timeout, *payloads])
+
+    def reap_expired_jobs(self, queue, visibility_timeout=VISIBILITY_TIMEOUT, max_deliveries=MAX_DELIVERIES):
+        """
+        Re-queue items whose lease expired in any worker's processing list (crashed or stuck workers).
+        Items that have expired max_deliveries times go to failed_jobs. Returns (requeued, failed).
+        """
+        requeued = failed = 0
+        for processing in self.client.scan_iter(match=f"{queue}:processing:*", count=100):
+            worker_id = processing.split(":processing:", 1)[1]
+            keys = self._queue_keys(queue, worker_id)
+            r, f = self._reap_script(
+                keys=[processing, keys["leases"], queue, FAILED_JOBS_KEY, keys["deliveries"]],
+                args=[time.time(), visibility_timeout, max_deliveries]
+            )
+            requeued += int(r)
+            failed += int(f)
+        return requeued, failed
+
+    def reserve_pending_new_jobs(self, worker_id, batch_size=30, block_timeout=5):
+        return self.reserve_jobs(PENDING_NEW_JOBS_KEY, worker_id, batch_size, block_timeout)
+
+    def ack_pending_new_jobs(self, worker_id, jobs):
+        self.ack_jobs(PENDING_NEW_JOBS_KEY, worker_id, jobs)
+
+    def nack_pending_new_job(self, worker_id, job, permanent=False):
+        return self.nack_job(PENDING_NEW_JOBS_KEY, worker_id, job, permanent=permanent)
+
+    def release_pending_new_job(self, worker_id, job):
+        return self.release_job(PENDING_NEW_JOBS_KEY, worker_id, job)
+
+    def extend_pending_new_leases(self, worker_id, jobs=None):
+        self.extend_leases(PENDING_NEW_JOBS_KEY, worker_id, jobs)
+
+    def reap_pending_new_jobs(self):
+        return self.reap_expired_jobs(PENDING_NEW_JOBS_KEY)
 
     def mark_job_as_scraped(self, job_id):
         """Track job IDs we have successfully scraped."""
-        self.client.sadd("scraped_job_ids", job_id)
+        self.scraped_index.add([job_id])
+
+    def mark_jobs_as_scraped(self, job_ids):
+        """Mark a batch as scraped and seen in one pipelined round-trip."""
+        if not job_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        self.scraped_index.add(job_ids, pipe=pipe)
+        self.seen_index.add(job_ids, pipe=pipe)
+        pipe.execute()
 
     def is_job_id_scraped(self, job_id):
         """Check if job has already been scraped."""
-        return self.client.sismember("scraped_job_ids", job_id)
+        return self.scraped_index.contains([job_id])[0]
+
+    def are_job_ids_scraped(self, job_ids):
+        """Batch version of is_job_id_scraped: one round-trip for the whole list."""
+        return self.scraped_index.contains(job_ids)
 
 # Singleton instance
+# Cheap to build: the pool opens its first connection on the first command
 redis_store = RedisStore()
@@ -1,21 +1,16 @@
 # app/scraper/scraper.py
 
-import os
-import time
-import json
-import random
-
-
-from .driver import get_driver
+from .driver_pool import driver_pool
 from .redis_store import redis_store
 from .job_parser import parse_job_details
+from .job_store import job_store
+from .rate_limiter import rate_limiter, looks_like_challenge
 from .utils import * 
-from kafka_utils.producer import create_topic, produce_transaction
+from app.metrics import PAGE_NAVIGATION_SECONDS, WAIT_FOR_ELEMENT_SECONDS, JOBS
+from app.tracing import span
+from kafka_utils.producer import produce_transaction
 
 
-DATA_FILE = os.path.join("data", "linkedin_jobs.json")
-topic = create_topic("job_records")
-
 DATE_FILTERS = {
     "any": "",
     "past_month": "r2592000",
@@ -23,35 +18,41 @@ DATE_FILTERS = {
     "past_24_hours": "r86400"
 }
 
-def scrape_linkedin_jobs(max_jobs=10, title="Data Engineer", location="Canada", use_redis=True, date_filter="past_week", max_posted_days=None):
+def scrape_linkedin_jobs(max_jobs=10, title="Data Engineer", location="Canada", use_redis=True, date_filter="past_week", max_posted_days=None, on_job=None):
+    """on_job, if given, is called with each job record as soon as it has been parsed and stored."""
     if date_filter not in DATE_FILTERS:
         raise ValueError(f"Invalid date_filter '{date_filter}'. Valid options: {list(DATE_FILTERS.keys())}")
     date_code = DATE_FILTERS[date_filter]
-    url_template = f"https://www.linkedin.com/jobs/search?keywords={title}&location={location}"
+    url_template = f"{LINKEDIN_BASE_URL}/jobs/search?keywords={title}&location={location}"
     if date_code:
         url_template += f"&f_TPR={date_code}"
 
-    max_scrolls = compute_dynamic_scrolls(max_jobs)
+    print(f"\n[Scraper] Starting scrape: '{title}' in '{location}' | Date filter: '{date_filter}' | Max Days: {max_posted_days or 'Any'}")
 
-    print(f"\n[Scraper] Starting scrape: '{title}' in '{location}' | Date filter: '{date_filter}' | Max Days: {max_posted_days or 'Any'} | Max Scrolls: {max_scrolls}")
+    with span("scrape.search", title=title, location=location, max_jobs=max_jobs) as search_span:
+        with driver_pool.session() as driver:
+            new_jobs = _scrape_search_results(driver, url_template, max_jobs, use_redis, on_job)
+        search_span.set(new_jobs=len(new_jobs))
+
+    print(f"\n🎉 Done. Added {len(new_jobs)} new jobs to {job_store.root}.")
+    return new_jobs
 
-    new_jobs = []
-    existing_data = []
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            try:
-                existing_data = json.load(f)
-            except json.JSONDecodeError:
-                existing_data = []
 
-    driver = get_driver()
+def _scrape_search_results(driver, url, max_jobs, use_redis, on_job=None):
+    new_jobs = []
     wait = WebDriverWait(driver, 10)
 
-    url = url_template
-    driver.get(url)
-    time.sleep(5)
+    with span("rate_limit.acquire"):
+        rate_limiter.acquire(url)
+    with span("driver.get"), PAGE_NAVIGATION_SECONDS.labels(page="search", fetcher="selenium").time():
+        driver.get(url)
+    try:
+        with span("wait.job_cards"), WAIT_FOR_ELEMENT_SECONDS.labels(element="job_cards").time():
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, JOB_CARD_SELECTOR)))
+    except TimeoutException:
+        print("[Init] No job cards showed up within 10s.")
+        rate_limiter.throttled(url, "challenge" if looks_like_challenge(driver.current_url) else "timeout")
     close_modal_if_exists(driver)
-    scroll_and_load_jobs(driver, max_scrolls=max_scrolls)
 
     try:
         job_count_element = driver.find_element(By.CLASS_NAME, 'results-context-header__job-count')
@@ -61,48 +62,76 @@ def scrape_linkedin_jobs(max_jobs=10, title="Data Engineer", location="Canada",
         n_jobs_estimate = 300
         print(f"[Init] Could not read total job count, assuming {n_jobs_estimate}.")
 
-    job_elements = scroll_until_target_jobs(driver, target_job_count=max_jobs)
+    # Seen jobs get skipped below, so load a bit more than max_jobs
+    with span("load_job_cards") as load_span:
+        job_cards = load_job_cards(driver, target_count=min(max_jobs * 2, n_jobs_estimate) or max_jobs,
+                                   pace=lambda: rate_limiter.acquire(url))
+        load_span.set(cards=len(job_cards))
+    job_cards = [card for card in job_cards if card['job_id'] and card['job_url']]
 
-    if not job_elements or len(job_elements) == 0:
+    if not job_cards:
         print("[❌] No jobs loaded after scrolling. Ending scrape.")
-        driver.quit()
         return []
 
-    print(f"✅ Parsing {len(job_elements)} jobs...")
+    print(f"✅ Parsing {len(job_cards)} jobs...")
+
+    # One Redis round-trip for the whole list instead of one per card
+    if use_redis:
+        with span("redis.seen", cards=len(job_cards)):
+            seen_flags = redis_store.are_job_ids_seen([card['job_id'] for card in job_cards])
+        unseen_cards = []
+        for card, seen in zip(job_cards, seen_flags):
+            if seen:
+                print(f"[Skip] Already seen job ID: {card['job_id']}")
+                continue
+            unseen_cards.append(card)
+        job_cards = unseen_cards
 
-    for idx, job in enumerate(job_elements):
+    for idx, card in enumerate(job_cards):
         if len(new_jobs) >= max_jobs:
             break
-        job_url = job.get_attribute("href")
-        job_id = extract_job_id(job_url)
-        if use_redis and redis_store.is_job_id_seen(job_id):
-            print(f"[Skip] Already seen job ID: {job_id}")
-            continue
-        try:
-            print(f"[Process] {idx}: {job_id}")
-            driver.execute_script("arguments[0].scrollIntoView(true);", job)
-            driver.execute_script("arguments[0].click();", job)
-            wait.until(EC.presence_of_element_located((By.XPATH, "//h2")))
-            time.sleep(random.uniform(2, 4))
-            job_data = parse_job_details(driver, job_url)
-            if not job_data:
-                print(f"[❌] Failed to parse job {idx}")
+        job_url, job_id = card['job_url'], card['job_id']
+        with span("scrape.job", job_id=job_id):
+            try:
+                print(f"[Process] {idx}: {job_id}")
+                with span("rate_limit.acquire"):
+                    rate_limiter.acquire(job_url)
+                with span("click_job_card"), PAGE_NAVIGATION_SECONDS.labels(page="job_card", fetcher="selenium").time():
+                    clicked = click_job_card(driver, job_id)
+                if not clicked:
+                    print(f"[❌] Card for job {job_id} is no longer on the page")
+                    continue
+                with span("wait.h2"), WAIT_FOR_ELEMENT_SECONDS.labels(element="job_title").time():
+                    wait.until(EC.presence_of_element_located((By.XPATH, "//h2")))
+                with span("parse_job_details"):
+                    job_data = parse_job_details(driver, job_url)
+                if not job_data:
+                    rate_limiter.throttled(job_url, "challenge" if looks_like_challenge(driver.current_url) else "missing_fields")
+                    JOBS.labels(component="scraper", outcome="failed").inc()
+                    print(f"[❌] Failed to parse job {idx}")
+                    continue
+                rate_limiter.success(job_url)
+                JOBS.labels(component="scraper", outcome="scraped").inc()
+                if use_redis:
+                    redis_store.add_job_id(job_id)
+                new_jobs.append(job_data)
+                with span("job_store.append"):
+                    job_store.append(job_data)  # Written as we go, so a crash keeps everything parsed so far
+                with span("produce"):
+                    produce_transaction(job_data)
+                print(f"[✅] Captured: {job_data['job_title']} at {job_data['company_name']}")
+                if on_job:
+                    on_job(job_data)
+                if use_redis:
+                    redis_store.mark_job_as_scraped(job_id)
+            except TimeoutException:
+                rate_limiter.throttled(job_url, "timeout")
+                JOBS.labels(component="scraper", outcome="failed").inc()
+                print(f"[❌] Timed out waiting for job {idx} ({job_id})")
+                continue
+            except Exception as e:
+                JOBS.labels(component="scraper", outcome="failed").inc()
+                print(f"[❌] Error job {idx} ({job_id}): {e}")
                 continue
-            if use_redis:
-                redis_store.add_job_id(job_id)
-            new_jobs.append(job_data)
-            produce_transaction(job_data)
-            print(f"[✅] Captured: {job_data['job_title']} at {job_data['company_name']}")
-            if use_redis:
-                redis_store.mark_job_as_scraped(job_id)
-        except Exception as e:
-            print(f"[❌] Error job {idx} ({job_id}): {e}")
-            continue
-
-    driver.quit()
-    final_jobs = existing_data + new_jobs
-    os.makedirs("data", exist_ok=True)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(final_jobs, f, ensure_ascii=False, indent=2)
-    print(f"\n🎉 Done. Added {len(new_jobs)} new jobs. Total: {len(final_jobs)}.")
+
     return new_jobs
@@ -2,18 +2,22 @@
 
 import re
 import os
+import lxml.html
+from urllib.parse import urljoin
 from datetime import datetime, timedelta
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException, JavascriptException
+from selenium.common.exceptions import TimeoutException, JavascriptException
 import time
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-import random
 from selenium.webdriver.support import expected_conditions as EC
 
+from app.metrics import PARSE_FAILURES
+from .diagnostics import diagnostics
 
 
-LOG_PATH = os.path.join("logs", "missing_fields.log")
+
+# Every scraper builds its URLs on this, so a local fake (benchmarks/local_server.py) can stand in
+LINKEDIN_BASE_URL = os.environ.get("LINKEDIN_BASE_URL", "https://www.linkedin.com").rstrip("/")
 
 
 def extract_job_id(job_url):
@@ -28,11 +32,10 @@ def extract_job_id(job_url):
         return None
 
 
-def log_missing_field(job_url, field_name):
+def log_missing_field(job_url, field_name, fetcher="selenium"):
     """Logs fields that could not be extracted during scraping."""
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-    with open(LOG_PATH, "a", encoding="utf-8") as log_file:
-        log_file.write(f"[MISSING] {field_name} not found at {job_url}\n")
+    PARSE_FAILURES.labels(field=field_name, fetcher=fetcher).inc()
+    diagnostics.missing_field(job_url, field_name)  # Written in batches by a background thread
 
 
 def get_text_by_xpath(driver, xpath: str, field_name: str, job_url: str):
@@ -88,30 +91,16 @@ def posted_text_to_datetime(posted_text):
         return None
     
 
-def compute_dynamic_scrolls(max_jobs):
-    if max_jobs <= 25:
-        return 5
-    elif max_jobs <= 75:
-        return 8
-    elif max_jobs <= 150:
-        return 12
-    elif max_jobs <= 300:
-        return 15
-    else:
-        return 20
-
-
-def close_modal_if_exists(driver):
+def close_modal_if_exists(driver, timeout=5):
     dismiss_selector = "button.contextual-sign-in-modal__modal-dismiss"
     try:
-        WebDriverWait(driver, 10).until(
+        WebDriverWait(driver, timeout).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, dismiss_selector))
         )
         dismiss_button = driver.find_element(By.CSS_SELECTOR, dismiss_selector)
         print("[✅] Dismiss button found → trying JS click...")
         try:
             driver.execute_script("arguments[0].click();", dismiss_button)
-            time.sleep(1)
             print("[✅] Modal closed using JS click.")
         except JavascriptException:
             dismiss_button.click()
@@ -120,49 +109,168 @@ def close_modal_if_exists(driver):
         print("[⚠️] Dismiss button not visible, skipping...")
 
 
+JOB_CARD_SELECTOR = "div.base-card[data-entity-urn*='jobPosting:']"
+# Extraction takes every card, so listings without a job URN show up (and get counted) downstream
+LISTING_CARD_SELECTOR = "div.base-card"
 
-def scroll_and_load_jobs(driver, max_scrolls=5):
-    for i in range(max_scrolls):
-        print(f"[Scroll] Attempt {i+1}/{max_scrolls} → scrolling...")
-        driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.END)
-        time.sleep(2)
-        try:
-            see_more_button = driver.find_element(By.XPATH, "//button[@aria-label='See more jobs']")
-            if see_more_button.is_displayed():
-                print("[✅] 'See more jobs' button visible → clicking...")
-                driver.execute_script("arguments[0].click();", see_more_button)
-                time.sleep(3)
-        except NoSuchElementException:
-            print("[⚠️] 'See more jobs' button not found this time.")
-    print("[✅] Done scrolling.")
-
-
-
-def scroll_until_target_jobs(driver, target_job_count, max_scroll_attempts=150, stagnant_threshold=3):
-    scroll_attempts = 0
-    stagnant_scrolls = 0
-    last_count = 0
-    while scroll_attempts < max_scroll_attempts:
-        try:
-            for _ in range(3):
-                see_more_button = driver.find_element(By.XPATH, "//button[@aria-label='See more jobs']")
-                if see_more_button.is_displayed():
-                    driver.execute_script("arguments[0].click();", see_more_button)
-                    time.sleep(3)
-        except:
-            pass
-        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.END)
-        time.sleep(random.uniform(2, 3))
-        job_elements = driver.find_elements(By.CLASS_NAME, "base-card__full-link")
-        current_count = len(job_elements)
-        print(f"[Scroll] Jobs loaded: {current_count}")
-        if current_count >= target_job_count:
-            print(f"[Scroll] Reached target of {target_job_count} jobs.")
+# Scrolls to the bottom, clicks "See more jobs" if it's showing, then resolves as soon as a
+# MutationObserver sees new cards, or with grew=false after timeout_ms. One round-trip per page.
+LOAD_MORE_CARDS_JS = """
+const [selector, target, timeoutMs, done] = arguments;
+const count = () => document.querySelectorAll(selector).length;
+const visible = (el) => el && el.offsetParent !== null;
+const before = count();
+const exhausted = () => visible(document.querySelector('.see-more-jobs__viewed-all'));
+if (before >= target) { done({count: before, grew: false, exhausted: exhausted()}); return; }
+
+let finished = false;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    const now = count();
+    done({count: now, grew: now > before, exhausted: exhausted()});
+};
+const observer = new MutationObserver(() => { if (count() > before) finish(); });
+observer.observe(document.body, {childList: true, subtree: true});
+const timer = setTimeout(finish, timeoutMs);
+
+window.scrollTo(0, document.body.scrollHeight);
+const button = document.querySelector("button[aria-label='See more jobs']");
+if (visible(button)) button.click();
+"""
+
+# Everything the scraper and monitor need from the listing, in one call instead of several
+# find_element/get_attribute round-trips per card
+EXTRACT_JOB_CARDS_JS = """
+const text = (root, selector) => {
+    const el = root.querySelector(selector);
+    return el ? el.textContent.trim() : null;
+};
+return Array.from(document.querySelectorAll(arguments[0])).map((card) => {
+    const link = card.querySelector("a.base-card__full-link, a[href*='/jobs/view/']");
+    const posted = card.querySelector("time, [class*='listdate']");
+    return {
+        urn: card.getAttribute("data-entity-urn"),
+        job_url: link ? link.href : null,
+        job_title: text(card, ".base-search-card__title"),
+        company_name: text(card, ".base-search-card__subtitle"),
+        location: text(card, ".job-search-card__location"),
+        posted_text: posted ? posted.textContent.trim() : null,
+        posted_date: posted ? posted.getAttribute("datetime") : null,
+    };
+});
+"""
+
+CLICK_JOB_CARD_JS = """
+const card = document.querySelector(`div.base-card[data-entity-urn$=':${arguments[0]}']`);
+const link = card && card.querySelector("a.base-card__full-link, a[href*='/jobs/view/']");
+if (!link) return false;
+link.scrollIntoView({block: "center"});
+link.click();
+return true;
+"""
+
+
+def normalize_job_card(card):
+    """Card dict from EXTRACT_JOB_CARDS_JS (or a page_source parse) -> job_id / job_url / listing fields."""
+    urn = card.get("urn") or ""
+    job_id = urn.split("jobPosting:")[-1].strip() if "jobPosting:" in urn else None
+    if not job_id and card.get("job_url"):
+        job_id = extract_job_id(card["job_url"])
+    return dict(card, job_id=job_id)
+
+
+def _xpath_text(element, xpath):
+    found = element.xpath(xpath)
+    return found[0].text_content().strip() if found else None
+
+
+def parse_job_cards_html(html):
+    """Same card dicts as EXTRACT_JOB_CARDS_JS, from a page_source snapshot."""
+    tree = lxml.html.fromstring(html)
+    cards = []
+    for card in tree.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' base-card ')]"):
+        links = card.xpath(".//a[contains(@class, 'base-card__full-link') or contains(@href, '/jobs/view/')]")
+        posted = card.xpath(".//time | .//*[contains(@class, 'listdate')]")
+        cards.append({
+            "urn": card.get("data-entity-urn"),
+            "job_url": links[0].get("href") if links else None,
+            "job_title": _xpath_text(card, ".//*[contains(@class, 'base-search-card__title')]"),
+            "company_name": _xpath_text(card, ".//*[contains(@class, 'base-search-card__subtitle')]"),
+            "location": _xpath_text(card, ".//*[contains(@class, 'job-search-card__location')]"),
+            "posted_text": posted[0].text_content().strip() if posted else None,
+            "posted_date": posted[0].get("datetime") if posted else None,
+        })
+    return cards
+
+
+def extract_job_cards(driver):
+    """
+    All listing cards on the page as dicts: one execute_script round-trip, or one page_source
+    parse if the script fails (e.g. a page that blocks or breaks injected JS).
+    """
+    try:
+        cards = driver.execute_script(EXTRACT_JOB_CARDS_JS, LISTING_CARD_SELECTOR)
+    except JavascriptException as e:
+        print(f"[Scroll] Card extraction script failed ({e.msg}), parsing page_source instead.")
+        cards = None
+    if cards is None:
+        page_url = driver.current_url
+        cards = parse_job_cards_html(driver.page_source)
+        # Resolve relative hrefs the way link.href does in the script
+        cards = [dict(card, job_url=urljoin(page_url, card["job_url"]) if card["job_url"] else None) for card in cards]
+    return [normalize_job_card(card) for card in cards]
+
+
+def load_job_cards(driver, target_count, growth_timeout=4, stall_rounds=2, max_rounds=200, should_stop=None, pace=None):
+    """
+    Grow the search result list until it holds target_count cards, LinkedIn stops adding any
+    (stall_rounds waits of growth_timeout seconds in a row with no new cards), or it says
+    every job has been shown. Each round is a single async script that returns the moment the
+    DOM grows, so nothing sleeps longer than the page takes to load.
+
+    should_stop(cards) is called with the card dicts before the first round and after every
+    round that grew the list, and can end loading early. pace() runs before every round (each
+    one makes the page fetch another batch of results), e.g. to wait for the rate limiter.
+    Returns the card dicts, in page order.
+    """
+    driver.set_script_timeout(growth_timeout + 5)
+    stalled = 0
+    count = 0
+    checked_at = -1
+    started = time.perf_counter()
+    for round_number in range(1, max_rounds + 1):
+        if should_stop and count != checked_at:
+            checked_at = count
+            cards = extract_job_cards(driver)
+            if should_stop(cards):
+                print(f"[Scroll] Stopped early at {len(cards)} jobs.")
+                break
+        if pace:
+            pace()
+        result = driver.execute_async_script(LOAD_MORE_CARDS_JS, JOB_CARD_SELECTOR, target_count, int(growth_timeout * 1000))
+        count = result["count"]
+        if count >= target_count:
+            print(f"[Scroll] Reached target of {target_count} jobs after {round_number} rounds.")
+            break
+        if result["exhausted"]:
+            print(f"[Scroll] All {count} jobs for this search are loaded.")
             break
-        stagnant_scrolls = stagnant_scrolls + 1 if current_count == last_count else 0
-        if stagnant_scrolls >= stagnant_threshold:
-            print("[Scroll] No new jobs after multiple scrolls. Stopping early.")
+        if result["grew"]:
+            stalled = 0
+            continue
+        stalled += 1
+        if stalled >= stall_rounds:
+            print(f"[Scroll] No new jobs for {stalled * growth_timeout:.0f}s. Stopping at {count}.")
             break
-        last_count = current_count
-        scroll_attempts += 1
-    return job_elements
+
+    cards = extract_job_cards(driver)
+    print(f"[Scroll] Loaded {len(cards)} job cards in {time.perf_counter() - started:.1f}s.")
+    return cards
+
+
+def click_job_card(driver, job_id):
+    """Open a job's detail pane by clicking its card; False if the card isn't on the page."""
+    return bool(driver.execute_script(CLICK_JOB_CARD_JS, str(job_id)))
@@ -0,0 +1,259 @@
+# app/sink/es_sink.py
+#
+# Kafka -> Elasticsearch sink for job_records and new_job_records (replaces the Logstash pipeline).
+# Each process is one consumer in the es-sink group; Kafka spreads the topics' partitions over
+# however many are running, so --workers up to NUM_PARTITIONS scales it out.
+#
+# Records are consumed in batches, decoded by their content-type header, deduplicated by job_id
+# and bulk-written through ESStore. Offsets are committed only after the bulk write went through,
+# so a crash or an ES outage replays the batch instead of losing it (writes are idempotent: _id is
+# the job_id). Per-item rejections (mapping errors, records without a job_id) are logged and
+# skipped; 429s and 5xxs fail the whole batch, which is re-read from Kafka after a backoff.
+#
+#   python -m app.sink.es_sink --workers 5
+
+import os
+import json
+import time
+import signal
+import socket
+import argparse
+import multiprocessing
+from confluent_kafka import Consumer, TopicPartition, KafkaError
+
+from app.database.es_store import ESStore
+from kafka_utils.producer import KAFKA_BROKERS, NUM_PARTITIONS
+from kafka_utils.serializers import decode_record
+
+SINK_TOPICS = ["job_records", "new_job_records"]
+SINK_GROUP_ID = os.environ.get("ES_SINK_GROUP_ID", "es-sink")
+SINK_BATCH_SIZE = int(os.environ.get("ES_SINK_BATCH_SIZE", 2000))
+SINK_BATCH_TIMEOUT = float(os.environ.get("ES_SINK_BATCH_TIMEOUT", 2))
+STATS_INTERVAL = 30
+STATS_KEY = "es_sink:stats"
+MAX_BACKOFF = 30
+
+CONSUMER_CONF = {
+    "bootstrap.servers": KAFKA_BROKERS,
+    "group.id": SINK_GROUP_ID,
+    "enable.auto.commit": False,
+    "auto.offset.reset": "earliest",
+    "partition.assignment.strategy": "cooperative-sticky",
+    # Let the broker accumulate a decent batch instead of returning every few records
+    "fetch.min.bytes": 64 * 1024,
+    "fetch.wait.max.ms": 500,
+    "max.partition.fetch.bytes": 4 * 1024 * 1024,
+}
+
+
+def get_consumer():
+    return Consumer(CONSUMER_CONF)
+
+
+class SinkRetry(Exception):
+    """The bulk write failed in a way that's worth retrying (cluster down, 429s, 5xxs)."""
+
+
+class ESSink:
+    def __init__(self, store, consumer_factory=get_consumer, topics=SINK_TOPICS,
+                 batch_size=SINK_BATCH_SIZE, batch_timeout=SINK_BATCH_TIMEOUT, stats_publisher=None):
+        self.store = store
+        self.consumer = consumer_factory()
+        self.topics = topics
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.stats_publisher = stats_publisher
+        self.running = True
+        self.stats = {"consumed": 0, "indexed": 0, "duplicates": 0, "rejected": 0, "decode_errors": 0,
+                      "batches": 0, "retries": 0, "lag": 0, "records_per_s": 0.0}
+        self._window_start = time.monotonic()
+        self._window_indexed = 0
+        self._last_stats = time.monotonic()
+
+    def run(self):
+        self.consumer.subscribe(self.topics)
+        backoff = 1
+        try:
+            while self.running:
+                messages = self.consumer.consume(num_messages=self.batch_size, timeout=self.batch_timeout)
+                if messages:
+                    try:
+                        self.process_batch(messages)
+                        backoff = 1
+                    except SinkRetry as e:
+                        self.stats["retries"] += 1
+                        print(f"[Sink] Bulk write failed ({e}); re-reading batch in {backoff}s")
+                        self.rewind(messages)
+                        time.sleep(backoff)
+                        backoff = min(backoff * 2, MAX_BACKOFF)
+                self.maybe_report()
+        finally:
+            self.consumer.close()
+            self.report()
+
+    def stop(self, *_):
+        self.running = False
+
+    def decode(self, messages):
+        """Decoded records keyed by job_id; a later record for the same job replaces the earlier one."""
+        records = {}
+        for msg in messages:
+            if msg.error():
+                if msg.error().code() != KafkaError._PARTITION_EOF:
+                    print(f"[Sink] Consumer error: {msg.error()}")
+                continue
+            self.stats["consumed"] += 1
+            try:
+                record = decode_record(msg.value(), msg.headers())
+            except Exception as e:
+                self.stats["decode_errors"] += 1
+                print(f"[Sink] Undecodable record at {msg.topic()}[{msg.partition()}]@{msg.offset()}: {e}")
+                continue
+            if not isinstance(record, dict) or not record.get("job_id"):
+                self.stats["rejected"] += 1
+                print(f"[Sink] Record without job_id at {msg.topic()}[{msg.partition()}]@{msg.offset()}, skipping")
+                continue
+            job_id = str(record["job_id"])
+            if job_id in records:
+                self.stats["duplicates"] += 1
+            records[job_id] = record
+        return records
+
+    def process_batch(self, messages):
+        records = self.decode(messages)
+        if records:
+            self.write(list(records.values()))
+        self.commit(messages)
+        self.stats["batches"] += 1
+
+    def write(self, records):
+        try:
+            self.store.add_jobs(records)
+            failed = self.store.flush()
+        except Exception as e:
+            # Connection errors and timeouts, from the routing lookups or the bulk helper itself
+            raise SinkRetry(e)
+        retryable = [item for item in failed if _status(item) == 429 or _status(item) >= 500]
+        if retryable:
+            raise SinkRetry(f"{len(retryable)} of {len(records)} documents failed with 429/5xx")
+        self.stats["rejected"] += len(failed)
+        self.stats["indexed"] += len(records) - len(failed)
+        self._window_indexed += len(records) - len(failed)
+
+    def commit(self, messages):
+        """Commit the offset after the last message of the batch, per partition."""
+        offsets = {}
+        for msg in messages:
+            if msg.error():
+                continue
+            key = (msg.topic(), msg.partition())
+            offsets[key] = max(offsets.get(key, -1), msg.offset() + 1)
+        if offsets:
+            self.consumer.commit(offsets=[TopicPartition(t, p, o) for (t, p), o in offsets.items()], asynchronous=False)
+
+    def rewind(self, messages):
+        """Seek every partition in the batch back to its first message so the next consume() re-reads it."""
+        first = {}
+        for msg in messages:
+            if msg.error():
+                continue
+            key = (msg.topic(), msg.partition())
+            first[key] = min(first.get(key, msg.offset()), msg.offset())
+        for (topic, partition), offset in first.items():
+            try:
+                self.consumer.seek(TopicPartition(topic, partition, offset))
+            except Exception as e:
+                # The partition was revoked meanwhile; its new owner starts from the committed offset
+                print(f"[Sink] Could not rewind {topic}[{partition}]: {e}")
+
+    def lag(self):
+        """Messages behind the high watermark, summed over the partitions assigned to this consumer."""
+        total = 0
+        for tp in self.consumer.position(self.consumer.assignment()):
+            _, high = self.consumer.get_watermark_offsets(tp, timeout=5, cached=False)
+            if tp.offset >= 0:
+                total += max(high - tp.offset, 0)
+            else:
+                # Nothing consumed yet on this partition: fall back to the committed offset
+                committed = self.consumer.committed([tp], timeout=5)[0].offset
+                total += high - committed if committed >= 0 else high
+        return total
+
+    def maybe_report(self):
+        if time.monotonic() - self._last_stats >= STATS_INTERVAL:
+            self.report()
+
+    def report(self):
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        self.stats["records_per_s"] = round(self._window_indexed / elapsed, 1) if elapsed else 0.0
+        self._window_start, self._window_indexed, self._last_stats = now, 0, now
+        try:
+            self.stats["lag"] = self.lag()
+        except Exception as e:
+            print(f"[Sink] Could not compute lag: {e}")
+        print(f"[Sink] {self.stats}")
+        if self.stats_publisher:
+            try:
+                self.stats_publisher(self.stats)
+            except Exception as e:
+                print(f"[Sink] Could not publish stats: {e}")
+
+
+def _status(item):
+    _, result = next(iter(item.items()))
+    return int(result.get("status") or 0)
+
+
+def redis_stats_publisher(worker_id):
+    """Store this worker's latest stats in the es_sink:stats hash (read by monitor_redis_queues)."""
+    from app.scraper.redis_store import get_redis_client
+
+    def publish(stats):
+        client = get_redis_client()
+        client.hset(STATS_KEY, worker_id, json.dumps(dict(stats, updated_at=time.time())))
+    return publish
+
+
+def run_worker(worker_index, batch_size, batch_timeout):
+    worker_id = f"{socket.gethostname()}-{worker_index}"
+    # No timer and no size-triggered flushes: a whole Kafka batch must go out in the sink's own
+    # flush() so its per-item failures are seen before the offsets are committed
+    store = ESStore(bulk_max_docs=batch_size + 1, flush_interval=0)
+    sink = ESSink(store, batch_size=batch_size, batch_timeout=batch_timeout,
+                  stats_publisher=redis_stats_publisher(worker_id))
+    signal.signal(signal.SIGTERM, sink.stop)
+    signal.signal(signal.SIGINT, sink.stop)
+    print(f"[Sink] {worker_id} consuming {SINK_TOPICS} as group '{SINK_GROUP_ID}'")
+    sink.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consume job records from Kafka and bulk-index them into Elasticsearch")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Consumer processes; more than the partition count ({NUM_PARTITIONS}) just leaves some idle")
+    parser.add_argument("--batch_size", type=int, default=SINK_BATCH_SIZE)
+    parser.add_argument("--batch_timeout", type=float, default=SINK_BATCH_TIMEOUT)
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker(0, args.batch_size, args.batch_timeout)
+        return
+
+    workers = [multiprocessing.Process(target=run_worker, args=(i, args.batch_size, args.batch_timeout), name=f"es-sink-{i}")
+               for i in range(min(args.workers, NUM_PARTITIONS))]
+    for worker in workers:
+        worker.start()
+
+    def stop_all(*_):
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()  # SIGTERM: each worker finishes its batch and closes cleanly
+    signal.signal(signal.SIGTERM, stop_all)
+    signal.signal(signal.SIGINT, stop_all)
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
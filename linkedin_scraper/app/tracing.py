@@ -0,0 +1,371 @@
+# app/tracing.py
+#
+# Timed spans around the stages of a scrape (navigation, waits, parsing, producing, rate limit
+# waits) and an on-demand stack sampler.
+#
+# Tracing is off unless TRACE_EXPORT is set; span() then returns a shared no-op object, so the
+# instrumented code pays one function call per stage.
+#   TRACE_EXPORT=jsonl   one JSON object per finished span in TRACE_FILE (logs/traces.jsonl)
+#   TRACE_EXPORT=otlp    OTLP/HTTP JSON to OTLP_ENDPOINT (an OpenTelemetry collector, Jaeger, Tempo)
+#   TRACE_SAMPLE_RATE    fraction of root spans (and their children) kept, default 1
+# Spans are queued and written from a background thread in batches.
+#
+# Profiling: `kill -USR1 <pid>` (or PROFILE_ON_START=<seconds>) samples every thread's stack for
+# PROFILE_SECONDS and writes collapsed stacks to logs/profiles/, ready for flamegraph.pl or
+# speedscope.app.
+#
+#   python -m app.tracing summary logs/traces.jsonl     # where the time went, per span name
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import signal
+import argparse
+import threading
+from collections import Counter
+
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "").lower()
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join("logs", "traces.jsonl"))
+OTLP_ENDPOINT = os.environ.get("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL = 2  # seconds between background flushes
+PROFILE_DIR = os.path.join("logs", "profiles")
+PROFILE_SECONDS = int(os.environ.get("PROFILE_SECONDS", 30))
+PROFILE_INTERVAL = 0.005
+
+
+class NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id", "sampled", "start", "_started")
+
+    def __init__(self, tracer, name, attrs, parent):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = random.getrandbits(64)
+        if parent is None:
+            self.trace_id = random.getrandbits(128)
+            self.parent_id = None
+            self.sampled = random.random() < tracer.sample_rate
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if self.sampled:
+            self.tracer.finish({
+                "trace_id": f"{self.trace_id:032x}",
+                "span_id": f"{self.span_id:016x}",
+                "parent_id": f"{self.parent_id:016x}" if self.parent_id is not None else None,
+                "name": self.name,
+                "service": self.tracer.service,
+                "pid": os.getpid(),
+                "thread": threading.current_thread().name,
+                "start": self.start,
+                "duration_ms": round(duration * 1000, 3),
+                "attrs": self.attrs,
+                "error": f"{exc_type.__name__}: {exc}" if exc_type else None,
+            })
+        return False
+
+
+class BatchExporter:
+    """Collects finished spans on a queue; a daemon thread hands them to write() in batches."""
+
+    def __init__(self, batch_size=EXPORT_BATCH_SIZE, interval=EXPORT_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, record):
+        self._queue.put(record)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return
+                try:
+                    self.write(batch)
+                except Exception as e:
+                    print(f"[Tracing] Dropped {len(batch)} spans: {e}")
+
+    def write(self, batch):
+        raise NotImplementedError
+
+
+class JsonlExporter(BatchExporter):
+    def __init__(self, path=TRACE_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def write(self, batch):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+
+
+class OtlpExporter(BatchExporter):
+    """OTLP/HTTP with the JSON encoding, so no OpenTelemetry SDK is needed."""
+
+    def __init__(self, endpoint=OTLP_ENDPOINT, timeout=5, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._session = None
+
+    @staticmethod
+    def _attributes(attrs):
+        result = []
+        for key, value in attrs.items():
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            result.append({"key": key, "value": typed})
+        return result
+
+    def to_otlp(self, batch):
+        by_service = {}
+        for record in batch:
+            start_ns = int(record["start"] * 1e9)
+            span = {
+                "traceId": record["trace_id"],
+                "spanId": record["span_id"],
+                "name": record["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + int(record["duration_ms"] * 1e6)),
+                "attributes": self._attributes(dict(record["attrs"], **{"thread.name": record["thread"]})),
+                "status": {"code": 2, "message": record["error"]} if record["error"] else {"code": 1},
+            }
+            if record["parent_id"]:
+                span["parentSpanId"] = record["parent_id"]
+            by_service.setdefault((record["service"], record["pid"]), []).append(span)
+        return {"resourceSpans": [
+            {"resource": {"attributes": self._attributes({"service.name": service, "process.pid": pid})},
+             "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}]}
+            for (service, pid), spans in by_service.items()
+        ]}
+
+    def write(self, batch):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        response = self._session.post(self.endpoint, json=self.to_otlp(batch), timeout=self.timeout)
+        response.raise_for_status()
+
+
+def make_exporter(kind=TRACE_EXPORT):
+    if kind == "jsonl":
+        return JsonlExporter()
+    if kind == "otlp":
+        return OtlpExporter()
+    if kind:
+        print(f"[Tracing] Unknown TRACE_EXPORT '{kind}', tracing stays off")
+    return None
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate=TRACE_SAMPLE_RATE, service=None):
+        self.exporter = exporter
+        self.enabled = exporter is not None
+        self.sample_rate = sample_rate
+        self.service = service or os.path.basename(sys.argv[0] or "python")
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        stack = self._stack()
+        return Span(self, name, attrs, stack[-1] if stack else None)
+
+    def finish(self, record):
+        self.exporter.submit(record)
+
+    def flush(self):
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+tracer = Tracer(make_exporter())
+
+
+def span(name, **attrs):
+    """with span("driver.get", url=url): ...  Nested spans in the same thread become children."""
+    return tracer.span(name, **attrs)
+
+
+class StackSampler:
+    """Samples every thread's Python stack every `interval` and counts identical stacks."""
+
+    def __init__(self, interval=PROFILE_INTERVAL, out_dir=PROFILE_DIR):
+        self.interval = interval
+        self.out_dir = out_dir
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=PROFILE_SECONDS):
+        if self.running:
+            print("[Profiler] Already sampling, ignoring the request")
+            return
+        print(f"[Profiler] Sampling all threads for {seconds}s")
+        self._thread = threading.Thread(target=self._run, args=(seconds,), name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self, seconds):
+        counts = self.sample(seconds)
+        path = self.write(counts)
+        print(f"[Profiler] {sum(counts.values())} samples written to {path}")
+        for frame, n in self.top_frames(counts):
+            print(f"[Profiler] {n / max(sum(counts.values()), 1):6.1%}  {frame}")
+
+    def sample(self, seconds):
+        counts = Counter()
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                counts[";".join(reversed(frames))] += 1
+            time.sleep(self.interval)
+        return counts
+
+    def write(self, counts):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"profile-{tracer.service}-{os.getpid()}-{int(time.time())}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in counts.most_common():
+                f.write(f"{stack} {n}\n")
+        return path
+
+    @staticmethod
+    def top_frames(counts, limit=10):
+        """Leaf frames by sample count: where the threads actually were."""
+        leaves = Counter()
+        for stack, n in counts.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        return leaves.most_common(limit)
+
+
+profiler = StackSampler()
+
+
+def init_tracing(service):
+    """Call once from a process entry point: names the service and installs the profiler trigger."""
+    tracer.service = service
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.start(PROFILE_SECONDS))
+    if os.environ.get("PROFILE_ON_START"):
+        profiler.start(int(os.environ["PROFILE_ON_START"]))
+    if tracer.enabled:
+        print(f"[Tracing] {service}: exporting spans via {TRACE_EXPORT} (sample rate {tracer.sample_rate})")
+
+
+def summarize(path):
+    """Per span name: count, p50, p95, total time and its share of all root-span time."""
+    durations, root_total = {}, 0.0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            durations.setdefault(record["name"], []).append(record["duration_ms"])
+            if record["parent_id"] is None:
+                root_total += record["duration_ms"]
+
+    print(f"{'span':<28} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'total s':>10} {'share':>7}")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        total = sum(values)
+        share = f"{total / root_total:6.1%}" if root_total else "-"
+        print(f"{name:<28} {len(values):>7} {values[len(values) // 2]:>10.1f} "
+              f"{values[min(len(values) - 1, int(len(values) * 0.95))]:>10.1f} {total / 1000:>10.1f} {share:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize exported trace spans")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("path", nargs="?", default=TRACE_FILE)
+    args = parser.parse_args()
+    summarize(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# app/web/job_triggers.py
+#
+# Scrapes behind /trigger_scraper and /trigger_scraper/batch. Every trigger resolves to a Future:
+#   - a job scraped in the last CACHE_TTL seconds resolves straight from the cache
+#   - a job that is already being scraped shares that scrape's Future (single-flight)
+#   - anything else is queued; a dispatcher thread collects what arrives within BATCH_WINDOW
+#     and scrapes it as one batch: over HTTP first, then the leftovers on at most MAX_BROWSERS
+#     pooled drivers that each work through the rest of the batch.
+# So a burst of hundreds of single triggers costs a few browser sessions, not one Chrome each.
+
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.scraper.driver_pool import driver_pool, POOL_SIZE
+from app.scraper.http_fetcher import http_fetcher
+from app.scraper.job_parser import parse_job_details
+from app.scraper.rate_limiter import rate_limiter, looks_like_challenge
+from app.metrics import JOBS
+from app.tracing import span
+from kafka_utils.producer import produce_transaction
+
+CACHE_TTL = int(os.environ.get("TRIGGER_CACHE_TTL", 600))
+CACHE_SIZE = int(os.environ.get("TRIGGER_CACHE_SIZE", 5000))
+BATCH_WINDOW = float(os.environ.get("TRIGGER_BATCH_WINDOW", 0.2))
+MAX_BATCH = int(os.environ.get("TRIGGER_MAX_BATCH", 500))
+MAX_BROWSERS = int(os.environ.get("TRIGGER_MAX_BROWSERS", POOL_SIZE))
+MAX_CONCURRENT_BATCHES = int(os.environ.get("TRIGGER_MAX_CONCURRENT_BATCHES", 2))
+BATCH_STATUS_TTL = 3600
+
+
+class TriggerBatch:
+    """The Futures behind one POST /trigger_scraper/batch, for status polling."""
+
+    def __init__(self, entries):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.entries = entries  # [(job_id, source, future)]
+
+    @property
+    def done(self):
+        return all(future.done() for _, _, future in self.entries)
+
+    def to_dict(self):
+        jobs, counts = [], {"pending": 0, "scraped": 0, "failed": 0}
+        for job_id, source, future in self.entries:
+            if not future.done():
+                status = "pending"
+            else:
+                status = "scraped" if future.result() else "failed"
+            counts[status] += 1
+            jobs.append({"job_id": job_id, "source": source, "status": status})
+        return {"batch_id": self.id, "done": counts["pending"] == 0, "counts": counts, "jobs": jobs}
+
+
+class JobTriggers:
+    def __init__(self, fetcher=http_fetcher, pool=driver_pool, cache_ttl=CACHE_TTL, cache_size=CACHE_SIZE,
+                 batch_window=BATCH_WINDOW, max_browsers=MAX_BROWSERS, max_concurrent_batches=MAX_CONCURRENT_BATCHES):
+        self.fetcher = fetcher
+        self.pool = pool
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.max_browsers = max(1, max_browsers)
+        self.cache = OrderedDict()  # job_id -> (expires_at, job_data), oldest first
+        self.in_flight = {}  # job_id -> Future
+        self.pending = []  # (job_info, future) waiting for the dispatcher
+        self.batches = {}
+        self._lock = threading.Lock()
+        self._has_pending = threading.Condition(self._lock)
+        self._dispatcher = None
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="trigger-batch")
+
+    def trigger(self, jobs):
+        """
+        Queue {job_id, job_url} entries. Returns [(job_id, source, future)] in the same order,
+        source being "cached", "coalesced" or "queued"; each future resolves to the record or None.
+        """
+        entries = []
+        with self._lock:
+            now = time.time()
+            for job_info in jobs:
+                job_id = job_info["job_id"]
+                cached = self.cache.get(job_id)
+                if cached and cached[0] > now:
+                    future = Future()
+                    future.set_result(cached[1])
+                    entries.append((job_id, "cached", future))
+                elif job_id in self.in_flight:
+                    entries.append((job_id, "coalesced", self.in_flight[job_id]))
+                else:
+                    future = Future()
+                    self.in_flight[job_id] = future
+                    self.pending.append((job_info, future))
+                    entries.append((job_id, "queued", future))
+            if self.pending:
+                self._ensure_dispatcher()
+                self._has_pending.notify()
+        return entries
+
+    def submit_batch(self, jobs):
+        batch = TriggerBatch(self.trigger(jobs))
+        with self._lock:
+            cutoff = time.time() - BATCH_STATUS_TTL
+            for batch_id in [i for i, b in self.batches.items() if b.created_at < cutoff]:
+                del self.batches[batch_id]
+            self.batches[batch.id] = batch
+        return batch
+
+    def get_batch(self, batch_id):
+        with self._lock:
+            return self.batches.get(batch_id)
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_forever, name="trigger-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_forever(self):
+        while True:
+            with self._lock:
+                self._has_pending.wait_for(lambda: self.pending)
+            # Give the rest of a burst of single triggers a moment to arrive and share the batch
+            time.sleep(self.batch_window)
+            with self._lock:
+                batch, self.pending = self.pending[:MAX_BATCH], self.pending[MAX_BATCH:]
+            self.executor.submit(self._scrape_batch, batch)
+
+    def _scrape_batch(self, batch):
+        futures = {job_info["job_id"]: future for job_info, future in batch}
+        try:
+            with span("trigger.batch", jobs=len(batch)) as batch_span:
+                scraped, needs_browser = self.fetcher.scrape_jobs([job_info for job_info, _ in batch])
+                for job_data in scraped:
+                    self._finish(job_data["job_id"], futures, job_data)
+                if needs_browser:
+                    self._scrape_with_browsers(needs_browser, futures)
+                batch_span.set(http=len(scraped), browser=len(needs_browser))
+        except Exception as e:
+            print(f"[Trigger] Batch of {len(batch)} failed: {e}")
+        finally:
+            # Anything not resolved above failed; don't leave callers waiting
+            for job_id, future in futures.items():
+                if not future.done():
+                    self._finish(job_id, futures, None)
+
+    def _scrape_with_browsers(self, jobs, futures):
+        job_queue = queue.Queue()
+        for job_info in jobs:
+            job_queue.put(job_info)
+        n_browsers = min(self.max_browsers, len(jobs))
+        print(f"[Trigger] {len(jobs)} jobs need a browser, using {n_browsers}")
+        threads = [threading.Thread(target=self._drain, args=(job_queue, futures), name="trigger-browser")
+                   for _ in range(n_browsers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _drain(self, job_queue, futures):
+        try:
+            with self.pool.session() as driver:
+                while True:
+                    try:
+                        job_info = job_queue.get_nowait()
+                    except queue.Empty:
+                        return
+                    self._finish(job_info["job_id"], futures, self._scrape_with_driver(driver, job_info))
+        except Exception as e:
+            print(f"[Trigger] Browser session failed: {e}")
+
+    def _scrape_with_driver(self, driver, job_info):
+        job_id, job_url = job_info["job_id"], job_info["job_url"]
+        with span("trigger.browser_job", job_id=job_id):
+            try:
+                rate_limiter.acquire(job_url)
+                # Pooled drivers keep their last page around, so always navigate first
+                driver.get(job_url)
+                job_data = parse_job_details(driver, job_url, known_job_id=job_id)
+            except Exception as e:
+                print(f"[Trigger] Error scraping {job_id}: {e}")
+                return None
+        if job_data:
+            rate_limiter.success(job_url)
+        else:
+            rate_limiter.throttled(job_url, "challenge" if looks_like_challenge(driver.current_url) else "missing_fields")
+        return job_data
+
+    def _finish(self, job_id, futures, job_data):
+        if job_data:
+            try:
+                produce_transaction(job_data)
+            except Exception as e:
+                print(f"[Trigger] Could not produce {job_id}: {e}")
+                job_data = None
+        JOBS.labels(component="trigger", outcome="scraped" if job_data else "failed").inc()
+        with self._lock:
+            if job_data:
+                self.cache[job_id] = (time.time() + self.cache_ttl, job_data)
+                self.cache.move_to_end(job_id)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            self.in_flight.pop(job_id, None)
+        futures[job_id].set_result(job_data)
+
+
+job_triggers = JobTriggers()
@@ -0,0 +1,157 @@
+# app/web/scrape_jobs.py
+#
+# Search scrapes started from the web app run here instead of inside the request: submit() queues
+# one on a small thread pool and returns a handle right away, the page polls its status or
+# follows its results as Server-Sent Events. At most MAX_CONCURRENT scrapes run at once (each
+# holds one pooled browser) and at most MAX_QUEUED wait behind them; past that submit() refuses.
+# State is kept in this process, so run the web app as one process (threads are fine).
+
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.scraper.driver_pool import POOL_SIZE
+from app.scraper.scraper import scrape_linkedin_jobs
+
+MAX_CONCURRENT = int(os.environ.get("SCRAPE_MAX_CONCURRENT", POOL_SIZE))
+MAX_QUEUED = int(os.environ.get("SCRAPE_MAX_QUEUED", 10))
+MAX_JOBS_PER_SCRAPE = int(os.environ.get("SCRAPE_MAX_JOBS", 100))
+RESULT_TTL = int(os.environ.get("SCRAPE_RESULT_TTL", 3600))
+HEARTBEAT_SECONDS = 15
+
+FINISHED = ("done", "failed")
+
+
+class ScrapeQueueFull(Exception):
+    pass
+
+
+class ScrapeJob:
+    """One submitted scrape: its parameters, status and the jobs parsed so far."""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.error = None
+        self.jobs = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def add_job(self, job_data):
+        with self._changed:
+            self.jobs.append(job_data)
+            self._changed.notify_all()
+
+    def set_status(self, status, error=None):
+        with self._changed:
+            self.status = status
+            self.error = error
+            if status == "running":
+                self.started_at = time.time()
+            elif status in FINISHED:
+                self.finished_at = time.time()
+            self._changed.notify_all()
+
+    def wait_for_change(self, seen_jobs, seen_status, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.jobs) > seen_jobs or self.status != seen_status, timeout)
+            return list(self.jobs[seen_jobs:]), self.status
+
+    def to_dict(self, since=0):
+        with self._changed:
+            return {
+                "scrape_id": self.id,
+                "status": self.status,
+                "error": self.error,
+                "params": self.params,
+                "jobs_found": len(self.jobs),
+                "jobs": self.jobs[since:],
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class ScrapeJobManager:
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_queued=MAX_QUEUED, result_ttl=RESULT_TTL, scrape_fn=scrape_linkedin_jobs):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.scrape_fn = scrape_fn
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="web-scrape")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, params):
+        with self._lock:
+            self._evict_expired()
+            active = sum(1 for job in self.jobs.values() if not job.finished)
+            if active >= self.max_concurrent + self.max_queued:
+                raise ScrapeQueueFull(f"{active} scrapes already running or queued")
+            job = ScrapeJob(params)
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job)
+        print(f"[Scrapes] Queued {job.id}: {params}")
+        return job
+
+    def get(self, scrape_id):
+        with self._lock:
+            return self.jobs.get(scrape_id)
+
+    def _run(self, job):
+        job.set_status("running")
+        try:
+            self.scrape_fn(on_job=job.add_job, **job.params)
+            job.set_status("done")
+            print(f"[Scrapes] {job.id} done with {len(job.jobs)} jobs")
+        except Exception as e:
+            job.set_status("failed", error=str(e))
+            print(f"[Scrapes] {job.id} failed: {e}")
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.result_ttl
+        for scrape_id in [i for i, job in self.jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self.jobs[scrape_id]
+
+
+def sse(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(job, last_event_id=None):
+    """
+    SSE for one scrape: a `job` event per parsed job (id = its position, so a reconnect with
+    Last-Event-ID picks up after the last one received), `status` when the status changes and
+    `end` once it finished. Comment lines keep idle connections open through proxies.
+    """
+    sent = int(last_event_id) + 1 if last_event_id not in (None, "") else 0
+    status = None
+    while True:
+        new_jobs, current = job.wait_for_change(sent, status, HEARTBEAT_SECONDS)
+        if not new_jobs and current == status:
+            yield ": keep-alive\n\n"
+            continue
+        for job_data in new_jobs:
+            yield sse("job", job_data, event_id=sent)
+            sent += 1
+        if current != status:
+            status = current
+            yield sse("status", {"status": status, "jobs_found": sent, "error": job.error})
+        if status in FINISHED:
+            yield sse("end", {"status": status, "jobs_found": sent})
+            return
+
+
+scrape_jobs = ScrapeJobManager()
@@ -1,31 +1,82 @@
 # app/web/views.py
-from flask import Blueprint, render_template, request
-from app.scraper.scraper import scrape_linkedin_jobs
-from flask import Blueprint, request, jsonify
-from app.scraper.driver import get_driver
-from app.scraper.job_parser import parse_job_details
-from kafka_utils.producer import produce_transaction
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Blueprint, render_template, request, jsonify, Response, url_for
+from app.scraper.scraper import DATE_FILTERS
+from app.web.scrape_jobs import scrape_jobs, stream_events, ScrapeQueueFull, MAX_JOBS_PER_SCRAPE
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from app.web.job_triggers import job_triggers, MAX_BATCH
+from app.database.es_store import peek_es_store, init_es_store_in_background
+from app.database.job_search import search_jobs, SearchParamError
 
 web = Blueprint("web", __name__, template_folder="templates")
 
+TRIGGER_WAIT_SECONDS = 120
+
+def _scrape_params(form):
+    """Validate a scrape submission (form fields or JSON body) into scrape_linkedin_jobs kwargs."""
+    try:
+        max_jobs = int(form.get("max_jobs") or 10)
+        max_posted_days = float(form["max_posted_days"]) if form.get("max_posted_days") not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("max_jobs and max_posted_days must be numbers")
+    if not 1 <= max_jobs <= MAX_JOBS_PER_SCRAPE:
+        raise ValueError(f"max_jobs must be between 1 and {MAX_JOBS_PER_SCRAPE}")
+    date_filter = form.get("date_filter") or "past_week"
+    if date_filter not in DATE_FILTERS:
+        raise ValueError(f"date_filter must be one of {list(DATE_FILTERS)}")
+    return {
+        "title": form.get("title") or "Data Engineer",
+        "location": form.get("location") or "Canada",
+        "max_jobs": max_jobs,
+        "date_filter": date_filter,
+        "max_posted_days": max_posted_days,
+    }
+
 @web.route("/", methods=["GET", "POST"])
 def home():
-    jobs = []
+    # The form is submitted to /scrapes by the page's script; a plain POST (no JS) lands here
+    scrape, error = None, None
     if request.method == "POST":
-        title = request.form.get("title", "Data Engineer")
-        location = request.form.get("location", "Canada")
-        max_jobs = int(request.form.get("max_jobs", 10))
-
         try:
-            result = scrape_linkedin_jobs(max_jobs=max_jobs, title=title, location=location)
-            if isinstance(result, list):
-                jobs = result
-            else:
-                print("scrape_linkedin_jobs did not return a list")
-        except Exception as e:
-            print(f"Error during scraping: {e}")
+            scrape = scrape_jobs.submit(_scrape_params(request.form))
+        except (ValueError, ScrapeQueueFull) as e:
+            error = str(e)
+    return render_template("home.html", scrape=scrape, error=error, max_jobs_limit=MAX_JOBS_PER_SCRAPE)
+
+@web.route('/scrapes', methods=['POST'])
+def submit_scrape():
+    """Start a search scrape in the background. Returns 202 with URLs to poll and to stream results from."""
+    try:
+        scrape = scrape_jobs.submit(_scrape_params(request.get_json(silent=True) or request.form))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ScrapeQueueFull as e:
+        return jsonify({"error": f"Too many scrapes in progress ({e}), try again later"}), 429, {"Retry-After": "30"}
+
+    status_url = url_for("web.scrape_status", scrape_id=scrape.id)
+    return jsonify({
+        "scrape_id": scrape.id,
+        "status": scrape.status,
+        "status_url": status_url,
+        "events_url": url_for("web.scrape_events", scrape_id=scrape.id),
+    }), 202, {"Location": status_url}
 
-    return render_template("home.html", jobs=jobs)
+@web.route('/scrapes/<scrape_id>', methods=['GET'])
+def scrape_status(scrape_id):
+    """Status and results of a scrape; ?since=N returns only the jobs after the first N."""
+    scrape = scrape_jobs.get(scrape_id)
+    if not scrape:
+        return jsonify({"error": "Unknown or expired scrape"}), 404
+    return jsonify(scrape.to_dict(since=request.args.get("since", 0, type=int))), 200
+
+@web.route('/scrapes/<scrape_id>/events', methods=['GET'])
+def scrape_events(scrape_id):
+    """Server-Sent Events: one `job` event per parsed job, `status` changes, then `end`."""
+    scrape = scrape_jobs.get(scrape_id)
+    if not scrape:
+        return jsonify({"error": "Unknown or expired scrape"}), 404
+    return Response(stream_events(scrape, request.headers.get("Last-Event-ID")), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @web.route('/trigger_scraper', methods=['POST'])
 def trigger_scraper():
@@ -37,20 +88,78 @@ def trigger_scraper():
     if not job_id or not job_url:
         return jsonify({"error": "Missing job_id or job_url"}), 400
 
-    driver = None
+    # Shares the cache, in-flight scrapes and pooled browsers with /trigger_scraper/batch
+    [(_, source, future)] = job_triggers.trigger([{"job_id": str(job_id), "job_url": job_url}])
     try:
-        driver = get_driver()
-        job_data = parse_job_details(driver, job_url)
-        
-        if not job_data:
-            return jsonify({"error": "Failed to parse job details"}), 500
+        job_data = future.result(timeout=TRIGGER_WAIT_SECONDS)
+    except FutureTimeoutError:
+        return jsonify({"message": f"Job {job_id} is still being scraped."}), 202
+
+    if not job_data:
+        return jsonify({"error": "Failed to parse job details"}), 500
+    return jsonify({"message": f"Job {job_id} successfully scraped and produced.", "source": source}), 200
+
+@web.route('/trigger_scraper/batch', methods=['POST'])
+def trigger_scraper_batch():
+    """
+    Scrape and produce a list of {job_id, job_url} (or {"jobs": [...]}) in the background.
+    Returns 202 with a batch_id; GET /trigger_scraper/batch/<batch_id> reports per-job status.
+    """
+    data = request.get_json(silent=True)
+    jobs = data.get("jobs") if isinstance(data, dict) else data
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({"error": "Expected a non-empty list of {job_id, job_url}"}), 400
+    if len(jobs) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} jobs per batch"}), 413
 
-        produce_transaction(job_data)  # Produce to Kafka
-        return jsonify({"message": f"Job {job_id} successfully scraped and produced."}), 200
+    valid, invalid = [], []
+    for job_info in jobs:
+        if isinstance(job_info, dict) and job_info.get("job_id") and job_info.get("job_url"):
+            valid.append({"job_id": str(job_info["job_id"]), "job_url": job_info["job_url"]})
+        else:
+            invalid.append(job_info)
+    if not valid:
+        return jsonify({"error": "No entries with both job_id and job_url", "invalid": invalid}), 400
 
+    batch = job_triggers.submit_batch(valid)
+    status_url = url_for("web.trigger_batch_status", batch_id=batch.id)
+    sources = [source for _, source, _ in batch.entries]
+    return jsonify({
+        "batch_id": batch.id,
+        "status_url": status_url,
+        "accepted": len(valid),
+        "queued": sources.count("queued"),
+        "coalesced": sources.count("coalesced"),
+        "cached": sources.count("cached"),
+        "invalid": invalid,
+    }), 202, {"Location": status_url}
+
+@web.route('/trigger_scraper/batch/<batch_id>', methods=['GET'])
+def trigger_batch_status(batch_id):
+    batch = job_triggers.get_batch(batch_id)
+    if not batch:
+        return jsonify({"error": "Unknown or expired batch"}), 404
+    return jsonify(batch.to_dict()), 200
+
+@web.route('/search', methods=['GET'])
+def search():
+    """
+    Filtered job search over the linkedin-jobs alias, e.g.
+    /search?q=spark&company=Shopify,Stripe&seniority=Mid-Senior%20level&posted_after=now-7d&aggs=1
+    Pass the response's `next` value back as ?search_after=... for the next page.
+    """
+    store = peek_es_store()
+    if store is None:
+        init_es_store_in_background()  # Normally already started by create_app
+        return jsonify({"error": "Search is not ready yet, Elasticsearch is still connecting"}), 503, {"Retry-After": "10"}
+    try:
+        return jsonify(search_jobs(store.client, store.index_name, request.args)), 200
+    except SearchParamError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-    finally:
-        if driver:
-            driver.quit()
\ No newline at end of file
+@web.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint: this process's scraper metrics plus Redis queue/dedup gauges."""
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
@@ -1,86 +1,283 @@
 # app/worker/scraper_worker.py
 
+import os
 import time
-import random
+import queue
+import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 
-from app.scraper.driver import get_driver
+from app.scraper.driver_pool import DriverPool, driver_pool
 from app.scraper.job_parser import parse_job_details
+from app.scraper.http_fetcher import http_fetcher, latency_stats
+from app.scraper.utils import LINKEDIN_BASE_URL
 from app.scraper.redis_store import redis_store
-from kafka_utils.producer import produce_transaction
+from app.scraper.rate_limiter import rate_limiter, looks_like_challenge
+from app.tracing import span, init_tracing
+from app.metrics import PAGE_NAVIGATION_SECONDS, WAIT_FOR_ELEMENT_SECONDS, JOBS, WORKER_METRICS_PORT, start_metrics_server
+from kafka_utils.producer import produce_transaction, job_producer
 
 BATCH_SIZE = 30
-BASE_SEARCH_URL = "https://www.linkedin.com/jobs/search?trk=content-hub-home-page_guest_nav_menu_jobs&currentJobId={}"
+BASE_SEARCH_URL = LINKEDIN_BASE_URL + "/jobs/search?trk=content-hub-home-page_guest_nav_menu_jobs&currentJobId={}"
 NEW_JOBS_TOPIC = "new_job_records"
 MAX_RETRIES = 3
+BLOCK_TIMEOUT = 5  # seconds a reserve blocks on an empty queue before the loop comes around again
+REAP_INTERVAL = 60
+WORKER_ID = os.environ.get("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+_last_reap = 0.0
+
+
+class BatchDeliveries:
+    """
+    Jobs of one batch whose records were handed to the producer. They are only acked and marked
+    scraped once the brokers confirmed the record (settle(), after the batch's flush); a failed
+    delivery is nacked. A record still undelivered at settle() keeps its lease, so the reaper
+    brings the job back if it never arrives. heartbeat() only extends the leases of this batch.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.delivered = []
+        self.failed = []
+        self._lock = threading.Lock()
+
+    def track(self, job_info):
+        def on_delivery(err, msg):
+            with self._lock:
+                (self.delivered if err is None else self.failed).append(job_info)
+        return on_delivery
+
+    def heartbeat(self):
+        redis_store.extend_pending_new_leases(WORKER_ID, self.jobs)
+
+    def settle(self):
+        with self._lock:
+            delivered, self.delivered = self.delivered, []
+            failed, self.failed = self.failed, []
+        redis_store.mark_jobs_as_scraped([job_info['job_id'] for job_info in delivered])  # Scraped + global "seen" set
+        redis_store.ack_pending_new_jobs(WORKER_ID, delivered)
+        for job_info in failed:
+            print(f"[Worker] Kafka delivery failed for {job_info['job_id']}, returning it to the queue.")
+            redis_store.nack_pending_new_job(WORKER_ID, job_info)
+        return len(delivered), len(failed)
+
+
+def reap_expired_jobs():
+    """Every REAP_INTERVAL, put back jobs whose lease expired in a crashed or stuck worker."""
+    global _last_reap
+    if time.time() - _last_reap < REAP_INTERVAL:
+        return
+    _last_reap = time.time()
+    requeued, failed = redis_store.reap_pending_new_jobs()
+    if requeued or failed:
+        print(f"[Worker] Reaper re-queued {requeued} expired jobs, moved {failed} to failed_jobs.")
 
-def scrape_jobs_from_pending_queue(batch_size=BATCH_SIZE):
-    driver = get_driver()
-    wait = WebDriverWait(driver, 10)
 
-    print(f"[Worker] Fetching up to {batch_size} fresh pending jobs from Redis...")
+def scrape_jobs_from_pending_queue(batch_size=BATCH_SIZE, pool=driver_pool, concurrency=1, fetcher="selenium"):
+    reap_expired_jobs()
 
-    pending_jobs = redis_store.fetch_pending_new_jobs(batch_size)
+    # Blocks for up to BLOCK_TIMEOUT and returns as soon as the monitor queues something
+    pending_jobs = redis_store.reserve_pending_new_jobs(WORKER_ID, batch_size, block_timeout=BLOCK_TIMEOUT)
 
     if not pending_jobs:
-        print("[Worker] No pending new jobs found. Sleeping...")
-        driver.quit()
-        time.sleep(60)
         return
 
     print(f"[Worker] Found {len(pending_jobs)} new jobs to scrape.")
+    total_jobs = len(pending_jobs)
+    deliveries = BatchDeliveries(pending_jobs)
+    with span("worker.batch", jobs=total_jobs, fetcher=fetcher, concurrency=concurrency):
+        with span("filter_pending_jobs"):
+            pending_jobs = filter_pending_jobs(pending_jobs)
+
+        if fetcher in ("http", "http_only") and pending_jobs:
+            with span("http_fetch", jobs=len(pending_jobs)):
+                pending_jobs = scrape_with_http(pending_jobs, deliveries)
+            if pending_jobs and fetcher == "http_only":
+                print(f"[Worker] {len(pending_jobs)} jobs need a browser, returning them to the queue.")
+                for job_info in pending_jobs:
+                    redis_store.release_pending_new_job(WORKER_ID, job_info)
+                pending_jobs = []
+            elif pending_jobs:
+                print(f"[Worker] Falling back to Selenium for {len(pending_jobs)} jobs.")
+
+        if pending_jobs:
+            scrape_with_browsers(pending_jobs, pool, concurrency, deliveries)
+
+        # Records are produced asynchronously; only jobs whose record reached the brokers are acked
+        with span("kafka.flush"):
+            job_producer.flush()
+        with span("redis.ack"):
+            delivered, failed = deliveries.settle()
+        if failed:
+            print(f"[Worker] {failed} of {delivered + failed} records failed delivery and were re-queued.")
+    latency_stats.report()
+    print(f"[Worker] Finished scraping batch of {total_jobs} jobs.\n")
+
+
+def scrape_with_browsers(pending_jobs, pool, concurrency, deliveries):
+    if concurrency <= 1:
+        with pool.session() as driver:
+            scrape_batch(driver, pending_jobs, deliveries)
+    else:
+        # Every browser drains the same in-memory batch, so a slow job only holds up its own browser
+        job_queue = queue.Queue()
+        for job_info in pending_jobs:
+            job_queue.put(job_info)
+
+        n_browsers = min(concurrency, len(pending_jobs))
+        with ThreadPoolExecutor(max_workers=n_browsers, thread_name_prefix="scraper") as executor:
+            futures = [executor.submit(drain_job_queue, pool, job_queue, deliveries) for _ in range(n_browsers)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"[Worker] Browser thread failed: {e}")
 
-    for job_info in pending_jobs:
-        job_id = job_info.get('job_id')
-        job_url = job_info.get('job_url')
 
-        if not job_id or not job_url:
-            print("[Worker] Skipping invalid job entry (missing job_id or job_url)")
+def filter_pending_jobs(pending_jobs):
+    """Drop malformed entries and jobs that were already scraped (one SMISMEMBER for the batch)."""
+    valid = []
+    for job_info in pending_jobs:
+        if not job_info.get('job_id') or not job_info.get('job_url'):
+            print("[Worker] Invalid job entry (missing job_id or job_url), moving to failed_jobs")
+            redis_store.nack_pending_new_job(WORKER_ID, job_info, permanent=True)
             continue
+        valid.append(job_info)
 
-        # Skip if already scraped
-        if redis_store.is_job_id_scraped(job_id):
-            print(f"[Worker] Already scraped {job_id}. Skipping...")
+    scraped_flags = redis_store.are_job_ids_scraped([job_info['job_id'] for job_info in valid])
+    remaining, already_done = [], []
+    for job_info, already_scraped in zip(valid, scraped_flags):
+        if already_scraped:
+            print(f"[Worker] Already scraped {job_info['job_id']}. Skipping...")
+            already_done.append(job_info)
             continue
+        remaining.append(job_info)
+    redis_store.ack_pending_new_jobs(WORKER_ID, already_done)
+    return remaining
+
+
+def scrape_with_http(pending_jobs, deliveries):
+    """Scrape what we can over plain HTTP and return the jobs that still need a browser."""
+    scraped, needs_fallback = http_fetcher.scrape_jobs(pending_jobs)
+    JOBS.labels(component="worker", outcome="scraped").inc(len(scraped))
+    JOBS.labels(component="worker", outcome="fallback").inc(len(needs_fallback))
+    jobs_by_id = {job_info['job_id']: job_info for job_info in pending_jobs}
+    for job_data in scraped:
+        print(f"[Worker] Scraped over HTTP: {job_data['job_title']} at {job_data['company_name']}")
+        job_info = jobs_by_id[job_data['job_id']]
+        try:
+            produce_transaction(job_data, topic_name=NEW_JOBS_TOPIC, on_delivery=deliveries.track(job_info))
+        except Exception as e:
+            print(f"[Worker] Could not produce {job_info['job_id']}: {e}, returning it to the queue.")
+            redis_store.nack_pending_new_job(WORKER_ID, job_info)
+    return needs_fallback
+
+
+def drain_job_queue(pool, job_queue, deliveries):
+    with pool.session() as driver:
+        wait = WebDriverWait(driver, 10)
+        while True:
+            try:
+                job_info = job_queue.get_nowait()
+            except queue.Empty:
+                return
+            scrape_job(driver, wait, job_info, deliveries)
+
+
+def scrape_batch(driver, pending_jobs, deliveries):
+    wait = WebDriverWait(driver, 10)
 
-        attempt = 0
-        success = False
+    for job_info in pending_jobs:
+        scrape_job(driver, wait, job_info, deliveries)
+
+
+def scrape_job(driver, wait, job_info, deliveries):
+    job_id = job_info['job_id']
+    # Heartbeat so a long batch doesn't look like a dead worker to the reaper
+    deliveries.heartbeat()
 
+    attempt = 0
+    success = False
+
+    with span("worker.job", job_id=job_id) as job_span:
         while attempt < MAX_RETRIES:
             try:
                 search_url = BASE_SEARCH_URL.format(job_id)
                 print(f"[Worker] Navigating to {search_url} (Attempt {attempt + 1})")
 
-                driver.get(search_url)
-                wait.until(EC.presence_of_element_located((By.XPATH, "//h2")))
-                time.sleep(random.uniform(2, 4))
+                # Shared pacing across every worker and the monitor; retries wait their turn the same way
+                with span("rate_limit.acquire"):
+                    rate_limiter.acquire(search_url)
+                started = time.perf_counter()
+                with span("driver.get", attempt=attempt + 1):
+                    driver.get(search_url)
+                navigated = time.perf_counter()
+                PAGE_NAVIGATION_SECONDS.labels(page="job", fetcher="selenium").observe(navigated - started)
+                with span("wait.h2"), WAIT_FOR_ELEMENT_SECONDS.labels(element="job_title").time():
+                    wait.until(EC.presence_of_element_located((By.XPATH, "//h2")))
+                latency_stats.record("selenium", "fetch", time.perf_counter() - started)
 
-                job_data = parse_job_details(driver, search_url, known_job_id=job_id)
+                started = time.perf_counter()
+                with span("parse_job_details"):
+                    job_data = parse_job_details(driver, search_url, known_job_id=job_id)
+                latency_stats.record("selenium", "parse", time.perf_counter() - started)
 
                 if job_data:
+                    rate_limiter.success(search_url)
                     print(f"[Worker] Successfully scraped: {job_data['job_title']} at {job_data['company_name']}")
-                    produce_transaction(job_data, topic_name=NEW_JOBS_TOPIC)
-                    redis_store.mark_job_as_scraped(job_id)
-                    redis_store.add_job_id(job_id)  # Global "seen" set
+                    with span("produce"):
+                        # Acked once the brokers confirm it (BatchDeliveries.settle)
+                        produce_transaction(job_data, topic_name=NEW_JOBS_TOPIC, on_delivery=deliveries.track(job_info))
+                    JOBS.labels(component="worker", outcome="scraped").inc()
                     success = True
                     break  # Exit retry loop..
                 else:
-                    print(f"[Worker] Failed to parse job details for {job_id}, retrying...")
+                    reason = "challenge" if looks_like_challenge(driver.current_url) else "missing_fields"
+                    rate_limiter.throttled(search_url, reason)
+                    print(f"[Worker] Failed to parse job details for {job_id} ({reason}), retrying...")
 
+            except TimeoutException:
+                rate_limiter.throttled(search_url, "timeout")
+                print(f"[Worker] Timed out loading job {job_id}. Retrying...")
             except Exception as e:
                 print(f"[Worker] Error scraping job {job_id}: {e}. Retrying...")
 
             attempt += 1
-            time.sleep(random.uniform(2, 5))  # Small backoff before retrying
-
-        if not success:
-            print(f"[Worker] Failed to scrape job {job_id} after {MAX_RETRIES} attempts. Moving on.")
+        job_span.set(attempts=min(attempt + 1, MAX_RETRIES), success=success)
 
-    driver.quit()
-    print(f"[Worker] Finished scraping batch of {len(pending_jobs)} jobs.\n")
+    if not success:
+        JOBS.labels(component="worker", outcome="failed").inc()
+        moved_to_failed = redis_store.nack_pending_new_job(WORKER_ID, job_info)
+        destination = "failed_jobs" if moved_to_failed else "the back of the queue"
+        print(f"[Worker] Failed to scrape job {job_id} after {MAX_RETRIES} attempts. Moved to {destination}.")
 
 if __name__ == "__main__":
-    while True:
-        scrape_jobs_from_pending_queue()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of headless browsers scraping in parallel")
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--fetcher", choices=["selenium", "http", "http_only"], default="selenium",
+                        help="'http' fetches postings without a browser and only falls back to Selenium when fields are missing; "
+                             "'http_only' never starts a browser and puts those jobs back on the queue for a browser worker, "
+                             "without counting it as a failed attempt")
+    parser.add_argument("--metrics_port", type=int, default=WORKER_METRICS_PORT, help="Prometheus exporter port (0 to disable)")
+    args = parser.parse_args()
+
+    init_tracing("scraper-worker")
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    pool = driver_pool if args.concurrency <= driver_pool.size else DriverPool(size=args.concurrency)
+    print(f"[Worker] {WORKER_ID} starting with concurrency={args.concurrency}, batch_size={args.batch_size}, fetcher={args.fetcher}")
+
+    try:
+        while True:
+            scrape_jobs_from_pending_queue(args.batch_size, pool=pool, concurrency=args.concurrency, fetcher=args.fetcher)
+    finally:
+        pool.close_all()
+
@@ -0,0 +1,100 @@
+# benchmarks/card_extraction_bench.py
+#
+# Cost of turning a loaded result list into monitor candidates. The old loop made 3-4 WebDriver
+# round-trips per <li> (find base-card, data-entity-urn, find link, href, find posted time); now
+# it's one execute_script for the whole list (or one page_source parse) and pure-Python filtering.
+#
+#   python -m benchmarks.card_extraction_bench --cards 1000              # needs Chrome + chromedriver
+#   python -m benchmarks.card_extraction_bench --cards 1000 --no_browser  # page_source parse only
+
+import os
+import time
+import argparse
+import tempfile
+
+from app.monitor.monitor_jobs import parse_posted_days, process_job_item
+from app.scraper.utils import parse_job_cards_html, normalize_job_card
+
+AGO = ["2 hours ago", "5 hours ago", "1 day ago", "3 days ago", "1 week ago", "2 weeks ago", "1 month ago"]
+
+
+def make_listing_html(n_cards):
+    items = []
+    for i in range(n_cards):
+        job_id = 4000000000 + i
+        items.append(f"""
+    <li><div class="base-card base-search-card job-search-card" data-entity-urn="urn:li:jobPosting:{job_id}">
+      <a class="base-card__full-link" href="https://www.linkedin.com/jobs/view/data-engineer-at-company-{i % 50}-{job_id}"><span class="sr-only">Data Engineer</span></a>
+      <div class="base-search-card__info">
+        <h3 class="base-search-card__title">Data Engineer {i}</h3>
+        <h4 class="base-search-card__subtitle"><a class="hidden-nested-link">Company {i % 50}</a></h4>
+        <div class="base-search-card__metadata">
+          <span class="job-search-card__location">Toronto, ON</span>
+          <time class="job-search-card__listdate" datetime="2025-06-20">{AGO[i % len(AGO)]}</time>
+        </div>
+      </div>
+    </div></li>""")
+    return f"<html><body><ul class=\"jobs-search__results-list\">{''.join(items)}</ul></body></html>"
+
+
+def legacy_candidates(driver, max_posted_days):
+    """The old per-element loop from monitor_jobs.process_job_item."""
+    from selenium.webdriver.common.by import By
+    container = driver.find_element(By.XPATH, "//ul[contains(@class, 'jobs-search__results-list') or @role='list']")
+    candidates = []
+    for job_item in container.find_elements(By.TAG_NAME, "li"):
+        job_div = job_item.find_element(By.CLASS_NAME, "base-card")
+        job_id = job_div.get_attribute("data-entity-urn").split("jobPosting:")[-1].strip()
+        job_url = job_div.find_element(By.XPATH, ".//a[contains(@href, '/jobs/view/')]").get_attribute("href")
+        posted_text = job_div.find_element(By.XPATH, ".//*[contains(@class, 'listdate') or contains(text(), 'ago')]").text.strip()
+        if max_posted_days is not None and parse_posted_days(posted_text) > max_posted_days:
+            continue
+        candidates.append({"job_id": job_id, "job_url": job_url})
+    return candidates
+
+
+def card_candidates(cards, max_posted_days):
+    return [result for result, skip_reason in (process_job_item(card, max_posted_days) for card in cards) if not skip_reason]
+
+
+def timed(name, fn, baseline=None):
+    started = time.perf_counter()
+    candidates = fn()
+    elapsed = time.perf_counter() - started
+    speedup = f"  {baseline / elapsed:6.1f}x" if baseline else ""
+    print(f"[Bench] {name:<28}: {elapsed * 1000:9.1f}ms  {len(candidates)} candidates{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--max_posted_days", type=float, default=7)
+    parser.add_argument("--no_browser", action="store_true")
+    args = parser.parse_args()
+
+    html = make_listing_html(args.cards)
+    timed("page_source parse + filter", lambda: card_candidates(
+        [normalize_job_card(card) for card in parse_job_cards_html(html)], args.max_posted_days))
+    if args.no_browser:
+        return
+
+    from app.scraper.driver import get_driver
+    from app.scraper.utils import extract_job_cards
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False, encoding="utf-8") as f:
+        f.write(html)
+    driver = get_driver()
+    try:
+        driver.get(f"file://{f.name}")
+        baseline = timed("per-element WebDriver loop", lambda: legacy_candidates(driver, args.max_posted_days))
+        timed("one execute_script + filter", lambda: card_candidates(extract_job_cards(driver), args.max_posted_days), baseline)
+        timed("driver.page_source + parse", lambda: card_candidates(
+            [normalize_job_card(card) for card in parse_job_cards_html(driver.page_source)], args.max_posted_days), baseline)
+    finally:
+        driver.quit()
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/dedup_bench.py
+#
+# Memory and lookup throughput of the dedup backends. With a real Redis the memory
+# column comes from MEMORY USAGE; on fakeredis it is estimated (set: 70 bytes/member,
+# bitmaps: their string length). fakeredis is slow at SETBIT/GETBIT, so throughput numbers
+# only mean something against a real server. The target DB is flushed!
+# Without --url it needs fakeredis (pip install -r requirements-bench.txt).
+#
+#   python -m benchmarks.dedup_bench --ids 20000
+#   python -m benchmarks.dedup_bench --ids 10000000 --url redis://localhost:6380/15
+
+import time
+import random
+import argparse
+import redis
+
+from app.scraper.dedup import SetDedupIndex, BitmapDedupIndex, BloomDedupIndex, CachedDedupIndex
+
+SET_BYTES_PER_MEMBER_ESTIMATE = 70
+
+
+def make_client(url):
+    if url:
+        return redis.Redis.from_url(url, decode_responses=True)
+    import fakeredis
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def generate_ids(n, id_range, seed=7):
+    # Job IDs are ~4.0e9-4.3e9 and the ones we see cluster in a recent window of that range
+    rng = random.Random(seed)
+    base = 4000000000
+    return [str(base + x) for x in rng.sample(range(id_range), n)]
+
+
+def memory_bytes(client, keys, estimate):
+    try:
+        return sum(client.memory_usage(key, samples=0) or 0 for key in keys)
+    except redis.ResponseError:
+        return estimate
+    except Exception:
+        return estimate
+
+
+def keys_for(client, index):
+    if isinstance(index, BitmapDedupIndex):
+        return index.chunk_keys()
+    return [index.key]
+
+
+def estimate_for(client, index, n):
+    if isinstance(index, SetDedupIndex):
+        return n * SET_BYTES_PER_MEMBER_ESTIMATE
+    return sum(client.strlen(key) for key in keys_for(client, index))
+
+
+def bench(client, name, index, ids, probes, batch_size):
+    client.flushdb()
+    started = time.perf_counter()
+    for i in range(0, len(ids), batch_size):
+        index.add(ids[i:i + batch_size])
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hits = 0
+    for i in range(0, len(probes), batch_size):
+        hits += sum(index.contains(probes[i:i + batch_size]))
+    lookup_s = time.perf_counter() - started
+
+    inner = index.index if isinstance(index, CachedDedupIndex) else index
+    mem = memory_bytes(client, keys_for(client, inner), estimate_for(client, inner, len(ids)))
+    print(f"[Bench] {name:<16} mem={mem / 1024:10.0f}KB ({mem * 8 / len(ids):6.1f} bits/id)  "
+          f"load={len(ids) / load_s:10.0f} ids/s  lookup={len(probes) / lookup_s:10.0f} ids/s  hits={hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ids", type=int, default=20000)
+    parser.add_argument("--id_range", type=int, default=300000000)
+    parser.add_argument("--probes", type=int, default=4000)
+    parser.add_argument("--batch_size", type=int, default=1000)
+    parser.add_argument("--error_rate", type=float, default=0.001)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--backends", nargs="+", default=["set", "bitmap", "bloom"])
+    args = parser.parse_args()
+
+    client = make_client(args.url)
+    ids = generate_ids(args.ids, args.id_range)
+    # Half present, half absent: roughly what a monitor page looks like
+    absent = generate_ids(args.probes // 2, args.id_range, seed=11)
+    probes = random.Random(3).sample(ids, args.probes // 2) + absent
+
+    indexes = {
+        "set": SetDedupIndex(client, "bench_ids"),
+        "bitmap": BitmapDedupIndex(client, "bench_ids"),
+        "bloom": BloomDedupIndex(client, "bench_ids", capacity=args.ids, error_rate=args.error_rate),
+    }
+    for name in args.backends:
+        bench(client, name, indexes[name], ids, probes, args.batch_size)
+    bench(client, "bitmap+cache", CachedDedupIndex(BitmapDedupIndex(client, "bench_ids")), ids, probes + probes, args.batch_size)
+    client.flushdb()
+
+
+if __name__ == "__main__":
+    main()
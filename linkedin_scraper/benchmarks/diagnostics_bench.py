@@ -0,0 +1,84 @@
+# benchmarks/diagnostics_bench.py
+#
+# A failure storm (a layout change: every job misses the same fields) as seen by the scraping
+# thread: the old inline path (makedirs + open/append per missing field, a full page_source
+# written per failed job) against DiagnosticsWriter, where the caller only queues records.
+# Also reports what ended up on disk for each.
+#
+#   python -m benchmarks.diagnostics_bench --jobs 2000
+
+import os
+import time
+import argparse
+import tempfile
+
+from app.scraper.diagnostics import DiagnosticsWriter
+from benchmarks.local_server import load_fixture
+
+MISSING = ["company_name", "location", "posted_time", "applicants", "description", "Seniority level",
+           "Employment type", "Job function", "Industries"]
+REQUIRED_MISSING = ["company_name", "description"]
+
+
+def inline(root, pages):
+    log_path = os.path.join(root, "logs", "missing_fields.log")
+    for job_id, job_url, html in pages:
+        for field_name in MISSING:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, "a", encoding="utf-8") as log_file:
+                log_file.write(f"[MISSING] {field_name} not found at {job_url}\n")
+        os.makedirs(os.path.join(root, "logs", "failures"), exist_ok=True)
+        with open(os.path.join(root, "logs", "failures", f"job_{job_id}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def buffered(writer, pages):
+    for job_id, job_url, html in pages:
+        for field_name in MISSING:
+            writer.missing_field(job_url, field_name)
+        writer.failure_snapshot(job_id, job_url, html, REQUIRED_MISSING)
+
+
+def disk_usage(root):
+    files, size = 0, 0
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return files, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    args = parser.parse_args()
+
+    template = load_fixture("job_posting.html")
+    pages = [(str(4200000000 + i), f"https://www.linkedin.com/jobs/view/{4200000000 + i}", template.replace("{job_id}", str(4200000000 + i)))
+             for i in range(args.jobs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "inline")
+        started = time.perf_counter()
+        inline(root, pages)
+        elapsed = time.perf_counter() - started
+        files, size = disk_usage(root)
+        print(f"[Bench] inline writes   : {elapsed / args.jobs * 1e6:8.1f}us per failed job on the caller, "
+              f"{files} files, {size / 1024:.0f}KB")
+
+        root = os.path.join(tmp, "buffered")
+        writer = DiagnosticsWriter(log_path=os.path.join(root, "logs", "missing_fields.log"),
+                                   snapshot_dir=os.path.join(root, "logs", "failures"), queue_max=args.jobs * (len(MISSING) + 1))
+        started = time.perf_counter()
+        buffered(writer, pages)
+        elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        writer.flush()
+        flushed = time.perf_counter() - started
+        files, size = disk_usage(root)
+        print(f"[Bench] buffered writer : {elapsed / args.jobs * 1e6:8.1f}us per failed job on the caller, "
+              f"{files} files, {size / 1024:.0f}KB (background flush {flushed * 1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/driver_pool_bench.py
+#
+# Jobs/minute for the worker's browser loop with and without the driver pool.
+# Needs Chrome + chromedriver (run it inside the scraper container):
+#
+#   python -m benchmarks.driver_pool_bench --jobs 60 --batch_size 5
+
+import time
+import argparse
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from app.scraper.driver import get_driver
+from app.scraper.driver_pool import DriverPool
+from app.scraper.job_parser import parse_job_details
+from benchmarks.local_server import start_server
+
+
+def scrape_one(driver, base_url, job_id):
+    url = f"{base_url}/jobs/view/data-engineer-{job_id}"
+    driver.get(url)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//h2")))
+    return parse_job_details(driver, url, known_job_id=job_id)
+
+
+def job_ids(n):
+    return [str(4000000000 + i) for i in range(n)]
+
+
+def run_without_pool(base_url, jobs, batch_size):
+    ids = job_ids(jobs)
+    for start in range(0, jobs, batch_size):
+        driver = get_driver()
+        try:
+            for job_id in ids[start:start + batch_size]:
+                scrape_one(driver, base_url, job_id)
+        finally:
+            driver.quit()
+
+
+def run_with_pool(base_url, jobs, batch_size):
+    pool = DriverPool(size=1)
+    ids = job_ids(jobs)
+    try:
+        for start in range(0, jobs, batch_size):
+            with pool.session() as driver:
+                for job_id in ids[start:start + batch_size]:
+                    scrape_one(driver, base_url, job_id)
+    finally:
+        pool.close_all()
+    return pool.stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=60)
+    parser.add_argument("--batch_size", type=int, default=5)
+    args = parser.parse_args()
+
+    server, base_url = start_server()
+    try:
+        results = {}
+        for name, runner in [("fresh driver per batch", run_without_pool), ("pooled driver", run_with_pool)]:
+            started = time.perf_counter()
+            extra = runner(base_url, args.jobs, args.batch_size)
+            elapsed = time.perf_counter() - started
+            results[name] = args.jobs / elapsed * 60
+            print(f"[Bench] {name:<24}: {elapsed:7.2f}s  {results[name]:8.1f} jobs/min" + (f"  {extra}" if extra else ""))
+
+        baseline = results["fresh driver per batch"]
+        print(f"[Bench] Speedup: {results['pooled driver'] / baseline:.2f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# benchmarks/e2e_bench.py
+#
+# Offline end-to-end run of the scrape pipeline: monitor -> Redis queue -> worker -> Kafka,
+# plus the job page parser on its own. LinkedIn is benchmarks/local_server.py (recorded search
+# and job pages, --latency/--jitter, --failure_rate of 429/500/challenge/missing-field pages),
+# Redis is fakeredis and Kafka is the in-process stand-in, so nothing leaves the machine.
+#
+# By default no browser is needed: the monitor stage pages through the guest listing API over
+# HTTP and then runs the monitor's own filtering, enqueue and watermark code, and the worker
+# runs with --fetcher http_only. --browser runs monitor_linkedin_jobs and the Selenium worker
+# instead (needs Chrome + chromedriver; browser processes aren't counted in CPU/RSS).
+#
+# Per component: jobs/minute, p50/p99 latency per job (per query for the monitor, per page for
+# the parser), CPU seconds and peak RSS of this process while it ran. Every run is appended to
+# benchmarks/results/e2e.jsonl with the git commit, and compared with the last run that used
+# the same settings; --check exits non-zero if a component got more than --tolerance worse.
+# Needs fakeredis with Lua support: pip install -r requirements-bench.txt
+#
+#   python -m benchmarks.e2e_bench --queries 4 --jobs_per_query 200 --latency 0.05 --failure_rate 0.05
+#   python -m benchmarks.e2e_bench --check                 # in CI / before merging
+#   python -m benchmarks.e2e_bench --history               # results so far, oldest first
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import datetime
+import threading
+import subprocess
+import contextlib
+from collections import Counter
+
+from benchmarks.local_server import start_server, load_fixture, LISTING_PATH, LISTING_PAGE_SIZE
+from benchmarks.kafka_stand_in import InProcessKafka
+
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results", "e2e.jsonl")
+TITLES = ["Data Engineer", "Machine Learning Engineer", "Analytics Engineer", "Backend Developer",
+          "Platform Engineer", "Data Scientist", "Site Reliability Engineer", "Software Engineer"]
+LOCATIONS = ["Canada", "Toronto", "Vancouver", "Montreal"]
+CONFIG_KEYS = ["browser", "queries", "jobs_per_query", "latency", "jitter", "failure_rate", "batch_size",
+               "concurrency", "parse_pages", "rate_limit", "ack_ms"]
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # Peak so far rather than current, but still an upper bound (kilobytes on Linux, bytes on macOS)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2 ** 20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class ResourceMeter:
+    """Wall time, CPU time (all threads) and peak RSS of this process over a with-block."""
+
+    def __enter__(self):
+        self.peak_rss_mb = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        self._cpu = cpu_seconds()
+        self._wall = time.perf_counter()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb())
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self._wall
+        self.cpu = cpu_seconds() - self._cpu
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb())
+        return False
+
+
+class SpanCollector:
+    """Exporter for app.tracing that keeps finished spans in memory."""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def submit(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def durations(self, name):
+        with self._lock:
+            return [record["duration_ms"] for record in self.records if record["name"] == name]
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def component_result(meter, jobs, latencies_ms, **extra):
+    return dict({
+        "jobs": jobs,
+        "wall_s": round(meter.wall, 3),
+        "jobs_per_min": round(jobs / meter.wall * 60, 1) if meter.wall else 0,
+        "p50_ms": round(percentile(latencies_ms, 0.5), 2) if latencies_ms else None,
+        "p99_ms": round(percentile(latencies_ms, 0.99), 2) if latencies_ms else None,
+        "cpu_s": round(meter.cpu, 3),
+        "cpu_pct": round(meter.cpu / meter.wall * 100, 1) if meter.wall else 0,
+        "peak_rss_mb": round(meter.peak_rss_mb, 1),
+    }, **extra)
+
+
+def configure_environment(base_url, args):
+    """Everything the app reads at import time; must run before the first app import."""
+    os.environ["LINKEDIN_BASE_URL"] = base_url
+    if not args.rate_limit:
+        # Measure pipeline capacity, not the politeness budget
+        for name in ("RATE_LIMIT_DEFAULT_RPS", "RATE_LIMIT_MAX_RPS", "RATE_LIMIT_BURST"):
+            os.environ[name] = "100000"
+
+
+def make_queries(n):
+    return [{"title": TITLES[i % len(TITLES)], "location": LOCATIONS[(i // len(TITLES)) % len(LOCATIONS)]}
+            for i in range(n)]
+
+
+def monitor_over_http(session, base_url, query, max_posted_days=None):
+    """
+    The monitor without the browser: page through the guest listing API, then the same card
+    filtering, enqueue and watermark steps monitor_linkedin_jobs runs on the loaded list.
+    """
+    from app.monitor.monitor_jobs import process_job_item, STOP_AFTER_SEEN
+    from app.monitor.watermarks import QueryWatermark
+    from app.scraper.rate_limiter import rate_limiter
+    from app.scraper.redis_store import redis_store
+    from app.scraper.utils import parse_job_cards_html, normalize_job_card
+    from app.tracing import span
+
+    watermark = QueryWatermark(query["title"], query["location"], "past_week")
+    should_stop = watermark.stop_after_seen(STOP_AFTER_SEEN) if watermark.exists() else None
+    with span("monitor.run", **query):
+        cards, start = [], 0
+        while True:
+            url = f"{base_url}{LISTING_PATH}?keywords={query['title']}&location={query['location']}&start={start}"
+            rate_limiter.acquire(url)
+            with span("listing.get"):
+                response = session.get(url, timeout=10)
+            page = [normalize_job_card(card) for card in parse_job_cards_html(response.text)] if response.text.strip() else []
+            if not page:
+                break
+            cards.extend(page)
+            start += LISTING_PAGE_SIZE
+            if should_stop and should_stop(cards):
+                break
+
+        candidates = [result for result, skip_reason in (process_job_item(card, max_posted_days) for card in cards) if not skip_reason]
+        with span("redis.enqueue", candidates=len(candidates)):
+            statuses = redis_store.enqueue_job_page(candidates)
+        queued_new = statuses.count("queued_new")
+        watermark.advance(cards, new_count=queued_new)
+    return queued_new
+
+
+def run_monitor(args, base_url, collector):
+    from app.scraper.redis_store import redis_store, PENDING_NEW_JOBS_KEY
+
+    queries = make_queries(args.queries)
+    latencies = []
+    with ResourceMeter() as meter:
+        if args.browser:
+            from app.monitor.monitor_jobs import monitor_linkedin_jobs
+            from app.scraper.driver_pool import driver_pool
+            for query in queries:
+                started = time.perf_counter()
+                monitor_linkedin_jobs(title=query["title"], location=query["location"], pool=driver_pool)
+                latencies.append((time.perf_counter() - started) * 1000)
+        else:
+            import requests
+            session = requests.Session()
+            for query in queries:
+                started = time.perf_counter()
+                monitor_over_http(session, base_url, query)
+                latencies.append((time.perf_counter() - started) * 1000)
+    queued = redis_store.client.llen(PENDING_NEW_JOBS_KEY)
+    return component_result(meter, queued, latencies, queries=len(queries))
+
+
+def run_worker(args, kafka, collector):
+    from app.scraper.redis_store import redis_store, PENDING_NEW_JOBS_KEY, FAILED_JOBS_KEY
+    from app.scraper.driver_pool import DriverPool
+    from app.worker.scraper_worker import scrape_jobs_from_pending_queue, NEW_JOBS_TOPIC
+
+    client = redis_store.client
+    fetcher = "selenium" if args.browser else "http_only"
+    pool = DriverPool(size=args.concurrency) if args.browser else None
+    deadline = time.monotonic() + args.timeout
+    collector.clear()
+    try:
+        with ResourceMeter() as meter:
+            while client.llen(PENDING_NEW_JOBS_KEY) or client.zcard(f"{PENDING_NEW_JOBS_KEY}:leases"):
+                if time.monotonic() > deadline:
+                    print(f"[Bench] Worker still had jobs queued after {args.timeout}s, stopping", file=sys.__stdout__)
+                    break
+                scrape_jobs_from_pending_queue(args.batch_size, pool=pool, concurrency=args.concurrency, fetcher=fetcher)
+    finally:
+        if pool:
+            pool.close_all()
+
+    delivered = {key for key, _ in kafka.delivered(NEW_JOBS_TOPIC)}
+    latencies = collector.durations("worker.job" if args.browser else "http.job")
+    return component_result(meter, len(delivered), latencies, attempts=len(latencies),
+                            failed_jobs=client.llen(FAILED_JOBS_KEY), kafka_failed=kafka.failed)
+
+
+def run_parser(args):
+    from app.scraper.job_parser import parse_job_html
+
+    template = load_fixture("job_posting.html")
+    pages = [template.replace("{job_id}", str(4100000000 + i)) for i in range(min(args.parse_pages, 50))]
+    latencies = []
+    with ResourceMeter() as meter:
+        for i in range(args.parse_pages):
+            started = time.perf_counter()
+            parse_job_html(pages[i % len(pages)])
+            latencies.append((time.perf_counter() - started) * 1000)
+    return component_result(meter, args.parse_pages, latencies)
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, timeout=30).stdout.strip())
+        return commit or None, dirty
+    except (OSError, subprocess.SubprocessError):
+        return None, False
+
+
+def load_results(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_result(result, path=RESULTS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+def compare(current, previous, tolerance):
+    """Per component: throughput drops or p99 rises beyond tolerance. Returns the regressions found."""
+    regressions = []
+    print(f"\n[Bench] Against {previous['commit']}{'+dirty' if previous.get('dirty') else ''} ({previous['timestamp']}):")
+    for name, now in current["components"].items():
+        before = previous["components"].get(name)
+        if not before:
+            continue
+        changes = []
+        for metric, worse_if_higher in [("jobs_per_min", False), ("p99_ms", True), ("cpu_s", True), ("peak_rss_mb", True)]:
+            if not before.get(metric) or now.get(metric) is None:
+                continue
+            change = (now[metric] - before[metric]) / before[metric]
+            worse = change > tolerance if worse_if_higher else change < -tolerance
+            changes.append(f"{metric} {change:+.1%}{' !' if worse else ''}")
+            if worse and metric in ("jobs_per_min", "p99_ms"):
+                regressions.append(f"{name} {metric} {before[metric]} -> {now[metric]}")
+        print(f"[Bench]   {name:<8} " + "  ".join(changes))
+    return regressions
+
+
+def print_results(components):
+    print(f"\n{'component':<10} {'jobs':>7} {'wall s':>8} {'jobs/min':>10} {'p50 ms':>9} {'p99 ms':>9} {'cpu s':>7} {'cpu %':>6} {'rss MB':>7}")
+    for name, r in components.items():
+        p50 = f"{r['p50_ms']:.1f}" if r["p50_ms"] is not None else "-"
+        p99 = f"{r['p99_ms']:.1f}" if r["p99_ms"] is not None else "-"
+        print(f"{name:<10} {r['jobs']:>7} {r['wall_s']:>8.2f} {r['jobs_per_min']:>10.1f} {p50:>9} {p99:>9} "
+              f"{r['cpu_s']:>7.2f} {r['cpu_pct']:>6.1f} {r['peak_rss_mb']:>7.1f}")
+
+
+def print_history(results):
+    print(f"{'commit':<16} {'when':<20} " + " ".join(f"{name + ' j/min':>16} {name + ' p99':>12}" for name in ("monitor", "worker", "parser")))
+    for result in results:
+        cells = []
+        for name in ("monitor", "worker", "parser"):
+            r = result["components"].get(name, {})
+            cells.append(f"{r.get('jobs_per_min', '-'):>16} {r.get('p99_ms', '-'):>12}")
+        commit = f"{result['commit']}{'+' if result.get('dirty') else ''}"
+        print(f"{commit:<16} {result['timestamp'][:19]:<20} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark: fake LinkedIn, fakeredis, in-process Kafka")
+    parser.add_argument("--queries", type=int, default=4)
+    parser.add_argument("--jobs_per_query", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every fake LinkedIn response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Up to this many extra seconds, uniformly random")
+    parser.add_argument("--failure_rate", type=float, default=0.05, help="Fraction of job pages that fail (429/500/challenge/missing fields)")
+    parser.add_argument("--batch_size", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=1, help="Browsers, with --browser")
+    parser.add_argument("--parse_pages", type=int, default=2000)
+    parser.add_argument("--ack_ms", type=float, default=5, help="Kafka stand-in ack delay")
+    parser.add_argument("--rate_limit", action="store_true", help="Keep the shared rate limiter at its real settings")
+    parser.add_argument("--browser", action="store_true", help="Real monitor and Selenium worker (needs Chrome)")
+    parser.add_argument("--timeout", type=float, default=600, help="Give up on the worker stage after this many seconds")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a component regressed against the last comparable run")
+    parser.add_argument("--no_save", action="store_true")
+    parser.add_argument("--history", action="store_true", help="Print stored results and exit")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    if args.history:
+        print_history(load_results())
+        return
+
+    stats = Counter()
+    server, base_url = start_server(latency=args.latency, latency_jitter=args.jitter, failure_rate=args.failure_rate,
+                                    listing_total=args.jobs_per_query, stats=stats)
+    configure_environment(base_url, args)
+
+    import fakeredis
+    from app.scraper.redis_store import redis_store
+    from app.tracing import tracer
+    from kafka_utils.producer import job_producer
+
+    # Point the process-wide store (and everything holding a reference to it) at fakeredis
+    redis_store.__init__(client=fakeredis.FakeRedis(decode_responses=True))
+    kafka = InProcessKafka(ack_ms=args.ack_ms)
+    job_producer.producer_factory = lambda: kafka
+    job_producer.topic_creator = lambda topic: True
+    collector = SpanCollector()
+    tracer.exporter, tracer.enabled = collector, True
+
+    print(f"[Bench] Fake LinkedIn at {base_url}: {args.queries} queries x {args.jobs_per_query} jobs, "
+          f"latency {args.latency}+{args.jitter}s, failure rate {args.failure_rate:.0%}, "
+          f"{'browser' if args.browser else 'no browser'}")
+    output = sys.stdout if args.verbose else open(os.devnull, "w")
+    components = {}
+    try:
+        with contextlib.redirect_stdout(output):
+            components["monitor"] = run_monitor(args, base_url, collector)
+            components["worker"] = run_worker(args, kafka, collector)
+            components["parser"] = run_parser(args)
+    finally:
+        server.shutdown()
+        if output is not sys.stdout:
+            output.close()
+
+    print_results(components)
+    worker = components["worker"]
+    print(f"\n[Bench] Worker: {worker['attempts']} job attempts, {worker['failed_jobs']} jobs in failed_jobs, "
+          f"{worker['kafka_failed']} Kafka delivery errors. Fake LinkedIn served: {dict(stats)}")
+
+    commit, dirty = git_revision()
+    result = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "config": {key: getattr(args, key) for key in CONFIG_KEYS},
+        "components": components,
+    }
+    previous = [r for r in load_results() if r["config"] == result["config"]]
+    regressions = compare(result, previous[-1], args.tolerance) if previous else []
+    if not args.no_save:
+        save_result(result)
+        print(f"[Bench] Saved to {RESULTS_FILE}")
+    if regressions:
+        print(f"[Bench] Regressions beyond {args.tolerance:.0%}: " + "; ".join(regressions))
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/es_bench.py
+#
+# Dedupe + write cost of a search page's worth of jobs: the old per-job GET and index calls
+# against ESStore.filter_unseen (one realtime mget per backing index per page) and the bulk indexer. Runs against the in-memory
+# stand-in from es_stand_in.py, with --latency per request to mimic a remote cluster.
+#
+#   python -m benchmarks.es_bench --jobs 2000 --latency 0.002
+
+import time
+import logging
+import argparse
+
+from elasticsearch import Elasticsearch, NotFoundError
+
+from app.database.es_store import ESStore
+from benchmarks.es_stand_in import start_es_stand_in
+
+
+def make_job(i):
+    return {"job_id": str(4000000000 + i), "job_title": "Data Engineer", "company_name": "Example Corp",
+            "location": "Toronto, ON", "description": "Build and run streaming pipelines. " * 20}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--page_size", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--fail_every", type=int, default=500, help="Inject a mapping failure for every Nth job")
+    args = parser.parse_args()
+
+    fail_ids = {make_job(i)["job_id"] for i in range(0, args.jobs, args.fail_every)} if args.fail_every else set()
+    server, base_url = start_es_stand_in(latency=args.latency, fail_ids=fail_ids)
+    client = Elasticsearch(base_url)
+    logging.getLogger("elastic_transport").setLevel(logging.WARNING)
+
+    jobs = [make_job(i) for i in range(args.jobs)]
+    pages = [jobs[i:i + args.page_size] for i in range(0, len(jobs), args.page_size)]
+
+    legacy = ESStore(index_name="bench_legacy", client=client)
+    server.cluster.requests.clear()
+    started = time.perf_counter()
+    for page in pages:
+        for job in page:
+            try:
+                legacy.client.get(index=legacy.index_name, id=job["job_id"])
+                continue
+            except NotFoundError:
+                pass
+            try:
+                legacy.client.index(index=legacy.index_name, id=job["job_id"], document=job)
+            except Exception:
+                pass
+    legacy_s = time.perf_counter() - started
+    legacy_requests = sum(server.cluster.requests.values())
+
+    store = ESStore(index_name="bench_bulk", client=client, flush_interval=0)
+    server.cluster.requests.clear()
+    started = time.perf_counter()
+    for page in pages:
+        unseen = set(store.filter_unseen([job["job_id"] for job in page]))
+        store.add_jobs(job for job in page if job["job_id"] in unseen)
+    store.flush()
+    errors = list(store.bulk.errors)
+    bulk_s = time.perf_counter() - started
+    bulk_requests = dict(server.cluster.requests)
+
+    # Second pass: everything is already indexed, so dedupe should filter every job
+    unseen_again = sum(len(store.filter_unseen([job["job_id"] for job in page])) for page in pages)
+    store.update_jobs({job["job_id"]: {"applicants": "Over 200 applicants"} for job in jobs[:100]})
+    store.flush()
+
+    print(f"[Bench] per-job get+index: {args.jobs / legacy_s:8.0f} jobs/s  {legacy_requests} requests")
+    print(f"[Bench] batched + bulk:    {args.jobs / bulk_s:8.0f} jobs/s  {sum(bulk_requests.values())} requests {bulk_requests}")
+    print(f"[Bench] bulk item errors reported: {len(errors)} (injected {len(fail_ids)}), unseen on second pass: {unseen_again} (expected {len(fail_ids)})")
+    print(f"[Bench] indexed={len(server.cluster.docs('bench_bulk'))} stats={store.bulk.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
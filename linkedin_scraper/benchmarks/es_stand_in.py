@@ -0,0 +1,199 @@
+# benchmarks/es_stand_in.py
+#
+# In-memory stand-in for the slice of the Elasticsearch REST API ESStore uses: ping, index
+# exists/create (with aliases), alias lookups, template/ILM/pipeline puts (acknowledged, not applied),
+# single-doc index/get/update, _bulk, _mget and _search with an ids query. Good enough for the official
+# client (it sends the X-Elastic-Product header the client checks for) and counts requests
+# per endpoint so benchmarks can report round-trips.
+#
+#   server, url = start_es_stand_in(latency=0.002, fail_ids={"4000000007"})
+
+import re
+import json
+import time
+import socket
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PATH_PATTERN = re.compile(r"^/(?P<index>[^/_][^/]*)?/?(?P<endpoint>_bulk|_mget|_doc|_update|_search)?/?(?P<id>[^/?]*)")
+
+
+class FakeCluster:
+    def __init__(self, latency=0.0, fail_ids=None):
+        self.indices = {}
+        self.aliases = {}  # alias -> [index, ...], the last one is the write index
+        self.latency = latency
+        self.fail_ids = set(fail_ids or ())
+        self.requests = Counter()
+        self.lock = threading.Lock()
+
+    def docs(self, index):
+        """Documents of the index, or of an alias's write index."""
+        if index in self.aliases:
+            index = self.aliases[index][-1]
+        return self.indices.setdefault(index, {})
+
+    def resolve(self, name):
+        return self.aliases.get(name, [name])
+
+
+class ESStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cluster = None
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this Nagle adds ~40ms per request
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send(self, status, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Type", "application/vnd.elasticsearch+json;compatible-with=9")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _route(self):
+        if self.cluster.latency:
+            time.sleep(self.cluster.latency)
+        body = self._body()
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self.cluster.requests["ping"] += 1
+            return self._send(200, {"name": "stand-in", "cluster_name": "stand-in", "version": {"number": "9.0.0"}, "tagline": "You Know, for Search"})
+
+        if path.startswith(("/_ilm/", "/_ingest/", "/_index_template/")):
+            self.cluster.requests[f"{self.command} {path.split('/')[1]}"] += 1
+            return self._send(200, {"acknowledged": True})
+        if path.startswith("/_alias/"):
+            self.cluster.requests["alias"] += 1
+            alias = path.split("/")[2]
+            if alias not in self.cluster.aliases:
+                return self._send(404, {"error": f"alias [{alias}] missing", "status": 404})
+            indices = self.cluster.aliases[alias]
+            return self._send(200, {index: {"aliases": {alias: {"is_write_index": index == indices[-1]}}} for index in indices})
+
+        match = PATH_PATTERN.match(path)
+        index, endpoint, doc_id = match.group("index"), match.group("endpoint"), match.group("id")
+        self.cluster.requests[f"{self.command} {endpoint or 'index'}"] += 1
+
+        with self.cluster.lock:
+            if endpoint == "_bulk":
+                return self._send(200, self._bulk(index, body))
+            if endpoint == "_mget":
+                return self._send(200, self._mget(index, json.loads(body or b"{}")))
+            if endpoint == "_search":
+                return self._send(200, self._search(index, json.loads(body or b"{}")))
+            if endpoint == "_doc" and self.command in ("PUT", "POST"):
+                self.cluster.docs(index)[doc_id] = json.loads(body)
+                return self._send(201, {"_index": index, "_id": doc_id, "result": "created"})
+            if endpoint == "_doc" and self.command in ("GET", "HEAD"):
+                doc = self.cluster.docs(index).get(doc_id)
+                if doc is None:
+                    return self._send(404, {"_index": index, "_id": doc_id, "found": False})
+                return self._send(200, {"_index": index, "_id": doc_id, "found": True, "_source": doc})
+            if endpoint == "_update":
+                doc = self.cluster.docs(index).get(doc_id)
+                if doc is None:
+                    return self._send(404, {"error": {"type": "document_missing_exception"}, "status": 404})
+                doc.update(json.loads(body)["doc"])
+                return self._send(200, {"_index": index, "_id": doc_id, "result": "updated"})
+            if endpoint is None and self.command == "HEAD":
+                return self._send(200 if index in self.cluster.indices or index in self.cluster.aliases else 404)
+            if endpoint is None and self.command == "PUT":
+                self.cluster.indices.setdefault(index, {})
+                for alias in json.loads(body or b"{}").get("aliases", {}):
+                    self.cluster.aliases.setdefault(alias, []).append(index)
+                return self._send(200, {"acknowledged": True, "index": index})
+        self._send(400, {"error": f"stand-in does not handle {self.command} {self.path}"})
+
+    def _bulk(self, default_index, body):
+        lines = [line for line in body.decode("utf-8").split("\n") if line.strip()]
+        items, errors, i = [], False, 0
+        while i < len(lines):
+            op_type, meta = next(iter(json.loads(lines[i]).items()))
+            index, doc_id = meta.get("_index", default_index), str(meta.get("_id"))
+            source = json.loads(lines[i + 1]) if op_type != "delete" else None
+            i += 1 if op_type == "delete" else 2
+
+            docs = self.cluster.docs(index)
+            index = self.cluster.resolve(index)[-1]
+            if doc_id in self.cluster.fail_ids:
+                errors = True
+                items.append({op_type: {"_index": index, "_id": doc_id, "status": 400,
+                                        "error": {"type": "mapper_parsing_exception", "reason": "injected failure"}}})
+                continue
+            if op_type in ("index", "create"):
+                status = 201 if doc_id not in docs else 200
+                docs[doc_id] = source
+            elif op_type == "update" and doc_id not in docs and source.get("doc_as_upsert"):
+                docs[doc_id] = dict(source.get("doc", {}))
+                status = 201
+            elif op_type == "update":
+                if doc_id not in docs:
+                    errors = True
+                    items.append({op_type: {"_index": index, "_id": doc_id, "status": 404,
+                                            "error": {"type": "document_missing_exception", "reason": f"[{doc_id}]: document missing"}}})
+                    continue
+                docs[doc_id].update(source.get("doc", {}))
+                status = 200
+            else:
+                status = 200 if docs.pop(doc_id, None) is not None else 404
+            items.append({op_type: {"_index": index, "_id": doc_id, "status": status, "result": "ok"}})
+        return {"took": 1, "errors": errors, "items": items}
+
+    def _mget(self, default_index, body):
+        if "ids" in body:
+            requested = [(default_index, str(doc_id)) for doc_id in body["ids"]]
+        else:
+            requested = [(doc.get("_index", default_index), str(doc["_id"])) for doc in body["docs"]]
+        docs = []
+        for index, doc_id in requested:
+            source = self.cluster.docs(index).get(doc_id)
+            doc = {"_index": index, "_id": doc_id, "found": source is not None}
+            if source is not None and "_source=false" not in self.path:
+                doc["_source"] = source
+            docs.append(doc)
+        return {"docs": docs}
+
+    def _search(self, index, body):
+        """Only the ids query."""
+        ids = body.get("query", {}).get("ids", {}).get("values")
+        if ids is None:
+            return {"took": 1, "hits": {"total": {"value": 0, "relation": "eq"}, "hits": []}}
+        with_source = body.get("_source", True) is not False and "_source=false" not in self.path
+        hits = []
+        for name in self.cluster.resolve(index):
+            docs = self.cluster.indices.get(name, {})
+            for doc_id in ids:
+                if str(doc_id) in docs:
+                    hit = {"_index": name, "_id": str(doc_id), "_score": 1.0}
+                    if with_source:
+                        hit["_source"] = docs[str(doc_id)]
+                    hits.append(hit)
+        hits = hits[:body.get("size", 10)]
+        return {"took": 1, "hits": {"total": {"value": len(hits), "relation": "eq"}, "hits": hits}}
+
+    do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _route
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_es_stand_in(host="127.0.0.1", port=0, latency=0.0, fail_ids=None):
+    """Start the stand-in on a background thread; returns (server, base_url). server.cluster holds the data."""
+    cluster = FakeCluster(latency=latency, fail_ids=fail_ids)
+    handler = type("ESStandInHandler", (ESStandInHandler,), {"cluster": cluster})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.cluster = cluster
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,90 @@
+# benchmarks/http_fetcher_bench.py
+#
+# Fetch + parse latency of the HTTP fast path against a local server serving saved pages,
+# optionally compared with the Selenium path (needs Chrome):
+#
+#   python -m benchmarks.http_fetcher_bench --jobs 200 --latency 0.05
+#   python -m benchmarks.http_fetcher_bench --pages_dir logs/failures --selenium
+
+import os
+import re
+import time
+import argparse
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from app.scraper.http_fetcher import HttpJobFetcher, LatencyStats
+from app.scraper.rate_limiter import NullRateLimiter
+from app.scraper.job_parser import parse_job_details
+from benchmarks.local_server import start_server
+
+
+def job_ids_for(pages_dir, n):
+    if pages_dir:
+        ids = [m.group(1) for m in (re.match(r"job_(\d+)\.html(\.gz)?$", f) for f in sorted(os.listdir(pages_dir))) if m]
+        return ids[:n]
+    return [str(4000000000 + i) for i in range(n)]
+
+
+def run_http(base_url, ids, max_in_flight):
+    stats = LatencyStats()
+    fetcher = HttpJobFetcher(base_url=base_url, max_in_flight=max_in_flight, stats=stats, limiter=NullRateLimiter())
+    jobs = [{"job_id": job_id, "job_url": fetcher.job_posting_url(job_id)} for job_id in ids]
+
+    started = time.perf_counter()
+    scraped, needs_fallback = fetcher.scrape_jobs(jobs)
+    elapsed = time.perf_counter() - started
+    print(f"[Bench] http     : {len(scraped)}/{len(ids)} parsed, {len(needs_fallback)} need fallback, "
+          f"{len(ids) / elapsed * 60:.1f} jobs/min")
+    stats.report()
+    return scraped
+
+
+def run_selenium(base_url, ids):
+    from app.scraper.driver_pool import DriverPool
+
+    stats = LatencyStats()
+    pool = DriverPool(size=1)
+    parsed = 0
+    started = time.perf_counter()
+    try:
+        with pool.session() as driver:
+            for job_id in ids:
+                url = f"{base_url}/jobs/view/job-{job_id}"
+                t0 = time.perf_counter()
+                driver.get(url)
+                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//h2")))
+                stats.record("selenium", "fetch", time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                if parse_job_details(driver, url, known_job_id=job_id):
+                    parsed += 1
+                stats.record("selenium", "parse", time.perf_counter() - t0)
+    finally:
+        pool.close_all()
+    elapsed = time.perf_counter() - started
+    print(f"[Bench] selenium : {parsed}/{len(ids)} parsed, {len(ids) / elapsed * 60:.1f} jobs/min")
+    stats.report()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--max_in_flight", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency in seconds")
+    parser.add_argument("--pages_dir", default=None, help="Serve saved job_<id>.html(.gz) pages from this directory")
+    parser.add_argument("--selenium", action="store_true", help="Also time the Selenium path")
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, pages_dir=args.pages_dir)
+    try:
+        ids = job_ids_for(args.pages_dir, args.jobs)
+        run_http(base_url, ids, args.max_in_flight)
+        if args.selenium:
+            run_selenium(base_url, ids)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
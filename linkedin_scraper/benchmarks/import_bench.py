@@ -0,0 +1,75 @@
+# benchmarks/import_bench.py
+#
+# Import cost of each entry point, measured in a fresh interpreter with `python -X importtime`.
+# Importing must not touch the network, so every import runs with a hard timeout and fails
+# the budget if it hangs. Exits non-zero when an entry point is over budget.
+#
+#   python -m benchmarks.import_bench
+#   python -m benchmarks.import_bench --show 15    # also list the slowest modules per entry point
+
+import sys
+import time
+import argparse
+import subprocess
+
+# Cumulative import time budget per entry point, in milliseconds (roughly 2x what they take today)
+BUDGETS_MS = {
+    "run": 1000,
+    "app.main": 1000,
+    "app.worker.scraper_worker": 1000,
+    "app.monitor.monitor_jobs": 800,
+    "app.scraper.scraper": 800,
+    "app.database.es_store": 700,
+    "app.scraper.redis_store": 300,
+    "kafka_utils.producer": 150,
+}
+IMPORT_TIMEOUT = 20
+
+
+def measure(module):
+    started = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, timeout=IMPORT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return None, None, []
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    top_level = [row for row in rows if row[2].strip() == module]
+    cumulative_ms = top_level[-1][0] / 1000 if top_level else None
+    return cumulative_ms, wall_ms, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--show", type=int, default=0, help="List the N modules with the highest self time")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        budget = BUDGETS_MS.get(module)
+        cumulative_ms, wall_ms, rows = measure(module)
+        if cumulative_ms is None:
+            print(f"[Bench] {module:<28} FAILED (import error or no finish within {IMPORT_TIMEOUT}s)")
+            over_budget.append(module)
+            continue
+        status = "ok" if budget is None or cumulative_ms <= budget else "OVER BUDGET"
+        print(f"[Bench] {module:<28} import={cumulative_ms:7.0f}ms  process={wall_ms:7.0f}ms  budget={budget}ms  {status}")
+        if status != "ok":
+            over_budget.append(module)
+        for _, self_us, name in sorted(rows, key=lambda row: -row[1])[:args.show]:
+            print(f"          {self_us / 1000:7.1f}ms  {name.strip()}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/kafka_bench.py
+#
+# Produce throughput: the old produce-then-flush-per-record loop against JobProducer.
+# By default both run against MockProducer, which acks a batch linger_ms + rtt_ms after it
+# is produced. Pass --brokers to measure against a real cluster instead.
+#
+#   python -m benchmarks.kafka_bench --records 5000 --rtt_ms 5
+#   python -m benchmarks.kafka_bench --records 50000 --brokers localhost:9092
+
+import time
+import json
+import argparse
+from collections import deque
+
+from kafka_utils.producer import JobProducer, PRODUCER_CONF
+
+
+class MockMessage:
+    def __init__(self, topic, key, latency):
+        self._topic, self._key, self._latency = topic, key, latency
+
+    def topic(self):
+        return self._topic
+
+    def key(self):
+        return self._key
+
+    def latency(self):
+        return self._latency
+
+
+class MockProducer:
+    """Just enough of confluent_kafka.Producer: delivery reports fire from poll()/flush() once a record's deadline passes."""
+
+    def __init__(self, linger_ms=10, rtt_ms=5, queue_max=10000):
+        self.delay = (linger_ms + rtt_ms) / 1000
+        self.queue_max = queue_max
+        self.pending = deque()
+
+    def produce(self, topic, key=None, value=None, headers=None, on_delivery=None):
+        if len(self.pending) >= self.queue_max:
+            raise BufferError("Local: Queue full")
+        self.pending.append((time.perf_counter() + self.delay, topic, key, on_delivery))
+
+    def _deliver_ready(self):
+        now = time.perf_counter()
+        served = 0
+        while self.pending and self.pending[0][0] <= now:
+            _, topic, key, on_delivery = self.pending.popleft()
+            if on_delivery:
+                on_delivery(None, MockMessage(topic, key, self.delay))
+            served += 1
+        return served
+
+    def poll(self, timeout=0):
+        served = self._deliver_ready()
+        if not served and timeout and self.pending:
+            time.sleep(max(0, min(timeout, self.pending[0][0] - time.perf_counter())))
+            served = self._deliver_ready()
+        return served
+
+    def flush(self, timeout=None):
+        if self.pending:
+            time.sleep(max(0, self.pending[-1][0] - time.perf_counter()))
+        self._deliver_ready()
+        return len(self.pending)
+
+    def __len__(self):
+        return len(self.pending)
+
+
+def make_record(i):
+    return {
+        "job_id": str(4000000000 + i),
+        "job_title": "Data Engineer",
+        "company_name": "Example Corp",
+        "location": "Toronto, ON",
+        "description": "Build and run streaming pipelines. " * 40,
+    }
+
+
+def bench_legacy(producer, records, topic):
+    started = time.perf_counter()
+    for record in records:
+        producer.produce(topic=topic, key=record["job_id"], value=json.dumps(record).encode("utf-8"))
+        producer.flush()
+    return time.perf_counter() - started
+
+
+def bench_async(producer, records, topic, max_in_flight):
+    job_producer = JobProducer(producer_factory=lambda: producer, topic_creator=lambda name: True, max_in_flight=max_in_flight)
+    started = time.perf_counter()
+    for record in records:
+        job_producer.produce(record, topic_name=topic)
+    job_producer.flush()
+    elapsed = time.perf_counter() - started
+    return elapsed, job_producer.stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--legacy_records", type=int, default=500, help="The per-record flush loop is slow, so it runs on fewer records")
+    parser.add_argument("--linger_ms", type=float, default=10)
+    parser.add_argument("--rtt_ms", type=float, default=5)
+    parser.add_argument("--max_in_flight", type=int, default=5000)
+    parser.add_argument("--brokers", default=None)
+    parser.add_argument("--topic", default="bench_job_records")
+    args = parser.parse_args()
+
+    def make_producer():
+        if args.brokers:
+            from confluent_kafka import Producer
+            return Producer({**PRODUCER_CONF, "bootstrap.servers": args.brokers})
+        return MockProducer(linger_ms=args.linger_ms, rtt_ms=args.rtt_ms)
+
+    records = [make_record(i) for i in range(args.records)]
+
+    n_legacy = min(args.legacy_records, len(records))
+    elapsed = bench_legacy(make_producer(), records[:n_legacy], args.topic)
+    print(f"[Bench] flush per record: {n_legacy / elapsed:10.0f} records/s ({n_legacy} records in {elapsed:.2f}s)")
+
+    elapsed, stats = bench_async(make_producer(), records, args.topic, args.max_in_flight)
+    print(f"[Bench] JobProducer:      {len(records) / elapsed:10.0f} records/s ({len(records)} records in {elapsed:.2f}s)")
+    print(f"[Bench] delivered={stats['delivered']} failed={stats['failed']} backpressure_waits={stats['backpressure_waits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/kafka_stand_in.py
+#
+# In-process stand-in for the confluent_kafka.Producer calls JobProducer makes: produce() into a
+# bounded local queue, delivery reports from poll()/flush() once a record has been "acked"
+# (ack_ms after it was produced), and a failure_rate of delivery errors. Delivered records stay
+# in memory per topic, so a benchmark can check what actually arrived.
+#
+#   kafka = InProcessKafka(ack_ms=5)
+#   producer = JobProducer(producer_factory=lambda: kafka, topic_creator=lambda topic: True)
+
+import time
+import random
+import threading
+from collections import deque
+
+
+class StandInMessage:
+    def __init__(self, topic, key, value, latency, partition):
+        self._topic, self._key, self._value, self._latency, self._partition = topic, key, value, latency, partition
+
+    def topic(self):
+        return self._topic
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+    def latency(self):
+        return self._latency
+
+    def partition(self):
+        return self._partition
+
+
+class InProcessKafka:
+    def __init__(self, ack_ms=5, failure_rate=0.0, num_partitions=5, queue_max=100000):
+        self.ack_delay = ack_ms / 1000
+        self.failure_rate = failure_rate
+        self.num_partitions = num_partitions
+        self.queue_max = queue_max
+        self.pending = deque()
+        self.topics = {}  # topic -> [(key, value), ...] in delivery order
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def produce(self, topic, key=None, value=None, headers=None, on_delivery=None):
+        with self._lock:
+            if len(self.pending) >= self.queue_max:
+                raise BufferError("Local: Queue full")
+            self.pending.append((time.perf_counter(), topic, key, value, on_delivery))
+
+    def _deliver_ready(self):
+        ready = []
+        now = time.perf_counter()
+        with self._lock:
+            while self.pending and self.pending[0][0] + self.ack_delay <= now:
+                ready.append(self.pending.popleft())
+        for produced_at, topic, key, value, on_delivery in ready:
+            partition = hash(key) % self.num_partitions
+            message = StandInMessage(topic, key, value, now - produced_at, partition)
+            if self.failure_rate and random.random() < self.failure_rate:
+                self.failed += 1
+                err = "Broker: Not enough in-sync replicas"
+            else:
+                self.topics.setdefault(topic, []).append((key, value))
+                err = None
+            if on_delivery:
+                on_delivery(err, message)
+        return len(ready)
+
+    def poll(self, timeout=0):
+        served = self._deliver_ready()
+        if not served and timeout and self.pending:
+            time.sleep(max(0, min(timeout, self.pending[0][0] + self.ack_delay - time.perf_counter())))
+            served = self._deliver_ready()
+        return served
+
+    def flush(self, timeout=None):
+        deadline = time.perf_counter() + (timeout if timeout is not None else 3600)
+        while self.pending and time.perf_counter() < deadline:
+            self.poll(0.1)
+        return len(self.pending)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def delivered(self, topic):
+        return self.topics.get(topic, [])
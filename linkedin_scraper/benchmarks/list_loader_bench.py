@@ -0,0 +1,110 @@
+# benchmarks/list_loader_bench.py
+#
+# Time to load a search result list: the old fixed-sleep scroll passes (scroll_and_load_jobs with
+# compute_dynamic_scrolls, then scroll_until_target_jobs, as scrape_linkedin_jobs ran them) against
+# utils.load_job_cards. Both run against the infinite-scroll fixture from local_server.py, which
+# appends 25 cards --load_ms after each scroll and switches to a "See more jobs" button later on.
+# The third run is the monitor's incremental mode: a watermark (in fakeredis) already holds every
+# job except the newest --new_jobs, so loading should stop right after them.
+# Needs Chrome + chromedriver (run it inside the scraper container) and requirements-bench.txt:
+#
+#   python -m benchmarks.list_loader_bench --target 100 --total 300 --load_ms 400
+#   python -m benchmarks.list_loader_bench --target 1000 --total 1000 --new_jobs 20
+
+import time
+import random
+import argparse
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+import fakeredis
+
+from app.scraper.driver import get_driver
+from app.monitor.watermarks import QueryWatermark
+from app.scraper.utils import load_job_cards, extract_job_cards, JOB_CARD_SELECTOR
+from benchmarks.local_server import start_server
+
+
+def legacy_scroll_count(max_jobs):
+    if max_jobs <= 25:
+        return 5
+    elif max_jobs <= 75:
+        return 8
+    elif max_jobs <= 150:
+        return 12
+    elif max_jobs <= 300:
+        return 15
+    return 20
+
+
+def legacy_load(driver, target):
+    """The two back-to-back scroll passes scrape_linkedin_jobs used to make."""
+    for _ in range(legacy_scroll_count(target)):
+        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.END)
+        time.sleep(2)
+        buttons = driver.find_elements(By.XPATH, "//button[@aria-label='See more jobs']")
+        if buttons and buttons[0].is_displayed():
+            driver.execute_script("arguments[0].click();", buttons[0])
+            time.sleep(3)
+
+    stagnant, last_count = 0, 0
+    for _ in range(150):
+        for _ in range(3):
+            buttons = driver.find_elements(By.XPATH, "//button[@aria-label='See more jobs']")
+            if buttons and buttons[0].is_displayed():
+                driver.execute_script("arguments[0].click();", buttons[0])
+                time.sleep(3)
+        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.END)
+        time.sleep(random.uniform(2, 3))
+        count = len(driver.find_elements(By.CLASS_NAME, "base-card__full-link"))
+        if count >= target:
+            break
+        stagnant = stagnant + 1 if count == last_count else 0
+        if stagnant >= 3:
+            break
+        last_count = count
+    return extract_job_cards(driver)
+
+
+def run(driver, url, loader, target):
+    driver.get(url)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, JOB_CARD_SELECTOR)))
+    started = time.perf_counter()
+    cards = loader(driver, target)
+    return time.perf_counter() - started, len(cards)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", type=int, default=100, help="max_jobs passed to the loader")
+    parser.add_argument("--total", type=int, default=300, help="Jobs the search has in all")
+    parser.add_argument("--load_ms", type=int, default=400, help="Delay before a new page of cards shows up")
+    parser.add_argument("--scroll_pages", type=int, default=6, help="Pages loaded by scrolling before the button takes over")
+    parser.add_argument("--new_jobs", type=int, default=20, help="Jobs the incremental run hasn't seen yet")
+    args = parser.parse_args()
+
+    watermark = QueryWatermark("Data Engineer", "Canada", "past_week", client=fakeredis.FakeRedis(decode_responses=True))
+    watermark.advance([{"job_id": str(4000000000 + i)} for i in range(args.new_jobs, args.total)])
+    should_stop = watermark.stop_after_seen(25)
+
+    server, base_url = start_server()
+    url = f"{base_url}/jobs/search?total={args.total}&load_ms={args.load_ms}&scroll_pages={args.scroll_pages}"
+    driver = get_driver()
+    try:
+        results = {}
+        for name, loader in [("fixed sleeps (2 passes)", legacy_load),
+                             ("load_job_cards", lambda d, target: load_job_cards(d, target_count=target)),
+                             ("incremental (watermark)", lambda d, target: load_job_cards(d, target_count=target, should_stop=should_stop))]:
+            elapsed, n_cards = run(driver, url, loader, args.target)
+            results[name] = elapsed
+            print(f"[Bench] {name:<24}: {elapsed:7.2f}s  {n_cards} cards")
+        print(f"[Bench] Speedup: {results['fixed sleeps (2 passes)'] / results['load_job_cards']:.2f}x")
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
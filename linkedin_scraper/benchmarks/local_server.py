@@ -0,0 +1,167 @@
+# benchmarks/local_server.py
+#
+# A local stand-in for the parts of LinkedIn the scrapers touch:
+#   /jobs/search?...                          infinite-scroll result list (search_results.html)
+#   /jobs/search?...&currentJobId=<id>        job posting
+#   /jobs/view/..., /jobs-guest/.../jobPosting/<id>   job posting
+#   /jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=&location=&start=
+#                                             25 result cards per call (the guest pagination API)
+# latency / latency_jitter delay every response; failure_rate answers that fraction of job
+# posting requests with one of failure_kinds (429, 500, an authwall challenge page, or a page
+# with the description missing). Pass stats=Counter() to count what was served.
+
+import os
+import gzip
+import re
+import time
+import zlib
+import random
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+JOB_ID_PATTERNS = [
+    re.compile(r"currentJobId=(\d+)"),
+    re.compile(r"/jobPosting/(\d+)"),
+    re.compile(r"/jobs/view/(?:[^/?]+-)?(\d{10})"),
+]
+LISTING_PATH = "/jobs-guest/jobs/api/seeMoreJobPostings/search"
+LISTING_PAGE_SIZE = 25
+FAILURE_KINDS = ("429", "500", "challenge", "missing_fields")
+CHALLENGE_PAGE = (b"<html><head><title>Security Verification | LinkedIn</title></head>"
+                  b"<body><h1>Security Verification</h1><form id='captcha-challenge' class='challenge-form'></form></body></html>")
+POSTED_AGO = ["12 minutes ago", "1 hour ago", "3 hours ago", "8 hours ago", "1 day ago", "2 days ago", "4 days ago", "1 week ago"]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class JobPageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the saved job posting for any job URL, with the job ID from the path substituted in.
+    If pages_dir is set, serves job_<id>.html(.gz) from it instead (the naming used by logs/failures).
+    """
+
+    template = load_fixture("job_posting.html")
+    search_template = load_fixture("search_results.html")
+    pages_dir = None
+    latency = 0.0
+    latency_jitter = 0.0
+    failure_rate = 0.0
+    failure_kinds = FAILURE_KINDS
+    listing_total = 300
+    stats = None
+
+    def count(self, what):
+        if self.stats is not None:
+            self.stats[what] += 1
+
+    def do_GET(self):
+        if self.latency or self.latency_jitter:
+            time.sleep(self.latency + random.uniform(0, self.latency_jitter))
+
+        if self.path.startswith(LISTING_PATH):
+            return self.send_listing_page()
+        if self.path.startswith("/jobs/search") and "currentJobId=" not in self.path:
+            return self.send_search_page()
+
+        job_id = None
+        for pattern in JOB_ID_PATTERNS:
+            match = pattern.search(self.path)
+            if match:
+                job_id = match.group(1)
+                break
+
+        if job_id is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        failure = random.choice(self.failure_kinds) if self.failure_rate and random.random() < self.failure_rate else None
+        self.count(f"job_{failure or 'ok'}")
+        if failure in ("429", "500"):
+            self.send_response(int(failure))
+            self.end_headers()
+            return
+        if failure == "challenge":
+            return self.send_html(CHALLENGE_PAGE)
+
+        if self.pages_dir:
+            path = os.path.join(self.pages_dir, f"job_{job_id}.html")
+            if os.path.exists(path + ".gz"):
+                with gzip.open(path + ".gz", "rb") as f:
+                    body = f.read()
+            elif os.path.exists(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+        else:
+            body = self.template.replace("{job_id}", job_id).encode("utf-8")
+        if failure == "missing_fields":
+            body = body.replace(b"show-more-less-html", b"removed-section")
+        self.send_html(body)
+
+    def send_html(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_listing_page(self):
+        """
+        Result cards start..start+25 of listing_total for this keywords/location pair. Each pair
+        gets its own block of job IDs, listed newest first.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        start = int(query.get("start", ["0"])[0])
+        search_key = f"{query.get('keywords', [''])[0]}|{query.get('location', [''])[0]}".lower()
+        first_id = 4000000000 + (zlib.crc32(search_key.encode("utf-8")) % 10000) * 100000
+        self.count("listing")
+        items = []
+        for i in range(start, min(start + LISTING_PAGE_SIZE, self.listing_total)):
+            job_id = first_id + i
+            items.append(
+                f'<li><div class="base-card base-search-card job-search-card" data-entity-urn="urn:li:jobPosting:{job_id}">'
+                f'<a class="base-card__full-link" href="https://www.linkedin.com/jobs/view/data-engineer-at-company-{i % 40}-{job_id}">'
+                f'<span class="sr-only">Data Engineer</span></a><div class="base-search-card__info">'
+                f'<h3 class="base-search-card__title">Data Engineer {i}</h3>'
+                f'<h4 class="base-search-card__subtitle"><a class="hidden-nested-link">Company {i % 40}</a></h4>'
+                f'<div class="base-search-card__metadata"><span class="job-search-card__location">Toronto, ON</span>'
+                f'<time class="job-search-card__listdate">{POSTED_AGO[min(i * len(POSTED_AGO) // max(self.listing_total, 1), len(POSTED_AGO) - 1)]}</time>'
+                f'</div></div></div></li>')
+        self.send_html("".join(items).encode("utf-8"))
+
+    def send_search_page(self):
+        """/jobs/search?total=300&load_ms=400&scroll_pages=6 -> the infinite-scroll listing fixture."""
+        query = parse_qs(urlparse(self.path).query)
+        params = {"total": self.listing_total, "load_ms": 400, "scroll_pages": 6}
+        for name in params:
+            if name in query:
+                params[name] = int(query[name][0])
+        body = self.search_template
+        for name, value in params.items():
+            body = body.replace("{" + name + "}", str(value))
+        self.send_html(body.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(handler=JobPageHandler, host="127.0.0.1", port=0, **handler_attrs):
+    """
+    Start the server on a background thread and return (server, base_url).
+    Extra keyword arguments override handler class attributes, e.g. latency=0.05.
+    """
+    if handler_attrs:
+        handler = type(handler.__name__, (handler,), handler_attrs)
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
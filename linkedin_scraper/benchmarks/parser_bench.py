@@ -0,0 +1,63 @@
+# benchmarks/parser_bench.py
+#
+# CPU cost of parse_job_html over saved page snapshots (logs/failures/*.html.gz by default,
+# plain .html works too, falling back to the bundled fixture):
+#
+#   python -m benchmarks.parser_bench --repeat 50
+
+import os
+import glob
+import gzip
+import time
+import argparse
+from bs4 import BeautifulSoup
+
+from app.scraper.job_parser import parse_job_html
+from benchmarks.local_server import FIXTURES_DIR
+
+
+def load_pages(pattern):
+    paths = sorted(glob.glob(pattern)) or [os.path.join(FIXTURES_DIR, "job_posting.html")]
+    pages = []
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def time_per_page(func, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            func(html)
+    return (time.perf_counter() - started) / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", default="logs/failures/*.html*")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    print(f"[Bench] {len(pages)} pages, {sum(len(h) for _, h in pages) / len(pages) / 1024:.1f}KB average")
+
+    lxml_s = time_per_page(parse_job_html, pages, args.repeat)
+    # Reference point: just building a tree with the html.parser backend the old code used
+    soup_s = time_per_page(lambda html: BeautifulSoup(html, "html.parser"), pages, args.repeat)
+
+    print(f"[Bench] parse_job_html (lxml, all fields) : {lxml_s * 1e6:10.1f} µs/page")
+    print(f"[Bench] BeautifulSoup html.parser (tree)  : {soup_s * 1e6:10.1f} µs/page")
+
+    missing = {}
+    for _, html in pages:
+        for name, value in parse_job_html(html).items():
+            if value is None:
+                missing[name] = missing.get(name, 0) + 1
+    if missing:
+        print(f"[Bench] Missing fields across pages: {missing}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/rate_limiter_bench.py
+#
+# N scraping workers against a simulated site that allows --site_rps requests per second across
+# all clients and answers 429 beyond that; after a 429 it refuses everyone for --penalty seconds
+# (LinkedIn's 999 behaves roughly like this). Workers either sleep random.uniform(2, 4) after each
+# request, as scraper.py and scraper_worker.py did, or pace through one shared RateLimiter (its
+# Redis is fakeredis, shared by all worker threads like a real Redis is shared by processes).
+#
+# Real timings are minutes long, so every duration and rate is scaled by --scale: at 0.05 a 2-4s
+# sleep is 0.1-0.2s and the site allows site_rps / 0.05 requests per (wall) second. The output is
+# in unscaled units. Needs fakeredis (pip install -r requirements-bench.txt).
+#
+#   python -m benchmarks.rate_limiter_bench --workers 1 4 16 --seconds 10
+
+import time
+import random
+import argparse
+import threading
+
+import fakeredis
+
+from app.scraper.rate_limiter import RateLimiter, RATE_DEFAULT, RATE_MIN, RATE_MAX, RATE_BURST, \
+    RATE_INCREASE, RATE_COOLDOWN, JITTER
+
+HOST = "www.linkedin.com"
+
+
+class SimulatedSite:
+    """Global token bucket; a 429 also blocks every client for `penalty` seconds."""
+
+    def __init__(self, rps, burst, penalty, latency):
+        self.rps, self.burst, self.penalty, self.latency = rps, burst, penalty, latency
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+        self.ok = 0
+        self.throttled = 0
+
+    def request(self):
+        time.sleep(self.latency)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rps)
+            self.last = now
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                self.ok += 1
+                return 200
+            self.throttled += 1
+            if now >= self.blocked_until:
+                self.blocked_until = now + self.penalty
+            return 429
+
+
+def fixed_sleep_worker(site, deadline, scale, limiter=None):
+    while time.monotonic() < deadline:
+        site.request()
+        time.sleep(random.uniform(2, 4) * scale)
+
+
+def limiter_worker(site, deadline, scale, limiter):
+    while time.monotonic() < deadline:
+        limiter.acquire(HOST)
+        if site.request() == 200:
+            limiter.success(HOST)
+        else:
+            limiter.throttled(HOST, "status_429")
+
+
+def run(worker, n_workers, args, limiter=None):
+    site = SimulatedSite(args.site_rps / args.scale, RATE_BURST, args.penalty * args.scale, args.latency * args.scale)
+    deadline = time.monotonic() + args.seconds
+    threads = [threading.Thread(target=worker, args=(site, deadline, args.scale, limiter)) for _ in range(n_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    simulated_seconds = args.seconds / args.scale
+    return site.ok / simulated_seconds, site.throttled, site.ok
+
+
+def make_limiter(scale):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    # Rates are per second, so they scale inversely with durations
+    return RateLimiter(client=client, default_rate=RATE_DEFAULT / scale, min_rate=RATE_MIN / scale,
+                       max_rate=RATE_MAX / scale, burst=RATE_BURST, increase=RATE_INCREASE / scale,
+                       cooldown=RATE_COOLDOWN * scale, jitter=JITTER * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--site_rps", type=float, default=1.0, help="Requests per second the site tolerates")
+    parser.add_argument("--penalty", type=float, default=30, help="Seconds every client is refused after a 429")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per request")
+    parser.add_argument("--seconds", type=float, default=10, help="Wall-clock seconds per run")
+    parser.add_argument("--scale", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"[Bench] Site allows {args.site_rps} req/s, {args.penalty:.0f}s penalty after a 429; "
+          f"{args.seconds / args.scale / 60:.0f} simulated minutes per run")
+    for n_workers in args.workers:
+        for name, worker, limiter in [("random sleep 2-4s", fixed_sleep_worker, None),
+                                      ("shared RateLimiter", limiter_worker, make_limiter(args.scale))]:
+            rps, throttled, ok = run(worker, n_workers, args, limiter)
+            rate = ""
+            if limiter:
+                rate = f"  final rate {float(limiter.stats(HOST)['rate']) * args.scale:.2f} req/s"
+            print(f"[Bench] {n_workers:>3} workers  {name:<19}: {rps:5.2f} ok req/s  {ok:>6} ok  {throttled:>5} throttled{rate}")
+
+
+if __name__ == "__main__":
+    main()
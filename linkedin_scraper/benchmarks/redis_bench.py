@@ -0,0 +1,102 @@
+# benchmarks/redis_bench.py
+#
+# Round-trip cost of the monitor's enqueue step and the worker's batch pop,
+# per-item commands vs the batched RedisStore APIs. Uses fakeredis by default
+# (pip install -r requirements-bench.txt); point it at a real server to include network
+# RTTs (the DB is flushed!):
+#
+#   python -m benchmarks.redis_bench --jobs 1000
+#   python -m benchmarks.redis_bench --url redis://localhost:6380/15
+
+import time
+import argparse
+import redis
+
+from app.scraper.redis_store import RedisStore
+
+
+def make_store(url):
+    if url:
+        client = redis.Redis.from_url(url, decode_responses=True)
+    else:
+        import fakeredis
+        client = fakeredis.FakeRedis(decode_responses=True)
+    client.flushdb()
+    return RedisStore(client=client)
+
+
+def make_page(n, offset=0):
+    return [{"job_id": str(4000000000 + offset + i), "job_url": f"https://www.linkedin.com/jobs/view/{4000000000 + offset + i}"}
+            for i in range(n)]
+
+
+def seed(store, page):
+    # A third already scraped, a third seen, a third new: the mix a monitor run usually sees
+    for i, job in enumerate(page):
+        if i % 3 == 0:
+            store.mark_job_as_scraped(job["job_id"])
+        elif i % 3 == 1:
+            store.add_job_id(job["job_id"])
+
+
+def enqueue_per_job(store, page):
+    for job in page:
+        if store.is_job_id_scraped(job["job_id"]):
+            continue
+        elif store.is_job_id_seen(job["job_id"]):
+            store.add_to_pending_update_jobs(job["job_id"], job["job_url"])
+        else:
+            store.add_to_pending_new_jobs(job["job_id"], job["job_url"])
+            store.add_job_id(job["job_id"])
+
+
+def pop_per_item(store, batch_size):
+    jobs = []
+    for _ in range(batch_size):
+        item = store.client.lpop("pending_new_jobs")
+        if not item:
+            break
+        jobs.append(item)
+    return jobs
+
+
+def timed(label, n_items, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"[Bench] {label:<34}: {elapsed * 1000:9.2f}ms  {n_items / elapsed:12.0f} items/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--batch_size", type=int, default=30)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    store = make_store(args.url)
+    page = make_page(args.jobs)
+    seed(store, page)
+    before = timed("enqueue page: per-job commands", args.jobs, lambda: enqueue_per_job(store, page))
+
+    store = make_store(args.url)
+    seed(store, page)
+    after = timed("enqueue page: Lua script", args.jobs, lambda: store.enqueue_job_page(page))
+    print(f"[Bench] enqueue speedup: {before / after:.1f}x")
+
+    store = make_store(args.url)
+    for job in make_page(args.jobs, offset=args.jobs):
+        store.add_to_pending_new_jobs(job["job_id"], job["job_url"])
+    n_batches = args.jobs // args.batch_size
+    before = timed("pop batches: LPOP per item", n_batches * args.batch_size,
+                   lambda: [pop_per_item(store, args.batch_size) for _ in range(n_batches)])
+    for job in make_page(args.jobs, offset=args.jobs):
+        store.add_to_pending_new_jobs(job["job_id"], job["job_url"])
+    after = timed("pop batches: LPOP with count", n_batches * args.batch_size,
+                  lambda: [store.fetch_pending_new_jobs(args.batch_size) for _ in range(n_batches)])
+    print(f"[Bench] pop speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/search_bench.py
+#
+# Query latency of the /search layout on a generated corpus (1M jobs by default). Needs a real
+# cluster; the corpus goes into its own alias (bench-jobs) through the same template and
+# pipeline as linkedin-jobs, so it measures the production mapping.
+#
+#   python -m benchmarks.search_bench --url http://localhost:9200 --jobs 1000000
+#   python -m benchmarks.search_bench --url http://localhost:9200 --skip_load     # reuse the corpus
+
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from elasticsearch import Elasticsearch, helpers
+
+from app.database.es_store import ESStore
+from app.database.job_search import build_search_body, encode_cursor
+
+COMPANIES = [f"Company {i}" for i in range(5000)]
+LOCATIONS = [f"{city}, {region}" for city in ["Toronto", "Vancouver", "Montreal", "Calgary", "Ottawa", "Bangalore", "Pune", "London"]
+             for region in ["ON", "BC", "QC", "AB", "KA", "MH", "UK"]]
+TITLES = ["Data Engineer", "Senior Data Engineer", "Software Engineer", "ML Engineer", "Analytics Engineer", "Backend Developer"]
+SENIORITY = ["Entry level", "Associate", "Mid-Senior level", "Director", "Internship"]
+EMPLOYMENT = ["Full-time", "Contract", "Part-time", "Temporary"]
+WORDS = ("spark kafka airflow python sql scala dbt snowflake bigquery kubernetes terraform aws gcp azure "
+         "streaming batch pipelines warehouse lakehouse modeling orchestration observability").split()
+
+
+def generate_jobs(n, seed=1):
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 25)
+    for i in range(n):
+        posted = now - timedelta(hours=rng.randint(0, 24 * 180))
+        yield {
+            "job_id": str(4000000000 + i),
+            "job_url": f"https://www.linkedin.com/jobs/view/{4000000000 + i}",
+            "job_title": rng.choice(TITLES),
+            "company_name": COMPANIES[int(rng.paretovariate(1.2)) % len(COMPANIES)],
+            "location": rng.choice(LOCATIONS),
+            "posted_time": "1 week ago",
+            "posted_timestamp": posted.strftime("%Y-%m-%d %H:%M:%S"),
+            "applicants": f"{rng.randint(1, 200)} applicants",
+            "description": " ".join(rng.choices(WORDS, k=120)),
+            "Seniority level": rng.choice(SENIORITY),
+            "Employment type": rng.choice(EMPLOYMENT),
+            "Job function": "Engineering and Information Technology",
+            "Industries": "Software Development",
+        }
+
+
+def load(client, alias, n):
+    started = time.perf_counter()
+    actions = ({"_index": alias, "_id": job["job_id"], "_source": job} for job in generate_jobs(n))
+    indexed = 0
+    for ok, _ in helpers.parallel_bulk(client, actions, chunk_size=2000, thread_count=4, request_timeout=120):
+        indexed += ok
+    client.indices.refresh(index=alias)
+    print(f"[Bench] Loaded {indexed} jobs in {time.perf_counter() - started:.0f}s")
+
+
+def timed(client, alias, body, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.search(index=alias, body=body, request_cache=False)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, response
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    print(f"[Bench] {name:<34} p50={statistics.median(samples):7.1f}ms  p95={p95:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:9200")
+    parser.add_argument("--alias", default="bench-jobs")
+    parser.add_argument("--jobs", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--pages", type=int, default=200, help="Pages to walk for the deep pagination test")
+    parser.add_argument("--skip_load", action="store_true")
+    args = parser.parse_args()
+
+    client = Elasticsearch(args.url, request_timeout=120)
+    ESStore(index_name=args.alias, client=client)  # template, pipeline and alias
+    if not args.skip_load:
+        load(client, args.alias, args.jobs)
+
+    queries = {
+        "newest (match_all, sorted)": {},
+        "company filter": {"company": "Company 1,Company 2"},
+        "filters + date range": {"seniority": "Mid-Senior level", "employment_type": "Full-time", "posted_after": "2025-06-01", "min_applicants": "50"},
+        "full text": {"q": "kafka streaming"},
+        "full text + filters": {"q": "spark", "location": "Toronto, ON", "seniority": "Associate"},
+        "facets (aggs=1)": {"aggs": "1"},
+        "facets + filters": {"aggs": "1", "company": "Company 1", "posted_after": "2025-05-01"},
+    }
+    for name, params in queries.items():
+        samples, _ = timed(client, args.alias, build_search_body(params), args.repeat)
+        report(name, samples)
+
+    # Deep pagination: walk pages with search_after, then compare a single from/size page at the same depth
+    params = {"size": "50"}
+    page_samples = []
+    for _ in range(args.pages):
+        samples, response = timed(client, args.alias, build_search_body(params), 1)
+        page_samples.extend(samples)
+        hits = response["hits"]["hits"]
+        if not hits:
+            break
+        params["search_after"] = encode_cursor(hits[-1]["sort"])
+    report(f"search_after, {len(page_samples)} pages", page_samples)
+
+    depth = min(args.pages * 50, 9950)  # from+size is capped at index.max_result_window (10000)
+    offset_body = build_search_body({"size": "50"})
+    offset_body["from"] = depth
+    samples, _ = timed(client, args.alias, offset_body, args.repeat)
+    report(f"from/size at offset {depth}", samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/serializer_bench.py
+#
+# Bytes per record and encode/decode cost of each Kafka serializer, raw and after batch
+# compression (Kafka compresses whole batches, so records are compressed --batch at a time).
+# Reads records from data/test.json (a JSON list or one object per line); when that's empty,
+# generates them from the bundled job page fixture. lz4 and zstd columns need the packages from
+# requirements-bench.txt.
+#
+#   python -m benchmarks.serializer_bench
+#   python -m benchmarks.serializer_bench --corpus data/test.json --batch 500
+
+import os
+import gzip
+import json
+import time
+import random
+import argparse
+
+from app.scraper.job_parser import parse_job_html, build_job_data
+from benchmarks.local_server import load_fixture
+from kafka_utils.serializers import SERIALIZERS
+
+
+def load_corpus(path, n_generated):
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read().strip()
+        if text.startswith("["):
+            return json.loads(text)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    print(f"[Bench] {path} is empty, generating {n_generated} records from the fixture")
+    template = load_fixture("job_posting.html")
+    rng = random.Random(5)
+    records = []
+    for i in range(n_generated):
+        job_id = str(4100000000 + i * 7919)
+        fields = parse_job_html(template.replace("{job_id}", job_id))
+        # Shuffle the description's words so compression can't collapse near-identical records
+        words = fields["description"].split()
+        rng.shuffle(words)
+        fields["description"] = " ".join(words * 3)
+        records.append(build_job_data(fields, job_id, f"https://www.linkedin.com/jobs/view/{job_id}"))
+    return records
+
+
+def compressors():
+    found = {"none": lambda data: data, "gzip": gzip.compress}
+    try:
+        import lz4.frame
+        found["lz4"] = lz4.frame.compress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        found["zstd"] = zstandard.ZstdCompressor().compress
+    except ImportError:
+        pass
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default="data/test.json")
+    parser.add_argument("--generate", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    records = load_corpus(args.corpus, args.generate)
+    codecs = compressors()
+    print(f"[Bench] {len(records)} records, compression: {', '.join(codecs)}")
+
+    for name, serializer_cls in SERIALIZERS.items():
+        try:
+            serializer = serializer_cls()
+        except ImportError as e:
+            print(f"[Bench] {name:<8} skipped ({e})")
+            continue
+
+        started = time.perf_counter()
+        encoded = [serializer.encode(record) for record in records]
+        encode_us = (time.perf_counter() - started) / len(records) * 1e6
+
+        started = time.perf_counter()
+        for value in encoded:
+            serializer.decode(value)
+        decode_us = (time.perf_counter() - started) / len(records) * 1e6
+
+        sizes = []
+        for codec_name, compress in codecs.items():
+            started = time.perf_counter()
+            total = 0
+            for i in range(0, len(encoded), args.batch):
+                total += len(compress(b"".join(encoded[i:i + args.batch])))
+            compress_us = (time.perf_counter() - started) / len(records) * 1e6
+            sizes.append(f"{codec_name}={total / len(records):6.0f}B/{compress_us:4.1f}us")
+
+        print(f"[Bench] {name:<8} encode={encode_us:6.1f}us decode={decode_us:6.1f}us  {'  '.join(sizes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# benchmarks/sink_bench.py
+#
+# Kafka -> ES sink throughput: one index request and one offset commit per record (what a
+# document-at-a-time pipeline does) against ESSink's batched consume / bulk / commit. Both read
+# from MockConsumer, an in-memory topic with json, msgpack and binary records and some duplicates,
+# and write to the ES stand-in. A few bulk flushes fail outright (--outages) to check that the
+# batch is replayed and nothing is lost or committed early.
+#
+#   python -m benchmarks.sink_bench --records 20000 --latency 0.002
+
+import time
+import random
+import logging
+import argparse
+
+from elasticsearch import Elasticsearch
+
+from app.database.es_store import ESStore
+from app.sink.es_sink import ESSink, SinkRetry
+from kafka_utils.serializers import get_serializer, decode_record
+from benchmarks.es_stand_in import start_es_stand_in
+
+
+class MockMessage:
+    def __init__(self, topic, partition, offset, value, headers):
+        self._topic, self._partition, self._offset, self._value, self._headers = topic, partition, offset, value, headers
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def value(self):
+        return self._value
+
+    def headers(self):
+        return self._headers
+
+    def error(self):
+        return None
+
+
+class MockTopicPartition:
+    def __init__(self, topic, partition, offset=-1001):
+        self.topic, self.partition, self.offset = topic, partition, offset
+
+
+class MockConsumer:
+    """Just enough of confluent_kafka.Consumer for ESSink: one group member that owns every partition."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions  # {(topic, partition): [(value, headers), ...]}
+        self.positions = {key: 0 for key in partitions}
+        self.committed_offsets = {key: 0 for key in partitions}
+        self.commits = 0
+
+    def subscribe(self, topics):
+        pass
+
+    def consume(self, num_messages=1, timeout=-1):
+        batch = []
+        for (topic, partition), log in self.partitions.items():
+            start = self.positions[(topic, partition)]
+            take = log[start:start + num_messages - len(batch)]
+            batch.extend(MockMessage(topic, partition, start + i, value, headers) for i, (value, headers) in enumerate(take))
+            self.positions[(topic, partition)] = start + len(take)
+            if len(batch) >= num_messages:
+                break
+        return batch
+
+    def commit(self, offsets=None, asynchronous=True):
+        self.commits += 1
+        for tp in offsets:
+            self.committed_offsets[(tp.topic, tp.partition)] = tp.offset
+
+    def seek(self, tp):
+        self.positions[(tp.topic, tp.partition)] = tp.offset
+
+    def assignment(self):
+        return [MockTopicPartition(topic, partition) for topic, partition in self.partitions]
+
+    def position(self, partitions):
+        return [MockTopicPartition(tp.topic, tp.partition, self.positions[(tp.topic, tp.partition)]) for tp in partitions]
+
+    def committed(self, partitions, timeout=None):
+        return [MockTopicPartition(tp.topic, tp.partition, self.committed_offsets[(tp.topic, tp.partition)]) for tp in partitions]
+
+    def get_watermark_offsets(self, tp, timeout=None, cached=False):
+        return 0, len(self.partitions[(tp.topic, tp.partition)])
+
+    def done(self):
+        return all(self.positions[key] >= len(log) for key, log in self.partitions.items())
+
+    def close(self):
+        pass
+
+
+class FlakyStore:
+    """Wraps an ESStore; the first `outages` flushes fail as if the cluster were unreachable."""
+
+    def __init__(self, store, outages):
+        self.store = store
+        self.outages = outages
+
+    def add_jobs(self, jobs):
+        self.store.add_jobs(jobs)
+
+    def flush(self):
+        if self.outages:
+            self.outages -= 1
+            self.store.bulk._buffer.clear()
+            raise ConnectionError("stand-in outage")
+        return self.store.flush()
+
+
+def make_partitions(n_records, n_partitions, duplicate_ratio, fail_ids):
+    rng = random.Random(7)
+    serializers = [get_serializer("json"), get_serializer("msgpack"), get_serializer("binary")]
+    partitions = {("job_records", p): [] for p in range(n_partitions)}
+    unique_ids = set()
+    for i in range(n_records):
+        job_id = str(4000000000 + (rng.randrange(i) if i and rng.random() < duplicate_ratio else i))
+        unique_ids.add(job_id)
+        record = {"job_id": job_id, "job_url": f"https://www.linkedin.com/jobs/view/{job_id}", "job_title": "Data Engineer",
+                  "company_name": f"Company {i % 97}", "location": "Toronto, ON", "applicants": "Over 200 applicants",
+                  "description": "Build and run streaming pipelines. " * 20}
+        serializer = serializers[i % len(serializers)]
+        partitions[("job_records", int(job_id) % n_partitions)].append((serializer.encode(record), serializer.headers()))
+    return partitions, unique_ids - fail_ids
+
+
+def run_per_record(client, consumer, index):
+    while not consumer.done():
+        for msg in consumer.consume(num_messages=1):
+            record = decode_record(msg.value(), msg.headers())
+            try:
+                client.index(index=index, id=record["job_id"], document=record)
+            except Exception:
+                pass
+            consumer.commit(offsets=[MockTopicPartition(msg.topic(), msg.partition(), msg.offset() + 1)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--partitions", type=int, default=5)
+    parser.add_argument("--batch_size", type=int, default=2000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Share of records that repeat an earlier job_id")
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--outages", type=int, default=2, help="Bulk flushes that fail before the cluster 'comes back'")
+    parser.add_argument("--per_record_limit", type=int, default=3000, help="Records for the (slow) per-record run")
+    args = parser.parse_args()
+
+    fail_ids = {str(4000000000 + i) for i in range(0, args.records, 1000)}
+    server, base_url = start_es_stand_in(latency=args.latency, fail_ids=fail_ids)
+    client = Elasticsearch(base_url)
+    logging.getLogger("elastic_transport").setLevel(logging.WARNING)
+    partitions, expected_ids = make_partitions(args.records, args.partitions, args.duplicates, fail_ids)
+
+    limit = min(args.per_record_limit, args.records)
+    sample = {key: log[:limit // args.partitions] for key, log in partitions.items()}
+    sample_size = sum(len(log) for log in sample.values())
+    ESStore(index_name="bench_per_record", client=client)
+    consumer = MockConsumer(sample)
+    started = time.perf_counter()
+    run_per_record(client, consumer, "bench_per_record")
+    per_record_s = time.perf_counter() - started
+    print(f"[Bench] per-record index+commit: {sample_size / per_record_s:8.0f} records/s  ({sample_size} records, {consumer.commits} commits)")
+
+    store = ESStore(index_name="bench_sink", client=client, bulk_max_docs=args.batch_size + 1, flush_interval=0)
+    consumer = MockConsumer(partitions)
+    sink = ESSink(FlakyStore(store, args.outages), consumer_factory=lambda: consumer, batch_size=args.batch_size)
+    sink.consumer.subscribe(sink.topics)
+    server.cluster.requests.clear()
+    started = time.perf_counter()
+    while not consumer.done():
+        messages = consumer.consume(num_messages=args.batch_size)
+        try:
+            sink.process_batch(messages)
+        except SinkRetry:
+            sink.stats["retries"] += 1
+            sink.rewind(messages)
+    batched_s = time.perf_counter() - started
+    sink.report()
+
+    indexed = set(server.cluster.docs("bench_sink"))
+    fully_committed = all(consumer.committed_offsets[key] == len(log) for key, log in partitions.items())
+    print(f"[Bench] batched sink:            {args.records / batched_s:8.0f} records/s  ({args.records} records, "
+          f"{consumer.commits} commits, {sum(server.cluster.requests.values())} requests)")
+    print(f"[Bench] outages replayed={sink.stats['retries']}  unique jobs indexed={len(indexed)} (expected {len(expected_ids)})  "
+          f"missing={len(expected_ids - indexed)}  rejected={sink.stats['rejected']} (injected {len(fail_ids)})  "
+          f"offsets fully committed={fully_committed}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
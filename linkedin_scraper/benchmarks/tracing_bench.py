@@ -0,0 +1,70 @@
+# benchmarks/tracing_bench.py
+#
+# Cost of the span() calls left in the scrape loops: a bare loop, tracing off (the default), and
+# tracing on with the JSONL exporter writing to a temp file. Each iteration is a job span with
+# four child stages, like scraper_worker.scrape_job. A stage that does real work (driver.get,
+# the //h2 wait) takes milliseconds, so the per-span cost should be a few microseconds at most.
+#
+#   python -m benchmarks.tracing_bench --iterations 100000
+
+import os
+import time
+import argparse
+import tempfile
+
+from app.tracing import Tracer, JsonlExporter, summarize
+
+STAGES = ["rate_limit.acquire", "driver.get", "wait.h2", "parse_job_details"]
+
+
+def bare(iterations):
+    total = 0
+    for i in range(iterations):
+        for stage in STAGES:
+            total += len(stage)
+    return total
+
+
+def traced(tracer, iterations):
+    total = 0
+    for i in range(iterations):
+        with tracer.span("worker.job", job_id=i):
+            for stage in STAGES:
+                with tracer.span(stage):
+                    total += len(stage)
+    return total
+
+
+def timed(name, fn, iterations, baseline=None):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    spans = iterations * (len(STAGES) + 1)
+    overhead = f"  +{(elapsed - baseline) / spans * 1e6:6.2f}us per span" if baseline is not None else ""
+    print(f"[Bench] {name:<22}: {elapsed * 1000:9.1f}ms{overhead}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = timed("no spans", lambda: bare(args.iterations), args.iterations)
+    timed("tracing off", lambda: traced(Tracer(None), args.iterations), args.iterations, baseline)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces.jsonl")
+        tracer = Tracer(JsonlExporter(path), service="bench")
+        timed("tracing on (jsonl)", lambda: traced(tracer, args.iterations), args.iterations, baseline)
+        started = time.perf_counter()
+        tracer.flush()
+        print(f"[Bench] {'export flush':<22}: {(time.perf_counter() - started) * 1000:9.1f}ms")
+        sampled = Tracer(JsonlExporter(path), sample_rate=0.01, service="bench")
+        timed("tracing on, 1% sampled", lambda: traced(sampled, args.iterations), args.iterations, baseline)
+        sampled.flush()
+        summarize(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,64 @@
 from confluent_kafka import Producer
 from confluent_kafka.admin import AdminClient, NewTopic
+import os
+import atexit
 import logging
-import json
 import time
+import threading
+
+from .serializers import get_serializer
 
 KAFKA_BROKERS = "kafka-broker-1:19092,kafka-broker-2:19092,kafka-broker-3:19092"
 NUM_PARTITIONS = 5
 REPLICATION_FACTOR = 3
+MAX_IN_FLIGHT = int(os.environ.get("KAFKA_MAX_IN_FLIGHT", 5000))
+SHUTDOWN_FLUSH_TIMEOUT = 30
+TOPIC_RETRY_MIN_SECONDS = 5
+TOPIC_RETRY_MAX_SECONDS = 300
+PRODUCE_ATTEMPTS = int(os.environ.get("KAFKA_PRODUCE_ATTEMPTS", 5))
+PRODUCE_RETRY_MIN_SECONDS = 0.5
+PRODUCE_RETRY_MAX_SECONDS = 8
+# Compression happens per batch inside librdkafka; lz4 and zstd are much cheaper on CPU than gzip
+KAFKA_COMPRESSION = os.environ.get("KAFKA_COMPRESSION", "gzip")
+
+PRODUCER_CONF = {
+    'bootstrap.servers': KAFKA_BROKERS,
+    'queue.buffering.max.messages': 10000,
+    'queue.buffering.max.kbytes': 512000,
+    'batch.num.messages': 1000,
+    'linger.ms': 10,
+    'acks': 1,
+    'compression.type': KAFKA_COMPRESSION
+}
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 producer = None
-topic_created = False
+produce_metrics = None
+_produce_metrics_lock = threading.Lock()
 
 def get_producer():
     global producer
     if producer is None:
-        producer_conf = {
-            'bootstrap.servers': KAFKA_BROKERS,
-            'queue.buffering.max.messages': 10000,
-            'queue.buffering.max.kbytes': 512000,
-            'batch.num.messages': 1000,
-            'linger.ms': 10,
-            'acks': 1,
-            'compression.type': 'gzip'
-        }
-        producer = Producer(producer_conf)
+        producer = Producer(PRODUCER_CONF)
     return producer
 
+def get_produce_metrics():
+    """(produce seconds histogram, failure counter), registered on first use; prometheus_client alone takes ~70ms to import."""
+    global produce_metrics
+    if produce_metrics is None:
+        with _produce_metrics_lock:
+            if produce_metrics is None:
+                from prometheus_client import Counter, Histogram
+                # produce() -> delivery report, as measured by librdkafka (Message.latency()); includes linger.ms
+                produce_metrics = (
+                    Histogram("kafka_produce_seconds", "produce() until the broker acknowledged the record", ["topic"],
+                              buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)),
+                    Counter("kafka_produce_failures", "Records whose delivery report was an error", ["topic"]),
+                )
+    return produce_metrics
+
 def create_topic(topic_name):
     admin_client = AdminClient({"bootstrap.servers": KAFKA_BROKERS})
     try:
@@ -46,10 +76,13 @@ def create_topic(topic_name):
                     logger.info(f"Topic '{topic_name}' created successfully!")
                 except Exception as e:
                     logger.error(f"Failed to create topic '{topic_name}': {e}")
+                    return False
         else:
             logger.info(f"Topic '{topic_name}' already exists")
+        return True
     except Exception as e:
         logger.error(f"Error creating topic: {e}")
+        return False
 
 def delivery_report(err, msg):
     if err is not None:
@@ -57,26 +90,151 @@ def delivery_report(err, msg):
     else:
         print(f'Record {msg.key()} successfully produced')
 
-def produce_transaction(record, topic_name="job_records"):
-    global topic_created
 
-    if not topic_created:
-        create_topic(topic_name)
-        topic_created = True
+class JobProducer:
+    """
+    Non-blocking wrapper around the confluent Producer.
+
+    produce() only enqueues into librdkafka's buffer, so linger.ms / batch.num.messages batch
+    records the way they're meant to. Delivery callbacks run from poll(), which every produce()
+    calls with a zero timeout. At most max_in_flight records wait for delivery; past that,
+    produce() polls until the broker catches up. Pending records are flushed at exit.
+    """
+
+    def __init__(self, producer_factory=get_producer, topic_creator=create_topic, max_in_flight=MAX_IN_FLIGHT, serializer=None):
+        self.producer_factory = producer_factory
+        self.serializer = serializer or get_serializer()
+        self._headers = self.serializer.headers()
+        self.topic_creator = topic_creator
+        self.max_in_flight = max_in_flight
+        self._producer = None
+        self._topics = set()
+        self._topic_retry = {}  # topic -> (next attempt, current backoff) after a failed creation
+        self._topic_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.stats = {"produced": 0, "delivered": 0, "failed": 0, "in_flight": 0, "backpressure_waits": 0}
 
-    p = get_producer()
+    @property
+    def producer(self):
+        if self._producer is None:
+            self._producer = self.producer_factory()
+        return self._producer
 
-    while True:
+    def ensure_topic(self, topic_name):
+        """
+        Create the topic the first time we produce to it; only remembered once creation succeeds.
+        A failed attempt (brokers unreachable) isn't retried until its backoff has passed, and
+        while one thread is trying, the others produce without waiting for it.
+        """
+        if topic_name in self._topics:
+            return
+        retry = self._topic_retry.get(topic_name)
+        if retry and time.monotonic() < retry[0]:
+            return
+        if not self._topic_lock.acquire(blocking=False):
+            return
         try:
-            p.produce(
-                topic=topic_name,
-                key=record['job_id'],
-                value=json.dumps(record).encode('utf-8'),
-                on_delivery=delivery_report
-            )
+            if topic_name in self._topics:
+                return
+            try:
+                created = self.topic_creator(topic_name) is not False
+            except Exception as e:
+                logger.error(f"Error creating topic '{topic_name}': {e}")
+                created = False
+            if created:
+                self._topics.add(topic_name)
+                self._topic_retry.pop(topic_name, None)
+            else:
+                backoff = min(retry[1] * 2, TOPIC_RETRY_MAX_SECONDS) if retry else TOPIC_RETRY_MIN_SECONDS
+                self._topic_retry[topic_name] = (time.monotonic() + backoff, backoff)
+                logger.warning(f"Topic '{topic_name}' not confirmed, next attempt in {backoff}s")
+        finally:
+            self._topic_lock.release()
+
+    def _on_delivery(self, err, msg, callback=None):
+        with self._lock:
+            self.stats["in_flight"] -= 1
+            if err is not None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["delivered"] += 1
+        produce_seconds, produce_failures = get_produce_metrics()
+        if err is not None:
+            produce_failures.labels(topic=msg.topic()).inc()
+            print(f'Delivery failed for record {msg.key()}: {err}')
+        elif msg.latency() is not None:
+            produce_seconds.labels(topic=msg.topic()).observe(msg.latency())
+        if callback:
+            callback(err, msg)
+
+    def produce(self, record, topic_name="job_records", key=None, on_delivery=None):
+        """on_delivery(err, msg), if given, runs after this record's delivery report (err is None on success)."""
+        self.ensure_topic(topic_name)
+        get_produce_metrics()
+        value = self.serializer.encode(record)
+        key = key if key is not None else record['job_id']
+        p = self.producer
+        callback = self._on_delivery if on_delivery is None else lambda err, msg: self._on_delivery(err, msg, on_delivery)
+
+        # Backpressure: let the broker acknowledge what's already buffered before adding more
+        while self.stats["in_flight"] >= self.max_in_flight:
+            self.stats["backpressure_waits"] += 1
+            p.poll(0.1)
+
+        while True:
+            try:
+                p.produce(topic=topic_name, key=key, value=value, headers=self._headers, on_delivery=callback)
+                break
+            except BufferError:
+                # librdkafka's local queue is full; serve delivery reports to make room
+                p.poll(1)
+
+        with self._lock:
+            self.stats["produced"] += 1
+            self.stats["in_flight"] += 1
+        p.poll(0)
+
+    def poll(self, timeout=0):
+        if self._producer is not None:
+            return self._producer.poll(timeout)
+        return 0
+
+    def flush(self, timeout=SHUTDOWN_FLUSH_TIMEOUT):
+        """Block until everything buffered is delivered (or timeout); returns the number still pending."""
+        if self._producer is None:
+            return 0
+        remaining = self._producer.flush(timeout)
+        if remaining:
+            logger.error(f"{remaining} records still undelivered after {timeout}s flush")
+        return remaining
+
+    def close(self):
+        if self._producer is None:
+            return 0
+        remaining = self.flush()
+        logger.info(f"Producer closed: {self.stats}")
+        return remaining
+
+
+job_producer = JobProducer()
+atexit.register(job_producer.close)
+
+
+def produce_transaction(record, topic_name="job_records", on_delivery=None):
+    """
+    Queue a job record for delivery. Returns right away; delivery is confirmed in the background.
+    produce() errors are retried PRODUCE_ATTEMPTS times with backoff, then re-raised to the caller.
+    """
+    delay = PRODUCE_RETRY_MIN_SECONDS
+    for attempt in range(1, PRODUCE_ATTEMPTS + 1):
+        try:
+            job_producer.produce(record, topic_name=topic_name, on_delivery=on_delivery)
             print(f"Job ID: {record['job_id']}\t{record['job_title']}-{record['company_name']}")
-            p.flush()
-            break  # success
+            return
         except Exception as e:
-            print(f'Error sending transaction: {e}, retrying in 1s...')
-            time.sleep(1)
+            if attempt == PRODUCE_ATTEMPTS:
+                print(f'Error sending transaction: {e}, giving up after {attempt} attempts')
+                raise
+            print(f'Error sending transaction: {e}, retrying in {delay}s...')
+            time.sleep(delay)
+            delay = min(delay * 2, PRODUCE_RETRY_MAX_SECONDS)
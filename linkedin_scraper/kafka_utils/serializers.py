@@ -0,0 +1,185 @@
+# kafka_utils/serializers.py
+#
+# Wire formats for job records. Every message carries two headers:
+#   content-type    application/json | application/msgpack | application/x-job-record
+#   schema-version  integer, bumped whenever a format's layout changes
+# so a consumer can pick the decoder per message and topics can be migrated gradually.
+#
+# KAFKA_SERIALIZER picks the format (json by default, which is what Logstash's json codec
+# reads). orjson emits the same JSON as json, only faster. msgpack and binary need a
+# consumer that reads the headers, e.g. decode_record() below.
+
+import os
+import json
+import struct
+
+KAFKA_SERIALIZER = os.environ.get("KAFKA_SERIALIZER", "json")
+CONTENT_TYPE_HEADER = "content-type"
+SCHEMA_VERSION_HEADER = "schema-version"
+
+# Field order of the binary record. Append only: add new fields at the end and bump the version.
+RECORD_FIELDS_V1 = [
+    "job_id", "job_url", "job_title", "company_name", "location", "posted_time", "posted_timestamp",
+    "applicants", "description", "Seniority level", "Employment type", "Job function", "Industries",
+]
+
+
+class JsonSerializer:
+    name = "json"
+    content_type = "application/json"
+    schema_version = 1
+
+    def encode(self, record):
+        return json.dumps(record).encode("utf-8")
+
+    def decode(self, value):
+        return json.loads(value)
+
+    def headers(self):
+        return [(CONTENT_TYPE_HEADER, self.content_type), (SCHEMA_VERSION_HEADER, str(self.schema_version))]
+
+
+class OrjsonSerializer(JsonSerializer):
+    """Same bytes on the wire as JsonSerializer (minus whitespace), several times faster."""
+
+    name = "orjson"
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError("KAFKA_SERIALIZER=orjson requires the 'orjson' package")
+        self._orjson = orjson
+
+    def encode(self, record):
+        return self._orjson.dumps(record)
+
+    def decode(self, value):
+        return self._orjson.loads(value)
+
+
+class MsgpackSerializer(JsonSerializer):
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("KAFKA_SERIALIZER=msgpack requires the 'msgpack' package")
+        self._msgpack = msgpack
+
+    def encode(self, record):
+        return self._msgpack.packb(record, use_bin_type=True)
+
+    def decode(self, value):
+        return self._msgpack.unpackb(value, raw=False)
+
+
+class BinaryRecordSerializer(JsonSerializer):
+    """
+    Schema-versioned binary layout, no field names on the wire:
+
+        u8 version | u16 presence bitmap | per present field: varint length + utf-8 bytes
+        | optional trailer: JSON object with any keys not in the schema
+
+    Fields are RECORD_FIELDS_V1 in order; bit i of the bitmap is set when field i is a string.
+    Bit 15 marks the trailer. A schema field holding anything else (int, bool, list, dict) goes in
+    the trailer too, so values come back with the type they had; None, or a missing field, decodes
+    as None.
+    """
+
+    name = "binary"
+    content_type = "application/x-job-record"
+    schema_version = 1
+    fields = RECORD_FIELDS_V1
+    _EXTRA_BIT = 15
+
+    def encode(self, record):
+        presence = 0
+        parts = []
+        for i, name in enumerate(self.fields):
+            value = record.get(name)
+            if not isinstance(value, str):
+                continue
+            presence |= 1 << i
+            data = value.encode("utf-8")
+            parts.append(_encode_varint(len(data)))
+            parts.append(data)
+
+        extra = {k: v for k, v in record.items() if k not in self.fields or not (v is None or isinstance(v, str))}
+        if extra:
+            presence |= 1 << self._EXTRA_BIT
+            data = json.dumps(extra).encode("utf-8")
+            parts.append(_encode_varint(len(data)))
+            parts.append(data)
+
+        return struct.pack(">BH", self.schema_version, presence) + b"".join(parts)
+
+    def decode(self, value):
+        version, presence = struct.unpack_from(">BH", value, 0)
+        if version != self.schema_version:
+            raise ValueError(f"Unsupported binary record version {version}")
+        pos = 3
+        record = {}
+        for i, name in enumerate(self.fields):
+            if not presence & (1 << i):
+                record[name] = None
+                continue
+            length, pos = _decode_varint(value, pos)
+            record[name] = value[pos:pos + length].decode("utf-8")
+            pos += length
+        if presence & (1 << self._EXTRA_BIT):
+            length, pos = _decode_varint(value, pos)
+            record.update(json.loads(value[pos:pos + length]))
+        return record
+
+
+def _encode_varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _decode_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+    "binary": BinaryRecordSerializer,
+}
+DECODERS_BY_CONTENT_TYPE = {
+    JsonSerializer.content_type: JsonSerializer,
+    MsgpackSerializer.content_type: MsgpackSerializer,
+    BinaryRecordSerializer.content_type: BinaryRecordSerializer,
+}
+
+
+def get_serializer(name=KAFKA_SERIALIZER):
+    if name not in SERIALIZERS:
+        raise ValueError(f"Invalid serializer '{name}'. Valid options: {list(SERIALIZERS)}")
+    return SERIALIZERS[name]()
+
+
+def decode_record(value, headers=None):
+    """Decode a message value using its content-type header; messages without headers are JSON."""
+    content_type = JsonSerializer.content_type
+    for key, header_value in headers or []:
+        if key == CONTENT_TYPE_HEADER:
+            content_type = header_value.decode("utf-8") if isinstance(header_value, bytes) else header_value
+    if content_type not in DECODERS_BY_CONTENT_TYPE:
+        raise ValueError(f"Unknown content-type '{content_type}'")
+    return DECODERS_BY_CONTENT_TYPE[content_type]().decode(value)
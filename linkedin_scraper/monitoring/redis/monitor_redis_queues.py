@@ -1,7 +1,13 @@
+import os
+import sys
 import time
 import redis
 import json
 
+# Run from anywhere (python monitoring/redis/monitor_redis_queues.py): the dedup indexes come from the app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from app.scraper.redis_store import RedisStore
+
 REDIS_HOST = "localhost"      
 REDIS_PORT = 6380
 POLL_INTERVAL = 10        # seconds between refresh
@@ -11,21 +17,30 @@ def get_redis_connection():
 
 def monitor_queues():
     client = get_redis_connection()
+    # Seen/scraped IDs are a set, a bitmap or a Bloom filter depending on DEDUP_BACKEND; count() handles each
+    store = RedisStore(client=client)
 
     while True:
         try:
             pending_new_count = client.llen("pending_new_jobs")
             # pending_update_count = client.llen("pending_update_jobs")
             failed_jobs_count = client.llen("failed_jobs") if client.exists("failed_jobs") else 0
-            total_seen_jobs = client.scard("linkedin_job_ids")
-            total_scraped_jobs = client.scard("scraped_job_ids")
+            in_flight_count = client.zcard("pending_new_jobs:leases")
+            total_seen_jobs = store.seen_index.count()
+            total_scraped_jobs = store.scraped_index.count()
 
             print("\n📊  [Redis Queue Monitor] ------------------------------")
             print(f"Pending New Jobs        : {pending_new_count}")
             # print(f"Pending Update Jobs     : {pending_update_count}")
+            print(f"In-Flight (Leased) Jobs  : {in_flight_count}")
             print(f"Failed Jobs              : {failed_jobs_count}")
-            print(f"Total Seen Jobs (Set)    : {total_seen_jobs}")
-            print(f"Total Scraped Jobs (Set) : {total_scraped_jobs}")
+            print(f"Total Seen Jobs          : {total_seen_jobs}")
+            print(f"Total Scraped Jobs       : {total_scraped_jobs}")
+            for worker_id, raw in sorted(client.hgetall("es_sink:stats").items()):
+                stats = json.loads(raw)
+                age = time.time() - stats.get("updated_at", 0)
+                print(f"ES Sink {worker_id:<16}: lag={stats['lag']}  {stats['records_per_s']} rec/s  "
+                      f"indexed={stats['indexed']}  rejected={stats['rejected']}  ({age:.0f}s ago)")
             print("--------------------------------------------------------\n")
 
         except Exception as e:
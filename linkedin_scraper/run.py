@@ -2,6 +2,7 @@ import argparse
 import os
 from app.main import create_app
 from app.scraper.scraper import scrape_linkedin_jobs
+from app.tracing import init_tracing
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="LinkedIn Job Scraper")
@@ -28,6 +29,7 @@ def select_dynamic_date_filter(date_filter, max_posted_days):
 def main():
     args = parse_arguments()
     final_date_filter = select_dynamic_date_filter(args.date_filter, args.max_posted_days)
+    init_tracing(f"linkedin-{args.mode}")
 
     if args.mode == "cli":
         print(f"Running in CLI mode: scraping '{args.title}' jobs in '{args.location}' (max {args.max_jobs}) with date filter '{final_date_filter}'")
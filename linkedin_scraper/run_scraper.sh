@@ -7,3 +7,7 @@
 
 echo "Running LinkedIn scraper..."
 docker compose exec linkedin-web python run.py --mode cli --title "Software Engineer" --location "Bangalore" --max_jobs 100
+
+# The monitor-scheduler service polls app/monitor/queries.json; show where each query stands
+echo "Monitor scheduler status..."
+docker compose exec linkedin-web python -m app.monitor.scheduler stats